@@ -0,0 +1,52 @@
+"""Add active_hours_mask to user_activity
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from bot.utils.hours import hours_csv_to_mask
+
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_activity",
+        sa.Column("active_hours_mask", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Backfill from the legacy comma-separated hours. Done in Python so the
+    # same migration works on SQLite and PostgreSQL.
+    user_activity = sa.table(
+        "user_activity",
+        sa.column("id", sa.Integer()),
+        sa.column("active_hours", sa.String()),
+        sa.column("active_hours_mask", sa.Integer()),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(user_activity.c.id, user_activity.c.active_hours).where(
+            user_activity.c.active_hours != ""
+        )
+    ).all()
+    if rows:
+        conn.execute(
+            user_activity.update()
+            .where(user_activity.c.id == sa.bindparam("row_id"))
+            .values(active_hours_mask=sa.bindparam("mask")),
+            [{"row_id": row_id, "mask": hours_csv_to_mask(hours)} for row_id, hours in rows],
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("user_activity", "active_hours_mask")
@@ -0,0 +1,34 @@
+"""Add message_authors table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "message_authors",
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("chat_id", "message_id"),
+    )
+    op.create_index("ix_message_authors_sent_at", "message_authors", ["sent_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_message_authors_sent_at", table_name="message_authors")
+    op.drop_table("message_authors")
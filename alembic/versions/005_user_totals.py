@@ -0,0 +1,44 @@
+"""Add user_totals rollup table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_totals",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("username", sa.String(length=100), nullable=True),
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_chars", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("bot_mentions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bot_replies", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("swear_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("mom_insult_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fire_reactions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("heart_reactions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("xp", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("level", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("ix_user_totals_xp", "user_totals", ["xp"])
+    # The table is backfilled from user_activity by init_db() on the next
+    # start, or explicitly with `python scripts/user_totals.py rebuild`.
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_totals_xp", table_name="user_totals")
+    op.drop_table("user_totals")
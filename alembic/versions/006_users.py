@@ -0,0 +1,58 @@
+"""Add users directory, move usernames out of user_totals
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("username", sa.String(length=100), nullable=True),
+        sa.Column("last_seen", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("ix_users_username_lower", "users", [sa.text("lower(username)")])
+
+    # Seed from each user's newest per-day username (user_activity.username
+    # is no longer written after this revision)
+    op.execute(
+        """
+        INSERT INTO users (user_id, username)
+        SELECT a.user_id, a.username
+        FROM user_activity a
+        JOIN (
+            SELECT user_id, MAX(date) AS date
+            FROM user_activity
+            WHERE username IS NOT NULL
+            GROUP BY user_id
+        ) latest ON latest.user_id = a.user_id AND latest.date = a.date
+        """
+    )
+
+    with op.batch_alter_table("user_totals") as batch:
+        batch.drop_column("username")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_totals") as batch:
+        batch.add_column(sa.Column("username", sa.String(length=100), nullable=True))
+    op.execute(
+        "UPDATE user_totals SET username = "
+        "(SELECT username FROM users WHERE users.user_id = user_totals.user_id)"
+    )
+    op.drop_index("ix_users_username_lower", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,60 @@
+"""Add indexes for the hot query paths
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_OPEN = sa.text("status = 'open'")
+_ACTIVE = sa.text("status <> 'cancelled'")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_sessions_open_slot",
+        "sessions",
+        ["game_id", "chat_id", "day", "week_start"],
+        sqlite_where=_OPEN,
+        postgresql_where=_OPEN,
+    )
+    op.create_index(
+        "ix_sessions_open_chat",
+        "sessions",
+        ["chat_id"],
+        sqlite_where=_OPEN,
+        postgresql_where=_OPEN,
+    )
+    op.create_index(
+        "ix_bookings_session_status_position",
+        "bookings",
+        ["session_id", "status", "position"],
+    )
+    op.create_index(
+        "ix_bookings_session_active",
+        "bookings",
+        ["session_id", "position"],
+        sqlite_where=_ACTIVE,
+        postgresql_where=_ACTIVE,
+    )
+    op.create_index("ix_booking_history_user_id", "booking_history", ["user_id"])
+    op.create_index("ix_user_activity_date", "user_activity", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_activity_date", table_name="user_activity")
+    op.drop_index("ix_booking_history_user_id", table_name="booking_history")
+    op.drop_index("ix_bookings_session_active", table_name="bookings")
+    op.drop_index("ix_bookings_session_status_position", table_name="bookings")
+    op.drop_index("ix_sessions_open_chat", table_name="sessions")
+    op.drop_index("ix_sessions_open_slot", table_name="sessions")
@@ -0,0 +1,45 @@
+"""Add booking_counters table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_counters",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("game", sa.String(length=50), nullable=False),
+        sa.Column("booked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cancelled", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("played", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("user_id", "game"),
+    )
+    op.execute(
+        """
+        INSERT INTO booking_counters (user_id, game, booked, cancelled, played)
+        SELECT user_id, game,
+               COUNT(CASE WHEN action = 'booked' THEN 1 END),
+               COUNT(CASE WHEN action = 'cancelled' THEN 1 END),
+               COUNT(CASE WHEN action = 'played' THEN 1 END)
+        FROM booking_history
+        WHERE action IN ('booked', 'cancelled', 'played')
+        GROUP BY user_id, game
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("booking_counters")
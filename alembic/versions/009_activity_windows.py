@@ -0,0 +1,53 @@
+"""Add activity_windows table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COUNTERS = (
+    "message_count",
+    "total_chars",
+    "short_count",
+    "medium_count",
+    "long_count",
+    "media_count",
+    "question_count",
+    "reactions_received",
+    "bot_mentions",
+    "bot_replies",
+    "swear_count",
+    "mom_insult_count",
+    "fire_reactions",
+    "heart_reactions",
+    "active_days",
+    "active_hours_mask",
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_windows",
+        sa.Column("days", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("starts_on", sa.Date(), nullable=False),
+        sa.Column("last_date", sa.Date(), nullable=False),
+        *(sa.Column(name, sa.Integer(), nullable=False, server_default="0") for name in _COUNTERS),
+        sa.PrimaryKeyConstraint("days", "user_id"),
+    )
+    # The windows are filled from user_activity by init_db() on the next start.
+
+
+def downgrade() -> None:
+    op.drop_table("activity_windows")
@@ -0,0 +1,38 @@
+"""Add activity_hours table
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Counts start from this revision: the old hour masks only say whether a
+    # user was active in an hour, not how much.
+    op.create_table(
+        "activity_hours",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        *(
+            sa.Column(f"h{hour:02d}", sa.Integer(), nullable=False, server_default="0")
+            for hour in range(24)
+        ),
+        sa.PrimaryKeyConstraint("user_id", "date"),
+    )
+    op.create_index("ix_activity_hours_date", "activity_hours", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_hours_date", table_name="activity_hours")
+    op.drop_table("activity_hours")
@@ -0,0 +1,33 @@
+"""Add ranking_snapshots table
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The first snapshot is taken by init_db on the next start
+    op.create_table(
+        "ranking_snapshots",
+        sa.Column("taken_on", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("xp", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("taken_on", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ranking_snapshots")
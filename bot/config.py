@@ -14,6 +14,9 @@ class Config:
     admin_ids: list[int]
     groq_api_key: str
     ai_enabled: bool
+    activity_flush_interval: float
+    activity_flush_max_messages: int
+    message_author_ttl_days: int
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -36,6 +39,9 @@ class Config:
             admin_ids=admin_ids,
             groq_api_key=os.getenv("GROQ_API_KEY", ""),
             ai_enabled=os.getenv("AI_ENABLED", "true").lower() == "true",
+            activity_flush_interval=float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "10")),
+            activity_flush_max_messages=int(os.getenv("ACTIVITY_FLUSH_MAX_MESSAGES", "200")),
+            message_author_ttl_days=int(os.getenv("MESSAGE_AUTHOR_TTL_DAYS", "14")),
         )
 
 
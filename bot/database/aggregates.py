@@ -0,0 +1,72 @@
+"""Per-user ``GROUP BY`` aggregates over ``user_activity``.
+
+Shared by the bot's repositories and the web API so totals are summed by the
+database instead of loading every daily row into Python. Usernames come from
+the ``users`` directory.
+"""
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import Select, and_, case, func, select
+
+from bot.database.models import User, UserActivity
+
+
+def total(column):
+    """SUM that yields 0 rather than NULL when no rows match."""
+    return func.coalesce(func.sum(column), 0)
+
+
+# Days with at least one message; reaction-only days do not count
+active_days = func.count(case((UserActivity.message_count > 0, 1)))
+
+
+def latest_usernames(since: date | None = None):
+    """Subquery of (user_id, username) from each user's latest row that has one.
+
+    Reads the legacy per-day usernames; only used to backfill ``users``.
+    """
+    conditions = [UserActivity.username.is_not(None)]
+    if since is not None:
+        conditions.append(UserActivity.date >= since)
+    latest = (
+        select(UserActivity.user_id, func.max(UserActivity.date).label("date"))
+        .where(*conditions)
+        .group_by(UserActivity.user_id)
+        .subquery()
+    )
+    return (
+        select(UserActivity.user_id, UserActivity.username)
+        .join(
+            latest,
+            and_(UserActivity.user_id == latest.c.user_id, UserActivity.date == latest.c.date),
+        )
+        .subquery()
+    )
+
+
+def user_totals(
+    columns: Sequence[str],
+    since: date | None = None,
+    with_active_days: bool = False,
+) -> Select:
+    """SELECT user_id, username, SUM(<column>)... [, active_days] GROUP BY user_id.
+
+    Result rows have the same keys, in the same order, as the dicts the
+    repositories used to build by hand.
+    """
+    aggregates = [total(getattr(UserActivity, name)).label(name) for name in columns]
+    if with_active_days:
+        aggregates.append(active_days.label("active_days"))
+
+    sums = select(UserActivity.user_id, *aggregates).group_by(UserActivity.user_id)
+    if since is not None:
+        sums = sums.where(UserActivity.date >= since)
+    sums = sums.subquery()
+
+    selected = [sums.c[name] for name in columns]
+    if with_active_days:
+        selected.append(sums.c.active_days)
+    return select(sums.c.user_id, User.username, *selected).outerjoin(
+        User, User.user_id == sums.c.user_id
+    )
@@ -4,11 +4,13 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Time,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -48,6 +50,22 @@ class Session(Base):
         back_populates="session", cascade="all, delete-orphan"
     )
 
+    # Only open sessions are ever looked up; closed ones accumulate forever
+    __table_args__ = (
+        Index(
+            "ix_sessions_open_slot",
+            "game_id", "chat_id", "day", "week_start",
+            sqlite_where=text("status = 'open'"),
+            postgresql_where=text("status = 'open'"),
+        ),
+        Index(
+            "ix_sessions_open_chat",
+            "chat_id",
+            sqlite_where=text("status = 'open'"),
+            postgresql_where=text("status = 'open'"),
+        ),
+    )
+
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -70,12 +88,41 @@ class Booking(Base):
 
     session: Mapped["Session"] = relationship(back_populates="bookings")
 
+    __table_args__ = (
+        # promote_waitlist / get_confirmed: status equality, ordered by position
+        Index("ix_bookings_session_status_position", "session_id", "status", "position"),
+        # get_by_session / get_user_booking skip cancelled rows
+        Index(
+            "ix_bookings_session_active",
+            "session_id", "position",
+            sqlite_where=text("status <> 'cancelled'"),
+            postgresql_where=text("status <> 'cancelled'"),
+        ),
+    )
+
+
+class User(Base):
+    """Directory of known users: the single current username per user_id."""
+
+    __tablename__ = "users"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    username: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    last_seen: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    # Case-insensitive @username lookups; not unique because a username can
+    # move to another account before the old holder is seen again.
+    __table_args__ = (Index("ix_users_username_lower", func.lower(username)),)
+
 
 class UserActivity(Base):
     __tablename__ = "user_activity"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Legacy per-day copy of the username, no longer written; see User.
     username: Mapped[str | None] = mapped_column(String(100), nullable=True)
     date: Mapped[date] = mapped_column(Date, nullable=False)
     message_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -86,7 +133,10 @@ class UserActivity(Base):
     media_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     question_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     reactions_received: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Legacy comma-separated hours, no longer written; see active_hours_mask.
     active_hours: Mapped[str] = mapped_column(String(200), default="", nullable=False)
+    # Bit N set = active during hour N (0-23), see bot.utils.hours
+    active_hours_mask: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     bot_mentions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     bot_replies: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     swear_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -94,14 +144,101 @@ class UserActivity(Base):
     fire_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     heart_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "date"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "date"),
+        # Windowed aggregates (/top, /stat, weekly report) filter on date only
+        Index("ix_user_activity_date", "date"),
+    )
+
+
+class ActivityHours(Base):
+    """Messages per hour of day for one user-day; h00..h23 match bot.utils.heatmap.HOUR_COLUMNS."""
+
+    __tablename__ = "activity_hours"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+    h00: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h01: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h02: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h03: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h04: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h05: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h06: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h07: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h08: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h09: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h10: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h11: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h12: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h13: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h14: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h15: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h16: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h17: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h18: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h19: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h20: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h21: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h22: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    h23: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class UserTotals(Base):
+    """Lifetime per-user rollup of user_activity, kept current by the ingest path."""
+
+    __tablename__ = "user_totals"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_chars: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    bot_mentions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    bot_replies: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    swear_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    mom_insult_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    fire_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    heart_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Derived from the counters above on every write, see bot.database.rollup
+    xp: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+    level: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # index into LEVELS
+
+
+class ActivityWindow(Base):
+    """Rolling per-user sums of user_activity over the last ``days`` days.
+
+    Kept current by the ingest path and bot.database.windows.roll_windows.
+    """
+
+    __tablename__ = "activity_windows"
+
+    # (days, user_id): a window's rows are one primary-key range
+    days: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    starts_on: Mapped[date] = mapped_column(Date, nullable=False)
+    last_date: Mapped[date] = mapped_column(Date, nullable=False)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_chars: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    short_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    medium_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    long_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    media_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    question_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reactions_received: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    bot_mentions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    bot_replies: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    swear_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    mom_insult_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    fire_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    heart_reactions: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    active_days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    active_hours_mask: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
 
 class BookingHistory(Base):
     __tablename__ = "booking_history"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
     username: Mapped[str] = mapped_column(String(100), nullable=False)
     game: Mapped[str] = mapped_column(String(50), nullable=False)
     action: Mapped[str] = mapped_column(
@@ -110,3 +247,47 @@ class BookingHistory(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+
+
+class BookingCounter(Base):
+    """Per-user, per-game booking_history action counts, kept current on insert."""
+
+    __tablename__ = "booking_counters"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    game: Mapped[str] = mapped_column(String(50), primary_key=True)
+    booked: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cancelled: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    played: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class MessageAuthor(Base):
+    """Who sent a chat message, for attributing reactions. No text is stored."""
+
+    __tablename__ = "message_authors"
+
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    message_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class DataGeneration(Base):
+    """Monotonic write counter per data set; readers in other processes compare it to invalidate caches."""
+
+    __tablename__ = "data_generations"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class RankingSnapshot(Base):
+    """XP ranking as of ``taken_on``, written by a scheduled job; baseline for rank movement."""
+
+    __tablename__ = "ranking_snapshots"
+
+    # (taken_on, user_id): one snapshot is a primary-key range, one user's rank a point lookup
+    taken_on: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    xp: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,10 +1,32 @@
 from datetime import date, time, datetime, timedelta
-from sqlalchemy import select, and_, update, delete, text
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import select, and_, update, delete, desc, func, insert, case, literal, or_, Date
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from bot.database.models import Game, Session, Booking, BookingHistory, UserActivity
+from bot.database.aggregates import latest_usernames, total, user_totals
+from bot.database.models import (
+    ActivityHours,
+    ActivityWindow,
+    Game,
+    Session,
+    Booking,
+    BookingCounter,
+    BookingHistory,
+    DataGeneration,
+    MessageAuthor,
+    RankingSnapshot,
+    User,
+    UserActivity,
+    UserTotals,
+)
+from bot.database.rollup import apply_activity_deltas
+from bot.database.upsert import bulk_upsert
+from bot.database.windows import WINDOWS, apply_window_deltas, window_stats
+from bot.utils.heatmap import HOUR_COLUMNS, HourMatrix
+from bot.utils.hours import hour_bit, mask_to_hours
+from bot.utils.message_features import LONG, MEDIUM, SHORT, MessageFeatures
+from bot.utils.time_utils import local_today
+from bot.utils.xp import XP_COLUMNS
 
 
 class GameRepository:
@@ -45,12 +67,22 @@ class SessionRepository:
         await self.session.refresh(db_session)
         return db_session
 
-    async def get_by_id(self, session_id: int) -> Session | None:
-        result = await self.session.execute(
+    async def lock(self, session_id: int):
+        """Row-lock a session until the transaction ends (FOR UPDATE; a no-op on SQLite)."""
+        await self.session.execute(
+            select(Session.id).where(Session.id == session_id).with_for_update()
+        )
+
+    async def get_by_id(self, session_id: int, refresh: bool = False) -> Session | None:
+        """Session with its game and bookings; ``refresh`` overwrites loaded objects."""
+        stmt = (
             select(Session)
             .where(Session.id == session_id)
             .options(selectinload(Session.game), selectinload(Session.bookings))
         )
+        if refresh:
+            stmt = stmt.execution_options(populate_existing=True)
+        result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
     async def get_current_session(
@@ -118,6 +150,9 @@ class SessionRepository:
 
 
 class BookingRepository:
+    """Booking reads and writes. Writes do not commit: BookingService commits
+    each booking, cancel or edit as one unit of work."""
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
@@ -141,8 +176,7 @@ class BookingRepository:
             status=status,
         )
         self.session.add(booking)
-        await self.session.commit()
-        await self.session.refresh(booking)
+        await self.session.flush()
         return booking
 
     async def get_by_session(self, session_id: int) -> list[Booking]:
@@ -172,20 +206,22 @@ class BookingRepository:
         )
         return result.scalar_one_or_none()
 
-    async def get_next_position(self, session_id: int) -> int:
+    async def get_slot_summary(self, session_id: int, user_id: int) -> tuple[int, int, bool]:
+        """(confirmed count, last active position, whether ``user_id`` already booked) in one query."""
         result = await self.session.execute(
-            select(Booking)
-            .where(
+            select(
+                func.count(case((Booking.status == "confirmed", 1))),
+                func.coalesce(func.max(Booking.position), 0),
+                func.count(case((Booking.user_id == user_id, 1))),
+            ).where(
                 and_(
                     Booking.session_id == session_id,
                     Booking.status != "cancelled",
                 )
             )
-            .order_by(Booking.position.desc())
-            .limit(1)
         )
-        last_booking = result.scalar_one_or_none()
-        return (last_booking.position + 1) if last_booking else 1
+        confirmed, last_position, own = result.one()
+        return confirmed, last_position, own > 0
 
     async def cancel_booking(self, booking_id: int):
         await self.session.execute(
@@ -193,7 +229,6 @@ class BookingRepository:
             .where(Booking.id == booking_id)
             .values(status="cancelled")
         )
-        await self.session.commit()
 
     async def update_booking_times(
         self, booking_id: int, time_from: time, time_to: time
@@ -203,31 +238,60 @@ class BookingRepository:
             .where(Booking.id == booking_id)
             .values(time_from=time_from, time_to=time_to)
         )
-        await self.session.commit()
 
-    async def update_position_and_status(
-        self, booking_id: int, position: int, status: str
-    ):
-        await self.session.execute(
-            update(Booking)
-            .where(Booking.id == booking_id)
-            .values(position=position, status=status)
+    async def promote_waitlist(
+        self, session_id: int, max_slots: int, freed_position: int
+    ) -> tuple[int, str] | None:
+        """Fill a freed confirmed slot from the waitlist in one UPDATE.
+
+        The first waitlisted booking takes ``freed_position`` and is
+        confirmed; the rest are renumbered consecutively after the last
+        confirmed position (at least ``max_slots``). Returns the promoted
+        ``(user_id, username)``, or None if the waitlist is empty.
+        """
+        active = (
+            select(
+                Booking.id,
+                func.row_number()
+                .over(partition_by=Booking.status, order_by=Booking.position)
+                .label("place"),
+                func.max(case((Booking.status == "confirmed", Booking.position)))
+                .over()
+                .label("last_confirmed"),
+            )
+            .where(
+                and_(
+                    Booking.session_id == session_id,
+                    Booking.status != "cancelled",
+                )
+            )
+            .subquery()
         )
-        await self.session.commit()
-
-    async def get_waitlist(self, session_id: int, max_slots: int) -> list[Booking]:
+        floor = max(max_slots, freed_position)
+        first_free = case(
+            (active.c.last_confirmed > floor, active.c.last_confirmed), else_=floor
+        ) + 1
+        promoted = active.c.place == 1
         result = await self.session.execute(
-            select(Booking)
+            update(Booking)
             .where(
                 and_(
-                    Booking.session_id == session_id,
+                    Booking.id == active.c.id,
                     Booking.status == "waitlist",
                     Booking.position > max_slots,
                 )
             )
-            .order_by(Booking.position)
+            .values(
+                status=case((promoted, "confirmed"), else_="waitlist"),
+                position=case((promoted, freed_position), else_=first_free + active.c.place - 2),
+            )
+            .returning(Booking.user_id, Booking.username, Booking.status)
+            .execution_options(synchronize_session="fetch")
         )
-        return list(result.scalars().all())
+        for user_id, username, status in result.all():
+            if status == "confirmed":
+                return user_id, username
+        return None
 
     async def get_confirmed(self, session_id: int) -> list[Booking]:
         result = await self.session.execute(
@@ -243,6 +307,15 @@ class BookingRepository:
         return list(result.scalars().all())
 
 
+# booking_history actions that have a counter column in booking_counters
+BOOKING_ACTIONS = ("booked", "cancelled", "played")
+
+
+def action_count(action: str):
+    """COUNT of booking_history rows with the given action."""
+    return func.count(case((BookingHistory.action == action, 1)))
+
+
 class BookingHistoryRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -250,6 +323,14 @@ class BookingHistoryRepository:
     async def add(
         self, user_id: int, username: str, game: str, action: str
     ) -> BookingHistory:
+        history = await self.stage(user_id, username, game, action)
+        await self.session.commit()
+        return history
+
+    async def stage(
+        self, user_id: int, username: str, game: str, action: str
+    ) -> BookingHistory:
+        """Like :meth:`add` but in the caller's transaction (no commit)."""
         history = BookingHistory(
             user_id=user_id,
             username=username,
@@ -257,14 +338,47 @@ class BookingHistoryRepository:
             action=action,
         )
         self.session.add(history)
-        await self.session.commit()
+        await self._count([history])
         return history
 
+    async def add_many(self, entries: list[dict]):
+        """Insert several ``{"user_id", "username", "game", "action"}`` entries at once."""
+        if not entries:
+            return
+        history = [BookingHistory(**entry) for entry in entries]
+        self.session.add_all(history)
+        await self._count(history)
+        await self.session.commit()
+
+    async def _count(self, history: list[BookingHistory]):
+        """Add the entries to booking_counters in the caller's transaction."""
+        deltas: dict[tuple[int, str], dict] = {}
+        for entry in history:
+            if entry.action not in BOOKING_ACTIONS:
+                continue
+            key = (entry.user_id, entry.game)
+            if key not in deltas:
+                deltas[key] = {
+                    "user_id": entry.user_id,
+                    "game": entry.game,
+                    **{action: 0 for action in BOOKING_ACTIONS},
+                }
+            deltas[key][entry.action] += 1
+        if deltas:
+            await bulk_upsert(
+                self.session,
+                BookingCounter,
+                list(deltas.values()),
+                index_elements=["user_id", "game"],
+                add=BOOKING_ACTIONS,
+            )
+
     async def get_user_stats(self, user_id: int) -> dict:
         result = await self.session.execute(
-            select(BookingHistory).where(BookingHistory.user_id == user_id)
+            select(BookingCounter)
+            .where(BookingCounter.user_id == user_id)
+            .order_by(BookingCounter.game)
         )
-        history = list(result.scalars().all())
 
         stats = {
             "total_bookings": 0,
@@ -272,51 +386,143 @@ class BookingHistoryRepository:
             "total_played": 0,
             "by_game": {},
         }
-
-        for entry in history:
-            if entry.game not in stats["by_game"]:
-                stats["by_game"][entry.game] = {
-                    "booked": 0,
-                    "cancelled": 0,
-                    "played": 0,
-                }
-
-            if entry.action == "booked":
-                stats["total_bookings"] += 1
-                stats["by_game"][entry.game]["booked"] += 1
-            elif entry.action == "cancelled":
-                stats["total_cancellations"] += 1
-                stats["by_game"][entry.game]["cancelled"] += 1
-            elif entry.action == "played":
-                stats["total_played"] += 1
-                stats["by_game"][entry.game]["played"] += 1
-
+        for counter in result.scalars():
+            stats["total_bookings"] += counter.booked
+            stats["total_cancellations"] += counter.cancelled
+            stats["total_played"] += counter.played
+            stats["by_game"][counter.game] = {
+                "booked": counter.booked,
+                "cancelled": counter.cancelled,
+                "played": counter.played,
+            }
         return stats
 
     async def get_group_stats(self) -> list[dict]:
+        # The directory has the current @username; users it has not seen
+        # fall back to the name shown on their latest history entry
+        last_label = (
+            select(BookingHistory.username)
+            .where(BookingHistory.user_id == BookingCounter.user_id)
+            .order_by(BookingHistory.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        played = func.sum(BookingCounter.played).label("played")
         result = await self.session.execute(
-            select(BookingHistory).order_by(BookingHistory.created_at.desc())
+            select(
+                BookingCounter.user_id,
+                func.coalesce(User.username, last_label).label("username"),
+                played,
+                func.sum(BookingCounter.cancelled).label("cancelled"),
+            )
+            .outerjoin(User, User.user_id == BookingCounter.user_id)
+            .group_by(BookingCounter.user_id, User.username)
+            .order_by(desc("played"), BookingCounter.user_id)
         )
-        history = list(result.scalars().all())
+        return [dict(row._mapping) for row in result]
+
+    async def rebuild_counters(self) -> int:
+        """Recompute booking_counters from booking_history. Returns rows written."""
+        await self.session.execute(delete(BookingCounter))
+        result = await self.session.execute(
+            insert(BookingCounter).from_select(
+                ["user_id", "game", *BOOKING_ACTIONS],
+                select(
+                    BookingHistory.user_id,
+                    BookingHistory.game,
+                    *(action_count(action) for action in BOOKING_ACTIONS),
+                )
+                .where(BookingHistory.action.in_(BOOKING_ACTIONS))
+                .group_by(BookingHistory.user_id, BookingHistory.game),
+            )
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def counters_missing(self) -> bool:
+        """True when booking_counters is empty but there is history to count."""
+        has_counters = (await self.session.execute(select(BookingCounter.user_id).limit(1))).first()
+        has_history = (await self.session.execute(select(BookingHistory.id).limit(1))).first()
+        return has_counters is None and has_history is not None
 
-        user_stats = {}
-        for entry in history:
-            if entry.user_id not in user_stats:
-                user_stats[entry.user_id] = {
-                    "user_id": entry.user_id,
-                    "username": entry.username,
-                    "played": 0,
-                    "cancelled": 0,
-                }
 
-            if entry.action == "played":
-                user_stats[entry.user_id]["played"] += 1
-            elif entry.action == "cancelled":
-                user_stats[entry.user_id]["cancelled"] += 1
+class UserRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def upsert_many(self, rows: list[dict]):
+        """Store ``{"user_id", "username"}`` rows and mark them seen (no commit).
+
+        Callers commit together with the writes the rows came from.
+        """
+        if not rows:
+            return
+        await bulk_upsert(
+            self.session,
+            User,
+            rows,
+            index_elements=["user_id"],
+            set_=lambda excluded: {
+                "username": func.coalesce(excluded.username, User.username),
+                "last_seen": func.now(),
+            },
+        )
+
+    async def get_username(self, user_id: int) -> str | None:
+        result = await self.session.execute(
+            select(User.username).where(User.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def find_by_username(self, username: str) -> int | None:
+        """Case-insensitive @username lookup; the most recently seen holder wins."""
+        result = await self.session.execute(
+            select(User.user_id)
+            .where(func.lower(User.username) == username.lower())
+            .order_by(User.last_seen.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
 
-        return sorted(
-            user_stats.values(), key=lambda x: x["played"], reverse=True
+    async def backfill_from_activity(self) -> int:
+        """Seed the directory from the legacy per-day usernames if it is empty."""
+        if (await self.session.execute(select(User.user_id).limit(1))).first():
+            return 0
+        names = latest_usernames()
+        result = await self.session.execute(
+            insert(User).from_select(["user_id", "username"], select(names.c.user_id, names.c.username))
         )
+        await self.session.commit()
+        return result.rowcount
+
+
+def _directory_rows(rows: list[dict]) -> list[dict]:
+    """One users row per user, with the username from their newest activity row."""
+    newest: dict[int, dict] = {}
+    for row in rows:
+        if not row.get("username"):
+            continue
+        seen = newest.get(row["user_id"])
+        if seen is None or row["date"] >= seen["date"]:
+            newest[row["user_id"]] = row
+    return [{"user_id": user_id, "username": row["username"]} for user_id, row in newest.items()]
+
+
+# Counters reported by the weekly stats
+_WEEK_COLUMNS = (
+    "message_count",
+    "total_chars",
+    "short_count",
+    "medium_count",
+    "long_count",
+    "media_count",
+    "question_count",
+    "reactions_received",
+    "bot_mentions",
+    "bot_replies",
+    "swear_count",
+    "mom_insult_count",
+)
 
 
 class UserActivityRepository:
@@ -328,228 +534,366 @@ class UserActivityRepository:
         user_id: int,
         username: str | None,
         msg_date: date,
-        length: int,
         hour: int,
-        bot_mention: bool = False,
-        bot_reply: bool = False,
-        has_swear: bool = False,
+        features: MessageFeatures,
     ):
-        # Insert a new row or update atomically to avoid race conditions when
-        # multiple messages from the same user arrive concurrently.
-        stmt = pg_insert(UserActivity).values(
-            user_id=user_id,
-            username=username,
-            date=msg_date,
-            message_count=1,
-            total_chars=length,
-            short_count=0,
-            medium_count=0,
-            long_count=0,
-            media_count=0,
-            question_count=0,
-            reactions_received=0,
-            active_hours=str(hour),
-            bot_mentions=int(bot_mention),
-            bot_replies=int(bot_reply),
-            swear_count=int(has_swear),
-            mom_insult_count=0,
-            fire_reactions=0,
-            heart_reactions=0,
-        ).on_conflict_do_update(
-            constraint="user_activity_user_id_date_key",
-            set_={
-                "message_count": UserActivity.message_count + 1,
-                "total_chars": UserActivity.total_chars + length,
-                "bot_mentions": UserActivity.bot_mentions + int(bot_mention),
-                "bot_replies": UserActivity.bot_replies + int(bot_reply),
-                "swear_count": UserActivity.swear_count + int(has_swear),
-                # Merge the new hour into the stored comma-separated hours string.
-                # array_to_string(array(select distinct …)) keeps it duplicate-free.
-                "active_hours": text(
-                    "CASE WHEN user_activity.active_hours = '' THEN :hour "
-                    "WHEN user_activity.active_hours ~ ('(^|,)' || :hour || '(,|$)') "
-                    "     THEN user_activity.active_hours "
-                    "ELSE user_activity.active_hours || ',' || :hour END"
-                ).bindparams(hour=str(hour)),
-                "username": username if username else UserActivity.username,
+        await self.upsert_messages([
+            {
+                "user_id": user_id,
+                "username": username,
+                "date": msg_date,
+                "message_count": 1,
+                "total_chars": features.length,
+                "short_count": int(features.bucket == SHORT),
+                "medium_count": int(features.bucket == MEDIUM),
+                "long_count": int(features.bucket == LONG),
+                "media_count": int(features.has_media),
+                "question_count": int(features.is_question),
+                "bot_mentions": int(features.bot_mention),
+                "bot_replies": int(features.bot_reply),
+                "swear_count": features.swear_count,
+                "active_hours_mask": hour_bit(hour),
+                "hour_counts": [int(h == hour) for h in range(24)],
+            }
+        ])
+
+    async def upsert_messages(self, rows: list[dict]):
+        """Apply a batch of per-(user_id, date) counter deltas in one statement.
+
+        Each row carries deltas for message_count, total_chars, the length
+        bucket, media and question counters, bot_mentions, bot_replies,
+        swear_count, mom_insult_count and the reaction counters,
+        plus an ``active_hours_mask`` of hours seen and optionally
+        ``hour_counts`` (24 per-hour message counts, stored in
+        ``activity_hours``). A row for a day with no messages yet (e.g. only
+        reactions) is inserted with zero messages. Rows must be unique per
+        (user_id, date).
+        """
+        if not rows:
+            return
+
+        hour_rows = [
+            {
+                "user_id": row["user_id"],
+                "date": row["date"],
+                **dict(zip(HOUR_COLUMNS, row["hour_counts"])),
+            }
+            for row in rows
+            if any(row.get("hour_counts") or ())
+        ]
+        rows = [{k: v for k, v in row.items() if k != "hour_counts"} for row in rows]
+
+        values = [
+            {
+                "message_count": 0,
+                "total_chars": 0,
+                "short_count": 0,
+                "medium_count": 0,
+                "long_count": 0,
+                "media_count": 0,
+                "question_count": 0,
+                "reactions_received": 0,
+                "bot_mentions": 0,
+                "bot_replies": 0,
+                "swear_count": 0,
+                "mom_insult_count": 0,
+                "fire_reactions": 0,
+                "heart_reactions": 0,
+                "active_hours_mask": 0,
+                **row,
+                # Usernames live in the users directory only
+                "username": None,
+            }
+            for row in rows
+        ]
+        # Insert new rows or add the deltas atomically to avoid race conditions
+        # when several writers touch the same user-day concurrently.
+        stored = await bulk_upsert(
+            self.session,
+            UserActivity,
+            values,
+            index_elements=["user_id", "date"],
+            add=(
+                "message_count",
+                "total_chars",
+                "short_count",
+                "medium_count",
+                "long_count",
+                "media_count",
+                "question_count",
+                "bot_mentions",
+                "bot_replies",
+                "swear_count",
+                "mom_insult_count",
+                "reactions_received",
+                "fire_reactions",
+                "heart_reactions",
+            ),
+            set_=lambda excluded: {
+                "active_hours_mask": UserActivity.active_hours_mask.op("|")(
+                    excluded.active_hours_mask
+                ),
             },
+            returning=(UserActivity.user_id, UserActivity.date, UserActivity.message_count),
+        )
+        # A day turns active when its stored count equals this batch's delta
+        sent = {(v["user_id"], v["date"]): v["message_count"] for v in values}
+        became_active = {
+            (row.user_id, row.date)
+            for row in stored
+            if row.message_count > 0 and row.message_count == sent[(row.user_id, row.date)]
+        }
+
+        # Directory, lifetime rollup and rolling windows move in the same
+        # transaction as the daily rows
+        await UserRepository(self.session).upsert_many(_directory_rows(rows))
+        await apply_activity_deltas(self.session, values)
+        await apply_window_deltas(self.session, values, became_active)
+        await bulk_upsert(
+            self.session,
+            ActivityHours,
+            hour_rows,
+            index_elements=["user_id", "date"],
+            add=HOUR_COLUMNS,
         )
-        await self.session.execute(stmt)
         await self.session.commit()
 
     async def get_user_week_stats(self, user_id: int) -> dict:
-        since = date.today() - timedelta(days=7)
         result = await self.session.execute(
-            select(UserActivity).where(
-                and_(UserActivity.user_id == user_id, UserActivity.date >= since)
+            select(ActivityWindow).where(
+                and_(ActivityWindow.days == 7, ActivityWindow.user_id == user_id)
             )
         )
-        rows = list(result.scalars().all())
-
-        all_hours: set[int] = set()
-        for r in rows:
-            if r.active_hours:
-                for h in r.active_hours.split(","):
-                    if h:
-                        all_hours.add(int(h))
+        window = result.scalar_one_or_none()
 
         return {
             "user_id": user_id,
-            "username": rows[-1].username if rows else None,
-            "message_count": sum(r.message_count for r in rows),
-            "total_chars": sum(r.total_chars for r in rows),
-            "short_count": sum(r.short_count for r in rows),
-            "medium_count": sum(r.medium_count for r in rows),
-            "long_count": sum(r.long_count for r in rows),
-            "media_count": sum(r.media_count for r in rows),
-            "question_count": sum(r.question_count for r in rows),
-            "reactions_received": sum(r.reactions_received for r in rows),
-            "bot_mentions": sum(r.bot_mentions for r in rows),
-            "bot_replies": sum(r.bot_replies for r in rows),
-            "swear_count": sum(r.swear_count for r in rows),
-            "mom_insult_count": sum(r.mom_insult_count for r in rows),
-            "active_days": len(rows),
-            "active_hours": sorted(all_hours),
+            "username": await UserRepository(self.session).get_username(user_id),
+            **{name: getattr(window, name) if window else 0 for name in _WEEK_COLUMNS},
+            # Reaction-only rows do not make a day active
+            "active_days": window.active_days if window else 0,
+            "active_hours": mask_to_hours(window.active_hours_mask if window else 0),
         }
 
+    def _window_or_range(self, days: int, columns, with_active_days: bool = False):
+        """Materialized window when one exists for ``days``, else GROUP BY."""
+        if days in WINDOWS:
+            return window_stats(days, columns, with_active_days)
+        since = local_today() - timedelta(days=days)
+        return user_totals(columns, since=since, with_active_days=with_active_days)
+
     async def get_top_users(self, days: int = 7, limit: int = 10) -> list[dict]:
-        since = date.today() - timedelta(days=days)
+        query = self._window_or_range(
+            days, ("message_count", "reactions_received", "question_count", "mom_insult_count")
+        )
         result = await self.session.execute(
-            select(UserActivity).where(UserActivity.date >= since)
-        )
-        rows = list(result.scalars().all())
-
-        user_map: dict[int, dict] = {}
-        for r in rows:
-            if r.user_id not in user_map:
-                user_map[r.user_id] = {
-                    "user_id": r.user_id,
-                    "username": r.username,
-                    "message_count": 0,
-                    "reactions_received": 0,
-                    "question_count": 0,
-                    "mom_insult_count": 0,
-                }
-            user_map[r.user_id]["message_count"] += r.message_count
-            user_map[r.user_id]["reactions_received"] += r.reactions_received
-            user_map[r.user_id]["question_count"] += r.question_count
-            user_map[r.user_id]["mom_insult_count"] += r.mom_insult_count
-            if r.username:
-                user_map[r.user_id]["username"] = r.username
-
-        return sorted(user_map.values(), key=lambda x: x["message_count"], reverse=True)[:limit]
+            query.order_by(desc("message_count"), "user_id").limit(limit)
+        )
+        return [dict(row._mapping) for row in result]
 
     async def get_all_week_stats(self, days: int = 7) -> list[dict]:
-        since = date.today() - timedelta(days=days)
+        query = self._window_or_range(days, _WEEK_COLUMNS, with_active_days=True)
+        result = await self.session.execute(query.order_by(desc("message_count"), "user_id"))
+        return [dict(row._mapping) for row in result]
+
+    async def get_all_users_total_stats(self) -> list[dict]:
+        """Lifetime counters plus precomputed XP from the user_totals rollup, highest XP first."""
         result = await self.session.execute(
-            select(UserActivity).where(UserActivity.date >= since)
-        )
-        rows = list(result.scalars().all())
-
-        user_map: dict[int, dict] = {}
-        for r in rows:
-            if r.user_id not in user_map:
-                user_map[r.user_id] = {
-                    "user_id": r.user_id,
-                    "username": r.username,
-                    "message_count": 0,
-                    "total_chars": 0,
-                    "short_count": 0,
-                    "medium_count": 0,
-                    "long_count": 0,
-                    "media_count": 0,
-                    "question_count": 0,
-                    "reactions_received": 0,
-                    "bot_mentions": 0,
-                    "bot_replies": 0,
-                    "swear_count": 0,
-                    "mom_insult_count": 0,
-                    "active_days": 0,
-                }
-            user_map[r.user_id]["message_count"] += r.message_count
-            user_map[r.user_id]["total_chars"] += r.total_chars
-            user_map[r.user_id]["short_count"] += r.short_count
-            user_map[r.user_id]["medium_count"] += r.medium_count
-            user_map[r.user_id]["long_count"] += r.long_count
-            user_map[r.user_id]["media_count"] += r.media_count
-            user_map[r.user_id]["question_count"] += r.question_count
-            user_map[r.user_id]["reactions_received"] += r.reactions_received
-            user_map[r.user_id]["bot_mentions"] += r.bot_mentions
-            user_map[r.user_id]["bot_replies"] += r.bot_replies
-            user_map[r.user_id]["swear_count"] += r.swear_count
-            user_map[r.user_id]["mom_insult_count"] += r.mom_insult_count
-            user_map[r.user_id]["active_days"] += 1
-            if r.username:
-                user_map[r.user_id]["username"] = r.username
-
-        return sorted(user_map.values(), key=lambda x: x["message_count"], reverse=True)
-
-    async def increment_mom_insult(self, user_id: int, activity_date: date):
+            select(
+                UserTotals.user_id,
+                User.username,
+                *(getattr(UserTotals, name) for name in XP_COLUMNS),
+                UserTotals.xp,
+            )
+            .outerjoin(User, User.user_id == UserTotals.user_id)
+            .order_by(UserTotals.xp.desc(), UserTotals.user_id)
+        )
+        return [dict(row._mapping) for row in result]
+
+    async def get_user_total_stats(self, user_id: int) -> dict:
         result = await self.session.execute(
-            select(UserActivity).where(
-                and_(UserActivity.user_id == user_id, UserActivity.date == activity_date)
+            select(*(getattr(UserTotals, name) for name in XP_COLUMNS))
+            .where(UserTotals.user_id == user_id)
+        )
+        row = result.one_or_none()
+        return dict(row._mapping) if row else {name: 0 for name in XP_COLUMNS}
+
+
+class ActivityHoursRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _hour_sums(self):
+        return [total(getattr(ActivityHours, name)) for name in HOUR_COLUMNS]
+
+    async def user_hour_matrix(
+        self, since: date, until: date | None = None, user_ids: list[int] | None = None
+    ) -> HourMatrix:
+        """Users × hour-of-day message counts over [since, until], one row per user."""
+        query = select(ActivityHours.user_id, *self._hour_sums()).where(ActivityHours.date >= since)
+        if until is not None:
+            query = query.where(ActivityHours.date <= until)
+        if user_ids is not None:
+            query = query.where(ActivityHours.user_id.in_(user_ids))
+        result = await self.session.execute(
+            query.group_by(ActivityHours.user_id).order_by(ActivityHours.user_id)
+        )
+        return HourMatrix.from_rows((row[0], row[1:]) for row in result)
+
+    async def weekday_hour_matrix(
+        self, since: date, until: date | None = None, user_id: int | None = None
+    ) -> HourMatrix:
+        """Weekday (0 = Monday) × hour-of-day message counts over [since, until].
+
+        Summed per date in SQL (weekday functions differ between SQLite and
+        PostgreSQL), then folded into the 7 weekday rows.
+        """
+        query = select(ActivityHours.date, *self._hour_sums()).where(ActivityHours.date >= since)
+        if until is not None:
+            query = query.where(ActivityHours.date <= until)
+        if user_id is not None:
+            query = query.where(ActivityHours.user_id == user_id)
+        result = await self.session.execute(query.group_by(ActivityHours.date))
+
+        matrix = HourMatrix(range(7))
+        for row in result:
+            matrix.add_row(row[0].weekday(), row[1:])
+        return matrix
+
+
+class MessageAuthorRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_many(self, rows: list[dict]):
+        """Insert author rows in batches; rows already stored are left as-is."""
+        if not rows:
+            return
+        await bulk_upsert(
+            self.session, MessageAuthor, rows, index_elements=["chat_id", "message_id"]
+        )
+        await self.session.commit()
+
+    async def get_author(self, chat_id: int, message_id: int, since: datetime) -> int | None:
+        result = await self.session.execute(
+            select(MessageAuthor.user_id).where(
+                and_(
+                    MessageAuthor.chat_id == chat_id,
+                    MessageAuthor.message_id == message_id,
+                    MessageAuthor.sent_at >= since,
+                )
             )
         )
-        activity = result.scalar_one_or_none()
-        if activity:
-            activity.mom_insult_count += 1
-            await self.session.commit()
+        return result.scalar_one_or_none()
 
-    async def get_all_users_total_stats(self) -> list[dict]:
-        result = await self.session.execute(select(UserActivity))
-        rows = list(result.scalars().all())
-
-        user_map: dict[int, dict] = {}
-        for r in rows:
-            if r.user_id not in user_map:
-                user_map[r.user_id] = {
-                    "user_id": r.user_id,
-                    "username": r.username,
-                    "message_count": 0,
-                    "total_chars": 0,
-                    "bot_mentions": 0,
-                    "bot_replies": 0,
-                    "mom_insult_count": 0,
-                    "fire_reactions": 0,
-                    "heart_reactions": 0,
-                }
-            u = user_map[r.user_id]
-            u["message_count"] += r.message_count
-            u["total_chars"] += r.total_chars
-            u["bot_mentions"] += r.bot_mentions
-            u["bot_replies"] += r.bot_replies
-            u["mom_insult_count"] += r.mom_insult_count
-            u["fire_reactions"] += r.fire_reactions
-            u["heart_reactions"] += r.heart_reactions
-            if r.username:
-                u["username"] = r.username
-
-        return list(user_map.values())
+    async def get_since(self, since: datetime) -> list[tuple[int, int, int, datetime]]:
+        """(chat_id, message_id, user_id, sent_at) for messages sent after ``since``, oldest first."""
+        result = await self.session.execute(
+            select(
+                MessageAuthor.chat_id,
+                MessageAuthor.message_id,
+                MessageAuthor.user_id,
+                MessageAuthor.sent_at,
+            )
+            .where(MessageAuthor.sent_at >= since)
+            .order_by(MessageAuthor.sent_at)
+        )
+        return [tuple(row) for row in result.all()]
 
-    async def get_user_total_stats(self, user_id: int) -> dict:
+    async def delete_before(self, cutoff: datetime) -> int:
         result = await self.session.execute(
-            select(UserActivity).where(UserActivity.user_id == user_id)
+            delete(MessageAuthor).where(MessageAuthor.sent_at < cutoff)
         )
-        rows = list(result.scalars().all())
-        return {
-            "message_count": sum(r.message_count for r in rows),
-            "total_chars": sum(r.total_chars for r in rows),
-            "bot_mentions": sum(r.bot_mentions for r in rows),
-            "bot_replies": sum(r.bot_replies for r in rows),
-            "mom_insult_count": sum(r.mom_insult_count for r in rows),
-            "fire_reactions": sum(r.fire_reactions for r in rows),
-            "heart_reactions": sum(r.heart_reactions for r in rows),
-        }
+        await self.session.commit()
+        return result.rowcount
+
+
+# data_generations row bumped once per activity flush and ranking snapshot,
+# each time in its own short transaction after the data is committed
+ACTIVITY_GENERATION = "activity"
+
 
-    async def add_reaction(self, user_id: int, reaction_date: date, fire: int = 0, heart: int = 0):
+class DataGenerationRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def bump(self, name: str) -> None:
+        """Advance ``name``'s generation (no commit)."""
+        await bulk_upsert(
+            self.session,
+            DataGeneration,
+            [{"name": name, "generation": 1}],
+            index_elements=["name"],
+            add=("generation",),
+        )
+
+    async def get(self, name: str) -> int:
         result = await self.session.execute(
-            select(UserActivity).where(
-                and_(UserActivity.user_id == user_id, UserActivity.date == reaction_date)
+            select(DataGeneration.generation).where(DataGeneration.name == name)
+        )
+        return result.scalar_one_or_none() or 0
+
+
+# Snapshots older than this are pruned when a new one is taken
+SNAPSHOT_RETENTION_DAYS = 90
+
+
+class RankingRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def take_snapshot(self, taken_on: date | None = None) -> int:
+        """Store the current XP ranking in one INSERT ... SELECT. Returns rows written.
+
+        Taking a snapshot twice on the same day replaces the earlier one.
+        """
+        taken_on = taken_on or local_today()
+        rank = func.row_number().over(order_by=(UserTotals.xp.desc(), UserTotals.user_id))
+        await self.session.execute(
+            delete(RankingSnapshot).where(
+                or_(
+                    RankingSnapshot.taken_on == taken_on,
+                    RankingSnapshot.taken_on < taken_on - timedelta(days=SNAPSHOT_RETENTION_DAYS),
+                )
+            )
+        )
+        result = await self.session.execute(
+            insert(RankingSnapshot).from_select(
+                ["taken_on", "user_id", "rank", "xp"],
+                select(literal(taken_on, Date), UserTotals.user_id, rank, UserTotals.xp),
+            )
+        )
+        await self.session.commit()
+        # Rank movement shown by cached leaderboards has changed
+        await DataGenerationRepository(self.session).bump(ACTIVITY_GENERATION)
+        await self.session.commit()
+        return result.rowcount
+
+    async def latest_snapshot_date(self) -> date | None:
+        result = await self.session.execute(select(func.max(RankingSnapshot.taken_on)))
+        return result.scalar_one_or_none()
+
+    async def get_ranking(self, columns: tuple[str, ...] = ()) -> list[dict]:
+        """Live XP ranking, highest first, with movement since the latest snapshot.
+
+        Each row has user_id, username, the requested user_totals ``columns``,
+        xp, ``rank`` (1-based) and ``previous_rank`` — the user's rank in the
+        latest snapshot (a primary-key lookup), None if they were not in it.
+        """
+        latest = select(func.max(RankingSnapshot.taken_on)).scalar_subquery()
+        result = await self.session.execute(
+            select(
+                UserTotals.user_id,
+                User.username,
+                *(getattr(UserTotals, name) for name in columns),
+                UserTotals.xp,
+                RankingSnapshot.rank.label("previous_rank"),
+            )
+            .outerjoin(User, User.user_id == UserTotals.user_id)
+            .outerjoin(
+                RankingSnapshot,
+                and_(RankingSnapshot.taken_on == latest, RankingSnapshot.user_id == UserTotals.user_id),
             )
+            .order_by(UserTotals.xp.desc(), UserTotals.user_id)
         )
-        activity = result.scalar_one_or_none()
-        if activity:
-            activity.fire_reactions += fire
-            activity.heart_reactions += heart
-            activity.reactions_received += fire + heart
-            await self.session.commit()
+        return [{**row._mapping, "rank": rank} for rank, row in enumerate(result, 1)]
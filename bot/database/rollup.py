@@ -0,0 +1,132 @@
+"""Lifetime per-user totals, maintained incrementally.
+
+``user_totals`` holds one row per user with the lifetime counters that XP is
+built from, plus the XP and level derived from them. The activity upsert
+applies each batch's deltas to it in the same transaction, so readers such as
+/ranking and the web leaderboard never rescan the daily history.
+``rebuild_user_totals`` recomputes the table from ``user_activity`` (backfill)
+and ``check_user_totals`` reports any drift between the two.
+"""
+from sqlalchemy import ColumnElement, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.aggregates import user_totals
+from bot.database.models import UserActivity, UserTotals
+from bot.database.upsert import bulk_upsert
+from bot.utils.xp import calculate_xp, calculate_xp_batch, level_expr, level_index, xp_expr
+
+TOTAL_COLUMNS = (
+    "message_count",
+    "total_chars",
+    "bot_mentions",
+    "bot_replies",
+    "swear_count",
+    "mom_insult_count",
+    "fire_reactions",
+    "heart_reactions",
+)
+
+
+def _fold_per_user(rows: list[dict]) -> list[dict]:
+    """Sum per-(user, day) activity deltas into one delta per user."""
+    per_user: dict[int, dict] = {}
+    for row in rows:
+        delta = per_user.get(row["user_id"])
+        if delta is None:
+            delta = per_user[row["user_id"]] = {
+                "user_id": row["user_id"],
+                **{name: 0 for name in TOTAL_COLUMNS},
+            }
+        for name in TOTAL_COLUMNS:
+            delta[name] += row.get(name, 0)
+    for delta in per_user.values():
+        # Used only when the user has no row yet; existing rows recompute below
+        delta["xp"] = calculate_xp(delta)
+        delta["level"] = level_index(delta["xp"])
+    return list(per_user.values())
+
+
+def _recompute(excluded) -> dict[str, ColumnElement]:
+    updated = {name: getattr(UserTotals, name) + getattr(excluded, name) for name in TOTAL_COLUMNS}
+    xp = xp_expr(updated)
+    return {"xp": xp, "level": level_expr(xp)}
+
+
+async def apply_activity_deltas(session: AsyncSession, rows: list[dict]):
+    """Add a batch of user_activity deltas to user_totals (no commit)."""
+    if not rows:
+        return
+    await bulk_upsert(
+        session,
+        UserTotals,
+        _fold_per_user(rows),
+        index_elements=["user_id"],
+        add=TOTAL_COLUMNS,
+        set_=_recompute,
+    )
+
+
+async def rebuild_user_totals(session: AsyncSession) -> int:
+    """Recompute user_totals from the daily rows. Returns the number of users."""
+    sums = user_totals(TOTAL_COLUMNS).subquery()
+    xp = xp_expr({name: sums.c[name] for name in TOTAL_COLUMNS})
+    await session.execute(delete(UserTotals))
+    await session.execute(
+        insert(UserTotals).from_select(
+            ["user_id", *TOTAL_COLUMNS, "xp", "level"],
+            select(
+                sums.c.user_id,
+                *(sums.c[name] for name in TOTAL_COLUMNS),
+                xp,
+                level_expr(xp),
+            ),
+        )
+    )
+    await session.commit()
+    return (await session.execute(select(func.count()).select_from(UserTotals))).scalar_one()
+
+
+async def check_user_totals(session: AsyncSession) -> list[dict]:
+    """Compare user_totals with the daily rows.
+
+    Returns one ``{"user_id", "column", "expected", "actual"}`` entry per
+    mismatching value (``actual`` is None when the rollup row is missing).
+    """
+    expected = {
+        row.user_id: row._mapping
+        for row in await session.execute(user_totals(TOTAL_COLUMNS))
+    }
+    actual = {
+        row.user_id: row
+        for row in (await session.execute(select(UserTotals))).scalars()
+    }
+
+    user_ids = list(expected.keys() | actual.keys())
+    want_columns = {
+        name: [expected[user_id][name] if user_id in expected else 0 for user_id in user_ids]
+        for name in TOTAL_COLUMNS
+    }
+    want_xp = calculate_xp_batch(want_columns)
+
+    problems = []
+    for i, user_id in enumerate(user_ids):
+        have = actual.get(user_id)
+        if have is None:
+            problems.append({"user_id": user_id, "column": "*", "expected": "row", "actual": None})
+            continue
+        want_values = {name: values[i] for name, values in want_columns.items()}
+        want_values["xp"] = want_xp[i]
+        want_values["level"] = level_index(want_xp[i])
+        for name, value in want_values.items():
+            if getattr(have, name) != value:
+                problems.append(
+                    {"user_id": user_id, "column": name, "expected": value, "actual": getattr(have, name)}
+                )
+    return problems
+
+
+async def needs_backfill(session: AsyncSession) -> bool:
+    """True when user_totals is empty but there is activity to roll up."""
+    has_totals = (await session.execute(select(UserTotals.user_id).limit(1))).first()
+    has_activity = (await session.execute(select(UserActivity.id).limit(1))).first()
+    return has_totals is None and has_activity is not None
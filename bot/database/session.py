@@ -3,6 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 
 from bot.config import config
 from bot.database.models import Base, Game
+from bot.database.repositories import BookingHistoryRepository, RankingRepository, UserRepository
+from bot.database.rollup import needs_backfill, rebuild_user_totals
+from bot.database.windows import needs_backfill as windows_need_backfill
+from bot.database.windows import rebuild_windows, roll_windows
 
 # Create async engine
 engine = create_async_engine(
@@ -25,10 +29,56 @@ async def init_db():
                 "ALTER TABLE user_activity ADD COLUMN IF NOT EXISTS mom_insult_count INTEGER NOT NULL DEFAULT 0",
                 "ALTER TABLE user_activity ADD COLUMN IF NOT EXISTS fire_reactions INTEGER NOT NULL DEFAULT 0",
                 "ALTER TABLE user_activity ADD COLUMN IF NOT EXISTS heart_reactions INTEGER NOT NULL DEFAULT 0",
+                "ALTER TABLE user_activity ADD COLUMN IF NOT EXISTS active_hours_mask INTEGER NOT NULL DEFAULT 0",
+                # Backfill masks from the legacy comma-separated hours (idempotent)
+                "UPDATE user_activity SET active_hours_mask = ("
+                "SELECT COALESCE(SUM(DISTINCT 1 << h::int), 0) "
+                "FROM unnest(string_to_array(active_hours, ',')) AS h WHERE h <> '') "
+                "WHERE active_hours_mask = 0 AND active_hours <> ''",
+                # Hot-path indexes (see alembic 007)
+                "CREATE INDEX IF NOT EXISTS ix_sessions_open_slot "
+                "ON sessions (game_id, chat_id, day, week_start) WHERE status = 'open'",
+                "CREATE INDEX IF NOT EXISTS ix_sessions_open_chat "
+                "ON sessions (chat_id) WHERE status = 'open'",
+                "CREATE INDEX IF NOT EXISTS ix_bookings_session_status_position "
+                "ON bookings (session_id, status, position)",
+                "CREATE INDEX IF NOT EXISTS ix_bookings_session_active "
+                "ON bookings (session_id, position) WHERE status <> 'cancelled'",
+                "CREATE INDEX IF NOT EXISTS ix_booking_history_user_id ON booking_history (user_id)",
+                "CREATE INDEX IF NOT EXISTS ix_user_activity_date ON user_activity (date)",
             ]
             for sql in migrations:
                 await conn.execute(text(sql))
 
+    # First start with the user_totals rollup: backfill it from the daily rows
+    async with async_session() as session:
+        if await needs_backfill(session):
+            await rebuild_user_totals(session)
+
+    # Rolling windows: build them on first start, otherwise catch up on
+    # days that ended while the bot was down
+    async with async_session() as session:
+        if await windows_need_backfill(session):
+            await rebuild_windows(session)
+        else:
+            await roll_windows(session)
+
+    # First start with the users directory: seed it from the legacy usernames
+    async with async_session() as session:
+        await UserRepository(session).backfill_from_activity()
+
+    # First start with booking_counters: count the existing history once
+    async with async_session() as session:
+        history_repo = BookingHistoryRepository(session)
+        if await history_repo.counters_missing():
+            await history_repo.rebuild_counters()
+
+    # First start with ranking snapshots: take a baseline for rank movement
+    async with async_session() as session:
+        ranking_repo = RankingRepository(session)
+        if await ranking_repo.latest_snapshot_date() is None:
+            await ranking_repo.take_snapshot()
+
     # Seed default games
     async with async_session() as session:
         from sqlalchemy import select
@@ -0,0 +1,88 @@
+"""Dialect-portable bulk ``INSERT … ON CONFLICT DO UPDATE``.
+
+SQLite (local runs and tests) and PostgreSQL (production) both support native
+upserts, but SQLAlchemy exposes them through separate dialect modules. This
+module picks the right construct so repositories can write a whole batch of
+rows in one round trip on either backend.
+"""
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import ColumnElement
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows per statement. Keeps the bind-parameter count well under the SQLite and
+# asyncpg limits (32766 / 32767) for tables with up to ~30 columns.
+UPSERT_CHUNK_SIZE = 1000
+
+_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def dialect_name(session: AsyncSession) -> str:
+    return session.bind.dialect.name
+
+
+def insert_for(dialect: str, model):
+    """Return the dialect's INSERT construct that supports ON CONFLICT."""
+    try:
+        return _INSERTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f"Upsert is not supported for dialect {dialect!r}")
+
+
+def build_upsert(
+    dialect: str,
+    model,
+    rows: list[dict],
+    index_elements: list[str],
+    add: Iterable[str] = (),
+    set_: Callable[[Any], dict[str, ColumnElement]] | None = None,
+):
+    """Build one multi-row upsert for ``rows``.
+
+    ``add`` lists columns whose incoming value is added to the stored one.
+    ``set_`` receives the ``excluded`` namespace and returns any further
+    column assignments for the conflict branch.
+    """
+    stmt = insert_for(dialect, model).values(rows)
+    excluded = stmt.excluded
+    assignments = {col: getattr(model, col) + getattr(excluded, col) for col in add}
+    if set_ is not None:
+        assignments.update(set_(excluded))
+    if not assignments:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=assignments)
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model,
+    rows: list[dict],
+    index_elements: list[str],
+    add: Iterable[str] = (),
+    set_: Callable[[Any], dict[str, ColumnElement]] | None = None,
+    returning: Iterable[ColumnElement] = (),
+) -> list:
+    """Execute :func:`build_upsert` for ``rows`` without committing.
+
+    Rows must be unique on ``index_elements``; PostgreSQL rejects a statement
+    that touches the same conflict target twice. With ``returning``, the
+    listed columns of every inserted or updated row are returned (values as
+    stored after the upsert); otherwise the result is empty.
+    """
+    dialect = dialect_name(session)
+    add = tuple(add)
+    returning = tuple(returning)
+    stored = []
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        stmt = build_upsert(dialect, model, chunk, index_elements, add=add, set_=set_)
+        if returning:
+            stored.extend((await session.execute(stmt.returning(*returning))).all())
+        else:
+            await session.execute(stmt)
+    return stored
@@ -0,0 +1,215 @@
+"""Rolling 7- and 30-day activity windows, maintained incrementally.
+
+``activity_windows`` holds one row per (window, user) with the sums of the
+daily ``user_activity`` rows from ``starts_on`` (``today - days``) through
+today — the same range the weekly queries used to recompute on every request.
+The activity upsert adds each batch to every window in its transaction;
+:func:`roll_windows` runs nightly (and at startup, to catch up after
+downtime) and subtracts the days that fell out of each window.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.aggregates import total
+from bot.database.models import ActivityWindow, User, UserActivity
+from bot.database.upsert import bulk_upsert
+from bot.utils.time_utils import local_today
+
+WINDOWS = (7, 30)
+
+WINDOW_COLUMNS = (
+    "message_count",
+    "total_chars",
+    "short_count",
+    "medium_count",
+    "long_count",
+    "media_count",
+    "question_count",
+    "reactions_received",
+    "bot_mentions",
+    "bot_replies",
+    "swear_count",
+    "mom_insult_count",
+    "fire_reactions",
+    "heart_reactions",
+)
+
+
+def window_stats(days: int, columns, with_active_days: bool = False):
+    """SELECT user_id, username, <columns>... [, active_days] for one window.
+
+    Same row shape as :func:`bot.database.aggregates.user_totals`.
+    """
+    selected = [getattr(ActivityWindow, name) for name in columns]
+    if with_active_days:
+        selected.append(ActivityWindow.active_days)
+    return (
+        select(ActivityWindow.user_id, User.username, *selected)
+        .outerjoin(User, User.user_id == ActivityWindow.user_id)
+        .where(ActivityWindow.days == days)
+    )
+
+
+def _later(excluded, column):
+    return case((excluded > column, excluded), else_=column)
+
+
+async def apply_window_deltas(
+    session: AsyncSession,
+    rows: list[dict],
+    became_active: set[tuple[int, date]],
+    today: date | None = None,
+):
+    """Add a batch of user_activity deltas to every window (no commit).
+
+    ``became_active`` holds the (user_id, date) pairs whose first message
+    arrived in this batch; each adds one active day.
+    """
+    today = today or local_today()
+    window_rows = []
+    for days in WINDOWS:
+        starts_on = today - timedelta(days=days)
+        per_user: dict[int, dict] = {}
+        for row in rows:
+            if row["date"] < starts_on:
+                continue
+            delta = per_user.get(row["user_id"])
+            if delta is None:
+                delta = per_user[row["user_id"]] = {
+                    "days": days,
+                    "user_id": row["user_id"],
+                    "starts_on": starts_on,
+                    "last_date": row["date"],
+                    **{name: 0 for name in WINDOW_COLUMNS},
+                    "active_days": 0,
+                    "active_hours_mask": 0,
+                }
+            for name in WINDOW_COLUMNS:
+                delta[name] += row.get(name, 0)
+            delta["active_hours_mask"] |= row.get("active_hours_mask", 0)
+            delta["last_date"] = max(delta["last_date"], row["date"])
+            if (row["user_id"], row["date"]) in became_active:
+                delta["active_days"] += 1
+        window_rows.extend(per_user.values())
+
+    await bulk_upsert(
+        session,
+        ActivityWindow,
+        window_rows,
+        index_elements=["days", "user_id"],
+        add=(*WINDOW_COLUMNS, "active_days"),
+        set_=lambda excluded: {
+            "active_hours_mask": ActivityWindow.active_hours_mask.op("|")(
+                excluded.active_hours_mask
+            ),
+            "last_date": _later(excluded.last_date, ActivityWindow.last_date),
+        },
+    )
+
+
+async def _recompute_masks(session: AsyncSession, days: int, starts_on: date, user_ids: list[int]):
+    """Hours cannot be subtracted from a bitmask: OR the remaining days again."""
+    masks = dict.fromkeys(user_ids, 0)
+    result = await session.execute(
+        select(UserActivity.user_id, UserActivity.active_hours_mask).where(
+            UserActivity.user_id.in_(user_ids), UserActivity.date >= starts_on
+        )
+    )
+    for user_id, mask in result.all():
+        masks[user_id] |= mask
+    await session.execute(
+        update(ActivityWindow),
+        [
+            {"days": days, "user_id": user_id, "active_hours_mask": mask}
+            for user_id, mask in masks.items()
+        ],
+    )
+
+
+async def roll_windows(session: AsyncSession, today: date | None = None) -> int:
+    """Subtract the days that fell out of each window. Returns rows adjusted."""
+    today = today or local_today()
+    adjusted = 0
+    for days in WINDOWS:
+        starts_on = today - timedelta(days=days)
+        departing = await session.execute(
+            select(
+                UserActivity.user_id,
+                *(total(getattr(UserActivity, name)).label(name) for name in WINDOW_COLUMNS),
+                func.count(case((UserActivity.message_count > 0, 1))).label("active_days"),
+            )
+            .join(
+                ActivityWindow,
+                and_(ActivityWindow.user_id == UserActivity.user_id, ActivityWindow.days == days),
+            )
+            .where(UserActivity.date >= ActivityWindow.starts_on, UserActivity.date < starts_on)
+            .group_by(UserActivity.user_id)
+        )
+        deltas = [
+            {
+                "days": days,
+                "user_id": row.user_id,
+                "starts_on": starts_on,
+                "last_date": starts_on,
+                **{name: -getattr(row, name) for name in WINDOW_COLUMNS},
+                "active_days": -row.active_days,
+            }
+            for row in departing
+        ]
+        if deltas:
+            await bulk_upsert(
+                session,
+                ActivityWindow,
+                deltas,
+                index_elements=["days", "user_id"],
+                add=(*WINDOW_COLUMNS, "active_days"),
+            )
+            await _recompute_masks(session, days, starts_on, [d["user_id"] for d in deltas])
+            adjusted += len(deltas)
+
+        await session.execute(
+            update(ActivityWindow)
+            .where(ActivityWindow.days == days, ActivityWindow.starts_on < starts_on)
+            .values(starts_on=starts_on)
+        )
+        # No activity left inside the window
+        await session.execute(
+            delete(ActivityWindow).where(
+                ActivityWindow.days == days, ActivityWindow.last_date < starts_on
+            )
+        )
+    await session.commit()
+    return adjusted
+
+
+async def rebuild_windows(session: AsyncSession, today: date | None = None) -> int:
+    """Recompute every window from the daily rows. Returns rows written."""
+    today = today or local_today()
+    since = today - timedelta(days=max(WINDOWS))
+    result = await session.execute(
+        select(
+            UserActivity.user_id,
+            UserActivity.date,
+            UserActivity.active_hours_mask,
+            *(getattr(UserActivity, name) for name in WINDOW_COLUMNS),
+        ).where(UserActivity.date >= since)
+    )
+    rows = [dict(row._mapping) for row in result]
+    became_active = {(row["user_id"], row["date"]) for row in rows if row["message_count"] > 0}
+
+    await session.execute(delete(ActivityWindow))
+    await apply_window_deltas(session, rows, became_active, today)
+    await session.commit()
+    return (await session.execute(select(func.count()).select_from(ActivityWindow))).scalar_one()
+
+
+async def needs_backfill(session: AsyncSession, today: date | None = None) -> bool:
+    """True when no window rows exist but there is activity inside a window."""
+    since = (today or local_today()) - timedelta(days=max(WINDOWS))
+    has_windows = (await session.execute(select(ActivityWindow.user_id).limit(1))).first()
+    has_activity = (
+        await session.execute(select(UserActivity.id).where(UserActivity.date >= since).limit(1))
+    ).first()
+    return has_windows is None and has_activity is not None
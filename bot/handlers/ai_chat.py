@@ -4,6 +4,7 @@ from aiogram import Router, F
 from aiogram.types import Message
 
 from bot.services.ai_chat import ai_service
+from bot.services.bot_identity import current_bot_identity
 
 logger = logging.getLogger(__name__)
 
@@ -17,15 +18,8 @@ async def handle_ai_message(message: Message):
         return
 
     # Determine if this is a direct interaction (reply to bot or mention)
-    is_direct = False
-    bot_info = await message.bot.me()
-
-    if message.reply_to_message and message.reply_to_message.from_user:
-        if message.reply_to_message.from_user.id == bot_info.id:
-            is_direct = True
-
-    if bot_info.username and f"@{bot_info.username}" in message.text:
-        is_direct = True
+    identity = current_bot_identity()
+    is_direct = identity.is_reply_to_bot(message) or identity.is_mentioned(message.text)
 
     username = message.from_user.username or ""
     first_name = message.from_user.first_name or ""
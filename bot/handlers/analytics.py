@@ -1,16 +1,26 @@
 import logging
 import re
-from datetime import date
+from datetime import timedelta
 
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, MessageReactionUpdated
 
 from bot.database.session import async_session
-from bot.database.repositories import UserActivityRepository
-from bot.middlewares.activity_tracker import _message_authors
-from bot.services.analytics import analytics_service, _format_stats, calculate_xp, get_level, LEVELS
+from bot.database.repositories import (
+    ActivityHoursRepository,
+    RankingRepository,
+    UserActivityRepository,
+)
+from bot.services.analytics import analytics_service, _format_stats
+from bot.services.activity_buffer import activity_buffer
+from bot.services.analytics_cache import analytics_cache
 from bot.services.ai_chat import ai_service
+from bot.services.message_authors import message_author_index
+from bot.services.user_directory import user_directory
+from bot.utils.heatmap import busiest_window
+from bot.utils.time_utils import local_today
+from bot.utils.xp import LEVELS, get_level
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +66,7 @@ async def handle_vibe(message: Message):
 
 @router.message_reaction()
 async def handle_reaction(event: MessageReactionUpdated):
-    author_id = _message_authors.get(event.message_id)
+    author_id = await message_author_index.lookup(event.chat.id, event.message_id)
     if not author_id:
         return
 
@@ -68,9 +78,16 @@ async def handle_reaction(event: MessageReactionUpdated):
     heart = 1 if "❤️" in added else 0
 
     if fire or heart:
-        async with async_session() as db:
-            repo = UserActivityRepository(db)
-            await repo.add_reaction(author_id, date.today(), fire=fire, heart=heart)
+        # Coalesced with other reactions and written by the next buffer flush
+        activity_buffer.record_reaction(author_id, local_today(), fire=fire, heart=heart)
+
+
+async def _stat_text(target_id: int, target_username: str | None) -> str:
+    async with async_session() as db:
+        repo = UserActivityRepository(db)
+        stats = await repo.get_user_week_stats(target_id)
+        total_stats = await repo.get_user_total_stats(target_id)
+    return _format_stats(target_id, target_username, stats, total_stats)
 
 
 @router.message(Command("stat"))
@@ -80,35 +97,24 @@ async def handle_stat(message: Message):
 
     if mention_match:
         target_username = mention_match.group(1)
-        target_id = None
-
-        async with async_session() as db:
-            repo = UserActivityRepository(db)
-            all_users = await repo.get_top_users(days=30, limit=100)
-            for u in all_users:
-                if (u.get("username") or "").lower() == target_username.lower():
-                    target_id = u["user_id"]
-                    break
+        target_id = await user_directory.resolve(target_username)
 
         if target_id is None:
             await message.reply(
                 f"Не знайшов @{target_username} в базі. Хай спочатку напише щось! 🤷"
             )
             return
-
-        async with async_session() as db:
-            repo = UserActivityRepository(db)
-            stats = await repo.get_user_week_stats(target_id)
-            total_stats = await repo.get_user_total_stats(target_id)
     else:
         target_id = message.from_user.id
         target_username = message.from_user.username
-        async with async_session() as db:
-            repo = UserActivityRepository(db)
-            stats = await repo.get_user_week_stats(target_id)
-            total_stats = await repo.get_user_total_stats(target_id)
 
-    await message.reply(_format_stats(target_id, target_username, stats, total_stats))
+    # Served from the cache until this user's next flushed activity
+    reply = await analytics_cache.get_or_compute(
+        ("stat", target_id, target_username, local_today()),
+        lambda: _stat_text(target_id, target_username),
+        user_id=target_id,
+    )
+    await message.reply(reply)
 
 
 @router.message(Command("top"))
@@ -117,9 +123,12 @@ async def handle_top(message: Message):
         await message.reply("AI вимкнено 🤖")
         return
 
-    async with async_session() as db:
-        reply = await analytics_service.get_top_text(db)
+    async def top_text() -> str:
+        async with async_session() as db:
+            return await analytics_service.get_top_text(db)
 
+    # The AI comment is only regenerated once someone has written something new
+    reply = await analytics_cache.get_or_compute(("top", local_today()), top_text)
     await message.reply(reply)
 
 
@@ -137,15 +146,7 @@ async def handle_role(message: Message):
         return
 
     target_username = mention_match.group(1)
-    target_id = None
-
-    async with async_session() as db:
-        repo = UserActivityRepository(db)
-        all_users = await repo.get_top_users(days=30, limit=100)
-        for u in all_users:
-            if (u.get("username") or "").lower() == target_username.lower():
-                target_id = u["user_id"]
-                break
+    target_id = await user_directory.resolve(target_username)
 
     if target_id is None:
         await message.reply(
@@ -161,45 +162,78 @@ async def handle_role(message: Message):
     await message.reply(reply)
 
 
+def _movement(rank: int, previous_rank: int | None) -> str:
+    """Movement since the last ranking snapshot, e.g. " ▲2" or " ▼1"; blank if unchanged."""
+    if previous_rank is None:
+        return " 🆕"
+    if previous_rank > rank:
+        return f" ▲{previous_rank - rank}"
+    if previous_rank < rank:
+        return f" ▼{rank - previous_rank}"
+    return ""
+
+
+async def _ranking_text() -> str:
+    async with async_session() as db:
+        ranking = await RankingRepository(db).get_ranking()
+
+    if not ranking:
+        return "Ще ніхто нічого не писав 👻"
+
+    medals = ["🥇", "🥈", "🥉"]
+    lines = ["🏆 <b>Рейтинг рівнів</b>\n"]
+    for u in ranking:
+        rank = u["rank"]
+        medal = medals[rank - 1] if rank <= 3 else f"{rank}."
+        name = f"@{u['username']}" if u.get("username") else f"user {u['user_id']}"
+        lines.append(
+            f"{medal} {name} — {get_level(u['xp'])['level_name']} ({u['xp']} XP)"
+            f"{_movement(rank, u['previous_rank'])}"
+        )
+    return "\n".join(lines)
+
+
 @router.message(Command("ranking"))
 async def handle_ranking(message: Message):
+    await message.reply(await analytics_cache.get_or_compute(("ranking",), _ranking_text))
+
+
+_WEEKDAYS = ["понеділок", "вівторок", "середа", "четвер", "пʼятниця", "субота", "неділя"]
+
+
+@router.message(Command("peak"))
+async def handle_peak(message: Message):
     async with async_session() as db:
-        repo = UserActivityRepository(db)
-        all_stats = await repo.get_all_users_total_stats()
+        matrix = await ActivityHoursRepository(db).weekday_hour_matrix(
+            local_today() - timedelta(days=30)
+        )
 
-    if not all_stats:
+    hours = matrix.hour_totals()
+    if not any(hours):
         await message.reply("Ще ніхто нічого не писав 👻")
         return
 
-    ranked = sorted(
-        [
-            {
-                "user_id": u["user_id"],
-                "username": u["username"],
-                "xp": calculate_xp(u),
-            }
-            for u in all_stats
-        ],
-        key=lambda x: x["xp"],
-        reverse=True,
-    )
+    start, _ = busiest_window(hours, width=3)
+    day_totals = matrix.row_totals()
+    busiest_day = max(range(7), key=day_totals.__getitem__)
+    top = max(hours)
 
-    medals = ["🥇", "🥈", "🥉"]
-    lines = ["🏆 <b>Рейтинг рівнів</b>\n"]
-    for i, u in enumerate(ranked):
-        medal = medals[i] if i < 3 else f"{i + 1}."
-        name = f"@{u['username']}" if u.get("username") else f"user {u['user_id']}"
-        _, level_name, _ = get_level(u["xp"])
-        lines.append(f"{medal} {name} — {level_name} ({u['xp']} XP)")
+    lines = [
+        "🔥 <b>Пік активності за 30 днів</b>\n",
+        f"Найгарячіші години: {start:02d}:00–{(start + 3) % 24:02d}:00",
+        f"Найактивніший день: {_WEEKDAYS[busiest_day]}\n",
+    ]
+    for hour in sorted(range(24), key=hours.__getitem__, reverse=True)[:5]:
+        bar = "▇" * max(1, round(hours[hour] / top * 10))
+        lines.append(f"<code>{hour:02d}:00</code> {bar} {hours[hour]}")
 
     await message.reply("\n".join(lines))
 
 
-@router.message(Command("levels"))
-async def handle_levels(message: Message):
+def _levels_text() -> str:
     lines = ["⚡ <b>Рівні</b>\n"]
-    for i, (threshold, name) in enumerate(LEVELS):
-        lines.append(f"{i + 1}. {name} — від {threshold} XP")
+    for i, level in enumerate(LEVELS):
+        lines.append(f"{i + 1}. {level.title} — від {level.threshold} XP")
 
     lines.append(
         "\n<b>Як заробити XP:</b>\n"
@@ -207,5 +241,13 @@ async def handle_levels(message: Message):
         "+3 за тег/відповідь боту · +5 за образу мами бота\n"
         "+2 за 🔥 на твоєму повідомленні · +1 за ❤️"
     )
+    return "\n".join(lines)
 
-    await message.reply("\n".join(lines))
+
+# Depends on nothing but the level table
+_LEVELS_TEXT = _levels_text()
+
+
+@router.message(Command("levels"))
+async def handle_levels(message: Message):
+    await message.reply(_LEVELS_TEXT)
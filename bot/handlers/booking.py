@@ -1,4 +1,3 @@
-import asyncio
 import re
 from aiogram import Router, F
 from aiogram.types import Message
@@ -10,21 +9,17 @@ from bot.keyboards.inline import (
     day_selection_keyboard,
     cancel_selection_keyboard,
 )
-from bot.utils.time_utils import parse_time, get_week_start, is_valid_time_range
+from bot.utils.time_utils import parse_time, is_valid_time_range
 from bot.services.notifications import send_session_message, notify_promoted_user
+from bot.services.tasks import auto_delete, auto_delete_tasks
+from bot.services.game_catalog import game_catalog
+from bot.services.session_cache import session_cache
+from bot.services.user_directory import user_directory
 from bot.config import config
 
 router = Router()
 
 
-async def _auto_delete(bot, chat_id: int, message_id: int, delay: int = 20):
-    await asyncio.sleep(delay)
-    try:
-        await bot.delete_message(chat_id, message_id)
-    except Exception:
-        pass
-
-
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     """Handle /start command."""
@@ -109,15 +104,8 @@ async def cmd_book(message: Message):
                 await _try_delete_message(message)
                 return
 
-            # Get PUBG (only game)
-            game = await service.get_game("PUBG")
-
-            # Get existing session (booking must be open)
-            session = await service.get_session(
-                game=game,
-                chat_id=message.chat.id,
-                day=day,
-            )
+            # Get existing PUBG session (only game; booking must be open)
+            session = await session_cache.get(message.chat.id, "PUBG", day)
             if not session:
                 reply = await message.reply(
                     "❌ Бронювання ще не відкрито.\n"
@@ -149,7 +137,7 @@ async def cmd_book(message: Message):
             return
 
         # Check if any sessions are open
-        open_sessions = await service.get_open_sessions(message.chat.id)
+        open_sessions = await session_cache.open_sessions(message.chat.id)
         if not open_sessions:
             reply = await message.reply(
                 "❌ Бронювання ще не відкрито.\n"
@@ -167,7 +155,7 @@ async def cmd_book(message: Message):
             reply_markup=day_selection_keyboard("pubg", message.from_user.id),
             disable_notification=True,
         )
-        asyncio.create_task(_auto_delete(message.bot, message.chat.id, sent.message_id))
+        auto_delete_tasks.spawn(auto_delete, message.bot, message.chat.id, sent.message_id)
 
 
 @router.message(Command("cancel"))
@@ -191,13 +179,7 @@ async def cmd_cancel(message: Message):
                 return
 
             # Get PUBG (only game)
-            game = await service.get_game("PUBG")
-
-            session = await service.get_session(
-                game=game,
-                chat_id=message.chat.id,
-                day=day,
-            )
+            session = await session_cache.get(message.chat.id, "PUBG", day)
             if not session:
                 await message.reply("❌ Немає активних сесій для скасування.")
                 await _try_delete_message(message)
@@ -228,9 +210,11 @@ async def cmd_cancel(message: Message):
             return
 
         # Show user's bookings
-        user_bookings = await service.get_user_bookings(
-            message.chat.id, message.from_user.id
-        )
+        user_bookings = [
+            (session, session.game.name)
+            for session in await session_cache.open_sessions(message.chat.id)
+            if session.booking_for(message.from_user.id)
+        ]
 
         if not user_bookings:
             await message.reply("❌ У вас немає активних бронювань.")
@@ -288,8 +272,7 @@ async def cmd_edit(message: Message):
 
     async with async_session() as db:
         service = BookingService(db)
-        game = await service.get_game("PUBG")
-        session = await service.get_session(game=game, chat_id=message.chat.id, day=day)
+        session = await session_cache.get(message.chat.id, "PUBG", day)
 
         if not session:
             await _try_delete_message(message)
@@ -319,17 +302,15 @@ async def cmd_status(message: Message):
     # Delete command message
     await _try_delete_message(message)
 
-    async with async_session() as db:
-        service = BookingService(db)
-        sessions = await service.get_open_sessions(message.chat.id)
-
-        if not sessions:
-            await message.answer(
-                "Немає активних сесій бронювання.\n"
-                "Бронювання відкривається щочетверга о 18:00 (по пл часі)."
-            )
-            return
+    sessions = await session_cache.open_sessions(message.chat.id)
+    if not sessions:
+        await message.answer(
+            "Немає активних сесій бронювання.\n"
+            "Бронювання відкривається щочетверга о 18:00 (по пл часі)."
+        )
+        return
 
+    async with async_session() as db:
         # Group by game and send one combined message per game
         seen_games = set()
         for session in sessions:
@@ -365,6 +346,7 @@ async def cmd_help(message: Message):
 • <code>/top</code> — Лідерборд тижня з AI-коментарем
 • <code>/role @user</code> — AI призначає соціальну роль
 • <code>/vibe</code> — AI описує настрій чату зараз
+• <code>/peak</code> — Коли чат найактивніший
 
 <b>Адмін:</b>
 • <code>/open</code> — Відкрити бронювання
@@ -396,6 +378,9 @@ async def cmd_open(message: Message):
     """Admin command to manually open booking sessions."""
     await _try_delete_message(message)
 
+    # Pick up titles added to the games table since startup
+    await game_catalog.reload()
+
     async with async_session() as db:
         service = BookingService(db)
         games = await service.get_games()
@@ -459,55 +444,46 @@ async def cmd_remove(message: Message):
         await message.answer("❌ День має бути 'saturday' або 'sunday'", disable_notification=True)
         return
     
+    # Match by user id so renamed users are found; the name stored on the
+    # booking is only a fallback for users the directory has not seen
+    target_id = await user_directory.resolve(username)
+    
+    session = await session_cache.get(message.chat.id, "PUBG", day)
+    if not session:
+        await message.answer(f"❌ Сесія для {day} не знайдена.", disable_notification=True)
+        return
+
+    if target_id is not None:
+        booking = session.booking_for(target_id)
+    else:
+        booking = next((b for b in session.bookings if b.username.lower() == username.lower()), None)
+    if booking is None:
+        await message.answer(
+            f"❌ Активне бронювання для @{username} на {day} не знайдено.",
+            disable_notification=True
+        )
+        return
+
     async with async_session() as db:
         service = BookingService(db)
-        week_start = get_week_start()
-        
-        # Get the session for this day
-        session = await service.get_or_create_session(
-            chat_id=message.chat.id,
-            day=day,
-            week_start=week_start
-        )
-        
-        if not session:
-            await message.answer(f"❌ Сесія для {day} не знайдена.", disable_notification=True)
-            return
-        
-        # Find and cancel the booking
-        booking_cancelled = False
-        promoted_user = None
-        
-        for booking in session.bookings:
-            if booking.username.lower() == username.lower() and booking.status in ["confirmed", "waitlist"]:
-                old_status = booking.status
-                booking.status = "cancelled"
-                await db.commit()
-                booking_cancelled = True
-                
-                # If it was confirmed, promote someone from waitlist
-                if old_status == "confirmed":
-                    promoted_user = await service.promote_from_waitlist(session.id)
-                
-                break
-        
-        if not booking_cancelled:
-            await message.answer(
-                f"❌ Активне бронювання для @{username} на {day} не знайдено.",
-                disable_notification=True
-            )
+        # Same locked path as /cancel: frees the slot, promotes the waitlist
+        # and keeps the session cache current
+        result = await service.remove_by_admin(session, booking.user_id, booking.username)
+        if not result.success:
+            await message.answer(f"❌ {result.message}", disable_notification=True)
             return
-        
+
         # Update the session message
-        await send_session_message(message.bot, db, session)
-        
-        # Notify the removed user
-        day_name = "суботу" if day == "saturday" else "неділю"
-        await message.answer(
-            f"✅ Бронювання @{username} на {day_name} видалено адміном.",
-            disable_notification=True
-        )
-        
-        # Notify promoted user if any
-        if promoted_user:
-            await notify_promoted_user(message.bot, promoted_user, session)
+        await send_session_message(message.bot, db, result.session)
+
+    # Notify the removed user
+    day_name = "суботу" if day == "saturday" else "неділю"
+    await message.answer(
+        f"✅ Бронювання @{username} на {day_name} видалено адміном.",
+        disable_notification=True
+    )
+
+    # Notify promoted user if any
+    if result.promoted_user:
+        user_id, promoted_username = result.promoted_user
+        await notify_promoted_user(message.bot, message.chat.id, user_id, promoted_username)
@@ -1,4 +1,3 @@
-import asyncio
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 
@@ -12,21 +11,16 @@ from bot.keyboards.inline import (
     edit_time_end_keyboard,
     confirm_cancel_keyboard,
 )
-from bot.utils.time_utils import parse_time, get_day_name, is_valid_time_range
+from bot.utils.time_utils import parse_time, get_day_name, is_valid_time_range, format_time_range
 from bot.services.notifications import send_session_message, notify_promoted_user
+from bot.services.game_catalog import game_catalog
+from bot.services.session_cache import session_cache
+from bot.services.tasks import auto_delete, auto_delete_tasks
 from bot.services.ai_chat import ai_service
 
 router = Router()
 
 
-async def _auto_delete(bot, chat_id: int, message_id: int, delay: int = 20):
-    await asyncio.sleep(delay)
-    try:
-        await bot.delete_message(chat_id, message_id)
-    except Exception:
-        pass
-
-
 @router.callback_query(F.data.startswith("book:day:"))
 async def callback_select_day(callback: CallbackQuery):
     """Handle day selection."""
@@ -41,24 +35,18 @@ async def callback_select_day(callback: CallbackQuery):
         return
 
     # Check if session exists (booking is open)
-    async with async_session() as db:
-        service = BookingService(db)
-        game = await service.get_game(game_name)
-        if not game:
-            await callback.answer("Гру не знайдено", show_alert=True)
-            return
-
-        session = await service.get_session(
-            game=game,
-            chat_id=callback.message.chat.id,
-            day=day,
+    game = game_catalog.get(game_name)
+    if not game:
+        await callback.answer("Гру не знайдено", show_alert=True)
+        return
+
+    session = await session_cache.get(callback.message.chat.id, game.name, day)
+    if not session:
+        await callback.answer(
+            "Бронювання на цей день ще не відкрито",
+            show_alert=True,
         )
-        if not session:
-            await callback.answer(
-                "Бронювання на цей день ще не відкрито",
-                show_alert=True,
-            )
-            return
+        return
 
     await callback.message.edit_text(
         "🕐 Оберіть час початку:",
@@ -110,26 +98,21 @@ async def callback_select_end(callback: CallbackQuery):
         await callback.answer("❌ Невірний діапазон часу", show_alert=True)
         return
 
-    async with async_session() as db:
-        service = BookingService(db)
-        game = await service.get_game(game_name)
-
-        if not game:
-            await callback.answer("❌ Гру не знайдено", show_alert=True)
-            return
+    game = game_catalog.get(game_name)
+    if not game:
+        await callback.answer("❌ Гру не знайдено", show_alert=True)
+        return
 
-        session = await service.get_session(
-            game=game,
-            chat_id=callback.message.chat.id,
-            day=day,
+    session = await session_cache.get(callback.message.chat.id, game.name, day)
+    if not session:
+        await callback.answer(
+            "❌ Бронювання ще не відкрито.\nВідкривається щочетверга о 18:00 (по пл часі).",
+            show_alert=True,
         )
-        if not session:
-            await callback.answer(
-                "❌ Бронювання ще не відкрито.\nВідкривається щочетверга о 18:00 (по пл часі).",
-                show_alert=True,
-            )
-            return
+        return
 
+    async with async_session() as db:
+        service = BookingService(db)
         username = callback.from_user.username or callback.from_user.first_name
         result = await service.book(
             session=session,
@@ -171,41 +154,30 @@ async def callback_quick_book(callback: CallbackQuery):
     day = parts[3]
 
     # Check if user already has a booking
-    async with async_session() as db:
-        service = BookingService(db)
-        game = await service.get_game(game_name)
+    game = game_catalog.get(game_name)
+    if not game:
+        await callback.answer("❌ Гру не знайдено", show_alert=True)
+        return
 
-        if not game:
-            await callback.answer("❌ Гру не знайдено", show_alert=True)
-            return
+    session = await session_cache.get(callback.message.chat.id, game.name, day)
+    if not session:
+        await callback.answer("❌ Бронювання ще не відкрито", show_alert=True)
+        return
 
-        session = await service.get_session(
-            game=game,
-            chat_id=callback.message.chat.id,
-            day=day,
+    existing = session.booking_for(callback.from_user.id)
+    if existing:
+        current_time = format_time_range(existing.time_from, existing.time_to)
+        sent = await callback.message.answer(
+            f"✏️ Ваше поточне бронювання: {current_time}\n"
+            "Оберіть новий час початку:",
+            reply_markup=edit_time_start_keyboard(
+                game_name.lower(), day, callback.from_user.id
+            ),
+            disable_notification=True,
         )
-        if not session:
-            await callback.answer("❌ Бронювання ще не відкрито", show_alert=True)
-            return
-
-        from bot.database.repositories import BookingRepository
-        booking_repo = BookingRepository(db)
-        existing = await booking_repo.get_user_booking(session.id, callback.from_user.id)
-
-        if existing:
-            from bot.utils.time_utils import format_time_range
-            current_time = format_time_range(existing.time_from, existing.time_to)
-            sent = await callback.message.answer(
-                f"✏️ Ваше поточне бронювання: {current_time}\n"
-                "Оберіть новий час початку:",
-                reply_markup=edit_time_start_keyboard(
-                    game_name.lower(), day, callback.from_user.id
-                ),
-                disable_notification=True,
-            )
-            asyncio.create_task(_auto_delete(callback.bot, callback.message.chat.id, sent.message_id))
-            await callback.answer()
-            return
+        auto_delete_tasks.spawn(auto_delete, callback.bot, callback.message.chat.id, sent.message_id)
+        await callback.answer()
+        return
 
     # Send time selection as a new message (will be deleted after booking)
     sent = await callback.message.answer(
@@ -213,7 +185,7 @@ async def callback_quick_book(callback: CallbackQuery):
         reply_markup=time_start_keyboard(game_name.lower(), day, callback.from_user.id),
         disable_notification=True,
     )
-    asyncio.create_task(_auto_delete(callback.bot, callback.message.chat.id, sent.message_id))
+    auto_delete_tasks.spawn(auto_delete, callback.bot, callback.message.chat.id, sent.message_id)
     await callback.answer()
 
 
@@ -305,23 +277,18 @@ async def callback_edit_end(callback: CallbackQuery):
         await callback.answer("❌ Невірний діапазон часу", show_alert=True)
         return
 
-    async with async_session() as db:
-        service = BookingService(db)
-        game = await service.get_game(game_name)
-
-        if not game:
-            await callback.answer("❌ Гру не знайдено", show_alert=True)
-            return
+    game = game_catalog.get(game_name)
+    if not game:
+        await callback.answer("❌ Гру не знайдено", show_alert=True)
+        return
 
-        session = await service.get_session(
-            game=game,
-            chat_id=callback.message.chat.id,
-            day=day,
-        )
-        if not session:
-            await callback.answer("❌ Сесію не знайдено", show_alert=True)
-            return
+    session = await session_cache.get(callback.message.chat.id, game.name, day)
+    if not session:
+        await callback.answer("❌ Сесію не знайдено", show_alert=True)
+        return
 
+    async with async_session() as db:
+        service = BookingService(db)
         username = callback.from_user.username or callback.from_user.first_name
         result = await service.edit_booking(
             session=session,
@@ -379,42 +346,28 @@ async def callback_quick_cancel(callback: CallbackQuery):
     game_name = parts[2].upper()
     day = parts[3]
 
-    async with async_session() as db:
-        service = BookingService(db)
-        game = await service.get_game(game_name)
-
-        if not game:
-            await callback.answer("❌ Гру не знайдено", show_alert=True)
-            return
-
-        session = await service.get_session(
-            game=game,
-            chat_id=callback.message.chat.id,
-            day=day,
-        )
-        if not session:
-            await callback.answer("❌ Сесію не знайдено", show_alert=True)
-            return
-
-        # Check if user has booking
-        from bot.database.repositories import BookingRepository
+    game = game_catalog.get(game_name)
+    if not game:
+        await callback.answer("❌ Гру не знайдено", show_alert=True)
+        return
 
-        booking_repo = BookingRepository(db)
-        booking = await booking_repo.get_user_booking(
-            session.id, callback.from_user.id
-        )
+    session = await session_cache.get(callback.message.chat.id, game.name, day)
+    if not session:
+        await callback.answer("❌ Сесію не знайдено", show_alert=True)
+        return
 
-        if not booking:
-            await callback.answer("❌ У вас немає бронювання на цю сесію", show_alert=True)
-            return
+    # Check if user has booking
+    if not session.booking_for(callback.from_user.id):
+        await callback.answer("❌ У вас немає бронювання на цю сесію", show_alert=True)
+        return
 
-        day_name = get_day_name(day)
-        sent = await callback.message.answer(
-            f"Скасувати бронювання {game_name} на {day_name}?",
-            reply_markup=confirm_cancel_keyboard(session.id),
-            disable_notification=True,
-        )
-        asyncio.create_task(_auto_delete(callback.bot, callback.message.chat.id, sent.message_id))
+    day_name = get_day_name(day)
+    sent = await callback.message.answer(
+        f"Скасувати бронювання {game_name} на {day_name}?",
+        reply_markup=confirm_cancel_keyboard(session.id),
+        disable_notification=True,
+    )
+    auto_delete_tasks.spawn(auto_delete, callback.bot, callback.message.chat.id, sent.message_id)
 
     await callback.answer()
 
@@ -436,14 +389,13 @@ async def callback_cancel_yes(callback: CallbackQuery):
     """Confirm cancellation."""
     session_id = int(callback.data.split(":")[-1])
 
+    session = await session_cache.get_by_id(session_id)
+    if not session:
+        await callback.answer("❌ Сесію не знайдено", show_alert=True)
+        return
+
     async with async_session() as db:
         service = BookingService(db)
-        session = await service.get_session_by_id(session_id)
-
-        if not session:
-            await callback.answer("❌ Сесію не знайдено", show_alert=True)
-            return
-
         username = callback.from_user.username or callback.from_user.first_name
         result = await service.cancel(
             session=session,
@@ -499,14 +451,12 @@ async def callback_refresh(callback: CallbackQuery):
     session_id = int(parts[-1])
     clicked_message_id = callback.message.message_id
 
-    async with async_session() as db:
-        service = BookingService(db)
-        session = await service.get_session_by_id(session_id)
-
-        if not session:
-            await callback.answer("Сесію не знайдено", show_alert=True)
-            return
+    session = await session_cache.get_by_id(session_id)
+    if not session:
+        await callback.answer("Сесію не знайдено", show_alert=True)
+        return
 
+    async with async_session() as db:
         new_message_id = await send_session_message(callback.bot, db, session)
 
         # Delete old message if a new one was created
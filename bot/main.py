@@ -10,6 +10,13 @@ from bot.config import config
 from bot.database.session import init_db
 from bot.handlers import booking, stats, callbacks, ai_chat, analytics
 from bot.services.scheduler import setup_scheduler, shutdown_scheduler
+from bot.services.activity_buffer import activity_buffer
+from bot.services.analytics_cache import analytics_cache
+from bot.services.bot_identity import load_bot_identity
+from bot.services.game_catalog import game_catalog
+from bot.services.message_authors import message_author_index
+from bot.services.mom_insults import mom_insult_classifier
+from bot.services.tasks import supervisor
 from bot.middlewares import ChatFilterMiddleware, ActivityTrackerMiddleware
 
 # Configure logging
@@ -31,6 +38,10 @@ async def main():
     await init_db()
     logger.info("Database initialized")
 
+    # Games are resolved from memory from here on
+    games = await game_catalog.reload()
+    logger.info(f"Loaded {games} games")
+
     # Create bot and dispatcher
     bot = Bot(
         token=config.bot_token,
@@ -38,6 +49,14 @@ async def main():
     )
     dp = Dispatcher()
 
+    # Resolve the bot's id/username once; middlewares and handlers share it
+    identity = await load_bot_identity(bot)
+    logger.info(f"Running as @{identity.username} ({identity.id})")
+
+    # Reactions to messages sent before this restart still resolve to their author
+    loaded = await message_author_index.load()
+    logger.info(f"Loaded {loaded} message authors")
+
     # Add middleware to restrict to specific chat only
     dp.message.middleware(ChatFilterMiddleware())
     dp.callback_query.middleware(ChatFilterMiddleware())
@@ -55,6 +74,12 @@ async def main():
     setup_scheduler(bot)
     logger.info("Scheduler started")
 
+    # Start write-behind flushing of activity counters
+    activity_buffer.start()
+    # Start batched AI classification of mom insults
+    if mom_insult_classifier:
+        mom_insult_classifier.start()
+
     # Start polling
     logger.info("Bot started")
     try:
@@ -64,6 +89,15 @@ async def main():
         )
     finally:
         shutdown_scheduler()
+        # Classify queued candidates first so their hits make the final flush
+        if mom_insult_classifier:
+            await mom_insult_classifier.stop()
+        # Let background tasks finish (or cancel them) while the bot can still call the API
+        await supervisor.drain()
+        # Persist activity still buffered in memory before exiting
+        await activity_buffer.stop()
+        await message_author_index.flush()
+        logger.info(f"Analytics cache: {analytics_cache.stats()}")
         await bot.session.close()
 
 
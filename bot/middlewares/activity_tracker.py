@@ -1,102 +1,23 @@
 """Middleware to track user activity metrics. Raw text is never stored."""
-import asyncio
 import logging
-import re
-from collections import OrderedDict
-from datetime import date, datetime
 from typing import Callable, Dict, Any, Awaitable
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
 
-from bot.database.session import async_session
-from bot.database.repositories import UserActivityRepository
-from bot.utils.time_utils import get_timezone
+from bot.services.activity_buffer import activity_buffer
+from bot.services.bot_identity import current_bot_identity
+from bot.services.message_authors import message_author_index
+from bot.services.message_features import extract_features
+from bot.services.mom_insults import mom_insult_classifier
+from bot.services.user_directory import user_directory
+from bot.utils.time_utils import now
 
 logger = logging.getLogger(__name__)
 
-# In-memory map: message_id → author user_id (for reaction attribution).
-# Bounded to last 1000 messages; lost on restart (XP already in DB is safe).
-_message_authors: OrderedDict[int, int] = OrderedDict()
-_MAX_TRACKED = 1000
-
-# Ukrainian profanity word list. Only the count is stored — raw text is never persisted.
-_SWEAR_WORDS = frozenset({
-    "бля", "блядей", "блядина", "блядота", "блядство", "блядська", "блядь",
-    "блядів", "блять",
-    "найобувати", "найобують", "найобує", "найобщик", "найобщиця",
-    "найопувати", "найопують", "найопує", "найопщик", "найопщиця",
-    "напзиділи", "напиздів", "напизділа", "напіздив", "напіздила", "напіздили",
-    "нах", "нахуй", "нахуя", "нахєр", "нахєра",
-    "наєбав", "наєбала", "наєбали", "наєбати",
-    "наїбав", "наїбала", "наїбали", "наїбати",
-    "пизд", "пизда", "пиздато", "пиздець", "пизди", "пиздолиз",
-    "пиздолизить", "пиздолизня", "пиздоти", "пиздуємо",
-    "пососав", "пососати", "пососи",
-    "похуй", "похую", "похуям", "поєбать", "пройоб", "проєбали",
-    "пізда", "піздата", "піздати", "піздато", "піздаті", "піздец", "піздець",
-    "піздиш", "піздолиз", "піздолизня", "піздота", "піздотой", "піздотою",
-    "піздти", "пізду", "піздує", "піздуємо", "піздуєте",
-    "піздюк", "піздюки", "піздюків",
-    "пісюн", "пісюна", "пісюни", "пісюнів", "піхуй",
-    "соси", "сук", "сука", "суки", "сукою",
-    "сучара", "сучарами", "сучарою", "сучий", "сучка", "сучок", "сучці",
-    "уйоб", "уйобина", "уйобище", "уйобок", "уйобство",
-    "уїбати", "уїбатись", "уїбатися", "уїбаться",
-    "хер", "херовий", "херово", "хером",
-    "хуй", "хуйло", "хуйлопан", "хуйовий", "хуйово", "хуйом", "хуя",
-    "хуяльник", "хуяльнік", "хуями",
-    "хуєвий", "хуєм", "хуєсос", "хуєсосити", "хуєсосний", "хуї", "хуїв", "хєр",
-    "підар", "підор", "підарас", "підараси", "підарів", "підори", "підорас",
-    "єбобо", "єбучий",
-    "їбав", "їбала", "їбали", "їбальний", "їбальник", "їбальнику",
-    "їбана", "їбанат", "їбанута", "їбанути", "їбанутий", "їбанутись", "їбанько",
-    "їбати", "їбатись", "їбатися", "їбе", "їбеш", "їблана", "їблани",
-    # Latin transliterations
-    "khuy", "huy", "xuy", "khuyna", "khuilo",
-    "pizda", "pyzda", "pizdec", "pizdets",
-    "yibaty", "yibat", "yiban", "yibana",
-    "yebat", "yebaty", "yeban",
-    "blyad", "bliad",
-    "suka",
-    "pidar", "pidor", "pidaras",
-    "mudak",
-    "zalupa",
-    "nakhuy", "nahuy",
-})
-
-
-async def _classify_mom_insult_bg(user_id: int, username: str | None, text: str, msg_date: date):
-    """Background task: ask AI if the message insults the bot's mom. Text is not stored."""
-    try:
-        from groq import AsyncGroq
-        from bot.config import config
-
-        client = AsyncGroq(api_key=config.groq_api_key)
-        response = await client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct",
-            max_tokens=5,
-            messages=[
-                {
-                    "role": "user",
-                    "content": (
-                        f"Чи є в цьому повідомленні образа мами? "
-                        f"Відповідай тільки ТАК або НІ:\n{text}"
-                    ),
-                }
-            ],
-        )
-        answer = response.choices[0].message.content.strip().upper()
-        if "ТАК" in answer or "YES" in answer or "ДА" in answer:
-            async with async_session() as db:
-                repo = UserActivityRepository(db)
-                await repo.increment_mom_insult(user_id, msg_date)
-    except Exception as e:
-        logger.error(f"Mom insult classification error: {e}")
-
 
 class ActivityTrackerMiddleware(BaseMiddleware):
-    """Extract behavioral metrics from each message and persist to DB. No text stored."""
+    """Extract behavioral metrics from each message and buffer them for the DB. No text stored."""
 
     async def __call__(
         self,
@@ -115,51 +36,30 @@ class ActivityTrackerMiddleware(BaseMiddleware):
             return
 
         try:
-            bot_info = await message.bot.me()
-            bot_username = bot_info.username or ""
-            bot_id = bot_info.id
+            features = extract_features(message, current_bot_identity())
+            # Hour and date from one clock reading, in the configured timezone
+            local = now()
 
-            text = message.text or message.caption or ""
-            length = len(text)
-            hour = datetime.now(get_timezone()).hour
-            bot_mention = bool(bot_username and f"@{bot_username}" in text)
-            bot_reply = bool(
-                message.reply_to_message
-                and message.reply_to_message.from_user
-                and message.reply_to_message.from_user.id == bot_id
+            # Track message → author for reaction attribution
+            message_author_index.remember(
+                message.chat.id, message.message_id, message.from_user.id, message.date
             )
-            words = set(re.split(r"\W+", text.lower()))
-            has_swear = bool(words & _SWEAR_WORDS)
 
-            # Track message_id → author for reaction attribution
-            _message_authors[message.message_id] = message.from_user.id
-            if len(_message_authors) > _MAX_TRACKED:
-                _message_authors.popitem(last=False)
+            # Keeps @username lookups current before the flush reaches the users table
+            user_directory.remember(message.from_user.id, message.from_user.username)
 
-            async with async_session() as db:
-                repo = UserActivityRepository(db)
-                await repo.upsert_message(
-                    user_id=message.from_user.id,
-                    username=message.from_user.username,
-                    msg_date=date.today(),
-                    length=length,
-                    hour=hour,
-                    bot_mention=bot_mention,
-                    bot_reply=bot_reply,
-                    has_swear=has_swear,
-                )
+            # Folded in memory and written in batches by the write-behind buffer
+            activity_buffer.record_message(
+                user_id=message.from_user.id,
+                username=message.from_user.username,
+                msg_date=local.date(),
+                hour=local.hour,
+                features=features,
+            )
 
-            # AI mom-insult detection only for bot-targeted messages (fire-and-forget)
-            if (bot_mention or bot_reply) and text:
-                from bot.config import config
-                if config.ai_enabled and config.groq_api_key:
-                    asyncio.create_task(
-                        _classify_mom_insult_bg(
-                            user_id=message.from_user.id,
-                            username=message.from_user.username,
-                            text=text,
-                            msg_date=date.today(),
-                        )
-                    )
+            # AI mom-insult detection only for bot-targeted messages, batched
+            text = message.text or message.caption
+            if (features.bot_mention or features.bot_reply) and text and mom_insult_classifier:
+                mom_insult_classifier.submit(message.from_user.id, text, local.date())
         except Exception as e:
             logger.error(f"Activity tracker error: {e}")
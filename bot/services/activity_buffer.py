@@ -0,0 +1,269 @@
+"""Write-behind buffer for activity counters.
+
+Per-message metrics are folded in memory into one delta per (user_id, date)
+and written with a single multi-row upsert every ``flush_interval`` seconds or
+every ``max_messages`` messages, whichever comes first. That bound is also the
+most activity a crash can lose.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Awaitable, Callable
+
+from bot.config import config
+from bot.database.session import async_session
+from bot.database.repositories import (
+    ACTIVITY_GENERATION,
+    DataGenerationRepository,
+    UserActivityRepository,
+)
+from bot.services.analytics_cache import analytics_cache
+from bot.utils.hours import hour_bit
+from bot.utils.message_features import LONG, MEDIUM, SHORT, MessageFeatures
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ActivityDelta:
+    """Counter increments accumulated for one user-day since the last flush."""
+
+    username: str | None = None
+    message_count: int = 0
+    total_chars: int = 0
+    short_count: int = 0
+    medium_count: int = 0
+    long_count: int = 0
+    media_count: int = 0
+    question_count: int = 0
+    bot_mentions: int = 0
+    bot_replies: int = 0
+    swear_count: int = 0
+    mom_insult_count: int = 0
+    fire_reactions: int = 0
+    heart_reactions: int = 0
+    hours_mask: int = 0
+    # Messages per hour of day (index = hour)
+    hour_counts: list[int] = field(default_factory=lambda: [0] * 24)
+
+    def merge(self, other: "ActivityDelta"):
+        """Fold an older delta (e.g. one whose flush failed) into this one."""
+        self.username = self.username or other.username
+        self.message_count += other.message_count
+        self.total_chars += other.total_chars
+        self.short_count += other.short_count
+        self.medium_count += other.medium_count
+        self.long_count += other.long_count
+        self.media_count += other.media_count
+        self.question_count += other.question_count
+        self.bot_mentions += other.bot_mentions
+        self.bot_replies += other.bot_replies
+        self.swear_count += other.swear_count
+        self.mom_insult_count += other.mom_insult_count
+        self.fire_reactions += other.fire_reactions
+        self.heart_reactions += other.heart_reactions
+        self.hours_mask |= other.hours_mask
+        self.hour_counts = [a + b for a, b in zip(self.hour_counts, other.hour_counts)]
+
+    def to_row(self, user_id: int, day: date) -> dict:
+        return {
+            "user_id": user_id,
+            "username": self.username,
+            "date": day,
+            "message_count": self.message_count,
+            "total_chars": self.total_chars,
+            "short_count": self.short_count,
+            "medium_count": self.medium_count,
+            "long_count": self.long_count,
+            "media_count": self.media_count,
+            "question_count": self.question_count,
+            "bot_mentions": self.bot_mentions,
+            "bot_replies": self.bot_replies,
+            "swear_count": self.swear_count,
+            "mom_insult_count": self.mom_insult_count,
+            "fire_reactions": self.fire_reactions,
+            "heart_reactions": self.heart_reactions,
+            "reactions_received": self.fire_reactions + self.heart_reactions,
+            "active_hours_mask": self.hours_mask,
+            "hour_counts": self.hour_counts,
+        }
+
+
+async def _write_rows(rows: list[dict], session_factory=async_session):
+    async with session_factory() as db:
+        repo = UserActivityRepository(db)
+        await repo.upsert_messages(rows)
+
+    # One bump per flush, after the rows are committed and in its own short
+    # transaction, so writers do not queue on the shared generation row for
+    # the length of the upsert
+    try:
+        async with session_factory() as db:
+            await DataGenerationRepository(db).bump(ACTIVITY_GENERATION)
+            await db.commit()
+    except Exception as e:
+        # The rows are stored: failing the flush here would write them twice
+        logger.error(f"Activity generation bump error: {e}")
+
+
+class ActivityBuffer:
+    def __init__(
+        self,
+        flush_interval: float,
+        max_messages: int,
+        writer: Callable[[list[dict]], Awaitable[None]] = _write_rows,
+        max_rows: int = 10_000,
+    ):
+        """``max_rows`` caps the user-day deltas kept while the database is down."""
+        self.flush_interval = flush_interval
+        self.max_messages = max_messages
+        self.max_rows = max_rows
+        self._writer = writer
+        self._deltas: dict[tuple[int, date], ActivityDelta] = {}
+        self._pending_messages = 0
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        # Set after a failed write: the message threshold stops waking the
+        # loop, so the next attempt waits a full flush_interval
+        self._failing = False
+
+    @property
+    def pending_messages(self) -> int:
+        return self._pending_messages
+
+    def _delta(self, user_id: int, day: date) -> ActivityDelta:
+        delta = self._deltas.get((user_id, day))
+        if delta is None:
+            delta = self._deltas[(user_id, day)] = ActivityDelta()
+        return delta
+
+    def record_message(
+        self,
+        user_id: int,
+        username: str | None,
+        msg_date: date,
+        hour: int,
+        features: MessageFeatures,
+    ):
+        """Fold one message's features into the pending delta. Never touches the DB."""
+        delta = self._delta(user_id, msg_date)
+        if username:
+            delta.username = username
+        delta.message_count += 1
+        delta.total_chars += features.length
+        if features.bucket == SHORT:
+            delta.short_count += 1
+        elif features.bucket == MEDIUM:
+            delta.medium_count += 1
+        elif features.bucket == LONG:
+            delta.long_count += 1
+        delta.media_count += features.has_media
+        delta.question_count += features.is_question
+        delta.bot_mentions += features.bot_mention
+        delta.bot_replies += features.bot_reply
+        delta.swear_count += features.swear_count
+        delta.hours_mask |= hour_bit(hour)
+        delta.hour_counts[hour] += 1
+
+        self._pending_messages += 1
+        if self._pending_messages >= self.max_messages and not self._failing:
+            self._wake.set()
+
+    def record_mom_insult(self, user_id: int, msg_date: date):
+        """Count one AI-confirmed mom insult, written with the next flush."""
+        self._delta(user_id, msg_date).mom_insult_count += 1
+
+    def record_reaction(self, user_id: int, reaction_date: date, fire: int = 0, heart: int = 0):
+        """Credit reactions to a message author.
+
+        A burst of reactions on one message coalesces into a single delta, so
+        it costs one row in the next flush however many people reacted.
+        """
+        delta = self._delta(user_id, reaction_date)
+        delta.fire_reactions += fire
+        delta.heart_reactions += heart
+
+    async def flush(self) -> int:
+        """Write all pending deltas in one upsert. Returns the number of rows written."""
+        async with self._flush_lock:
+            if not self._deltas:
+                return 0
+
+            deltas, self._deltas = self._deltas, {}
+            pending, self._pending_messages = self._pending_messages, 0
+            rows = [delta.to_row(user_id, day) for (user_id, day), delta in deltas.items()]
+
+            try:
+                await self._writer(rows)
+            except Exception as e:
+                logger.error(
+                    f"Activity flush error ({len(rows)} rows kept, "
+                    f"retrying in {self.flush_interval}s): {e}"
+                )
+                self._failing = True
+                # Put the batch back so the next flush retries it together
+                # with whatever arrived in the meantime.
+                for key, delta in deltas.items():
+                    if key in self._deltas:
+                        self._deltas[key].merge(delta)
+                    else:
+                        self._deltas[key] = delta
+                self._pending_messages += pending
+                self._drop_overflow()
+                return 0
+
+            self._failing = False
+
+            # Cached /stat, /ranking and /top results for these users are now stale
+            analytics_cache.bump({user_id for user_id, _ in deltas})
+            return len(rows)
+
+    def _drop_overflow(self):
+        """Drop the oldest days beyond ``max_rows`` so an outage cannot grow memory forever."""
+        overflow = len(self._deltas) - self.max_rows
+        if overflow <= 0:
+            return
+        dropped = sorted(self._deltas, key=lambda key: key[1])[:overflow]
+        messages = sum(self._deltas.pop(key).message_count for key in dropped)
+        self._pending_messages = max(self._pending_messages - messages, 0)
+        logger.error(
+            f"Activity buffer over {self.max_rows} rows: dropped {overflow} rows "
+            f"({messages} messages, oldest {dropped[0][1]}, newest {dropped[-1][1]})"
+        )
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush loop (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending.
+
+        The loop is woken rather than cancelled so an in-flight flush is never
+        interrupted halfway through its write.
+        """
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+activity_buffer = ActivityBuffer(
+    flush_interval=config.activity_flush_interval,
+    max_messages=config.activity_flush_max_messages,
+)
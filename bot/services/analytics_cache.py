@@ -0,0 +1,102 @@
+"""Versioned cache for analytics results (/stat, /ranking, /top, leaderboard).
+
+Entries are keyed by query name and parameters and tagged with the data
+generation they were computed from: a per-user generation for results about
+one user, the global generation for everything else. Writers bump the
+generations of the users they touched (the activity flush does this after
+every batch), so a cached result is served until the data behind it changes
+and a repeated command costs one dictionary lookup.
+
+Processes that do not see the writes (the web backend) call
+:meth:`AnalyticsCache.sync` with the ``data_generations`` counter read from
+the database instead.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+# Result sets are small (one reply text or leaderboard list per key)
+CACHE_CAPACITY = 512
+
+
+class AnalyticsCache:
+    def __init__(self, capacity: int = CACHE_CAPACITY):
+        self.capacity = capacity
+        self._entries: OrderedDict[Hashable, tuple[int, Any]] = OrderedDict()
+        self._global = 0
+        self._users: dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def generation(self, user_id: int | None = None) -> int:
+        """Current generation of one user's data, or of all data."""
+        if user_id is None:
+            return self._global
+        return self._users.get(user_id, 0)
+
+    def get(self, key: Hashable, user_id: int | None = None, default=None):
+        """Cached value for ``key`` if it is still current, else ``default``."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.generation(user_id):
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, generation: int):
+        """Store ``value`` computed from data at ``generation``.
+
+        Pass the generation read *before* computing: a write that lands while
+        the query runs then leaves the entry stale instead of hiding the write.
+        """
+        self._entries[key] = (generation, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        user_id: int | None = None,
+    ) -> Any:
+        """Cached value for ``key``, or ``await compute()`` stored under it.
+
+        ``user_id`` scopes the entry to that user's data generation; without
+        it the entry is invalidated by any write.
+        """
+        missing = object()
+        value = self.get(key, user_id, missing)
+        if value is not missing:
+            return value
+        generation = self.generation(user_id)
+        value = await compute()
+        self.put(key, value, generation)
+        return value
+
+    def bump(self, user_ids: Iterable[int]):
+        """Record a write touching ``user_ids`` (and therefore all-user results)."""
+        for user_id in user_ids:
+            self._users[user_id] = self._users.get(user_id, 0) + 1
+        self._global += 1
+
+    def sync(self, generation: int):
+        """Adopt an externally stored global generation, e.g. ``data_generations``."""
+        self._global = generation
+
+    def clear(self):
+        """Drop every entry, e.g. after the rolling windows moved to a new day."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+analytics_cache = AnalyticsCache()
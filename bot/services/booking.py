@@ -1,5 +1,9 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import time, date
 from dataclasses import dataclass
+from weakref import WeakValueDictionary
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.models import Session, Booking, Game
@@ -9,14 +13,15 @@ from bot.database.repositories import (
     BookingRepository,
     BookingHistoryRepository,
 )
+from bot.services.game_catalog import GameCatalog, GameSnapshot, game_catalog
+from bot.services.session_cache import SessionCache, SessionSnapshot, session_cache
+from bot.utils.availability import Availability, Window
 from bot.utils.time_utils import (
     get_week_start,
     get_day_name,
     get_day_date,
     format_date,
     format_time_range,
-    calculate_optimal_time,
-    format_time,
 )
 
 
@@ -34,34 +39,49 @@ def format_user_mention(username: str, user_id: int) -> str:
     return f"[{escaped}](tg://user?id={user_id})"
 
 
+# Per-session locks within this process; an entry disappears once nobody holds or waits on it
+_session_locks: WeakValueDictionary[int, asyncio.Lock] = WeakValueDictionary()
+
+
 @dataclass
 class BookingResult:
     success: bool
     message: str
-    session: Session | None = None
+    session: Session | SessionSnapshot | None = None
     booking: Booking | None = None
     is_waitlist: bool = False
     promoted_user: tuple[int, str] | None = None  # (user_id, username)
 
 
 class BookingService:
-    def __init__(self, db_session: AsyncSession):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        cache: SessionCache | None = session_cache,
+        catalog: GameCatalog = game_catalog,
+    ):
         self.db = db_session
+        self.cache = cache
+        self.catalog = catalog
         self.game_repo = GameRepository(db_session)
         self.session_repo = SessionRepository(db_session)
         self.booking_repo = BookingRepository(db_session)
         self.history_repo = BookingHistoryRepository(db_session)
 
-    async def get_games(self) -> list[Game]:
-        """Get all available games."""
+    async def get_games(self) -> list[Game | GameSnapshot]:
+        """Get all available games (from the catalog once it is loaded)."""
+        if self.catalog.loaded:
+            return list(self.catalog.all())
         return await self.game_repo.get_all()
 
-    async def get_game(self, name: str) -> Game | None:
-        """Get game by name."""
+    async def get_game(self, name: str) -> Game | GameSnapshot | None:
+        """Get game by name (from the catalog once it is loaded)."""
+        if self.catalog.loaded:
+            return self.catalog.get(name)
         return await self.game_repo.get_by_name(name)
 
     async def get_session(
-        self, game: Game, chat_id: int, day: str, week_start: date | None = None
+        self, game: Game | GameSnapshot, chat_id: int, day: str, week_start: date | None = None
     ) -> Session | None:
         """Get existing open session (does not create new one)."""
         if week_start is None:
@@ -72,7 +92,7 @@ class BookingService:
         )
 
     async def create_session(
-        self, game: Game, chat_id: int, day: str, week_start: date | None = None
+        self, game: Game | GameSnapshot, chat_id: int, day: str, week_start: date | None = None
     ) -> Session:
         """Create a new session (used by scheduler only)."""
         if week_start is None:
@@ -91,6 +111,8 @@ class BookingService:
             day=day,
             week_start=week_start,
         )
+        if self.cache is not None:
+            self.cache.invalidate(chat_id)
         # Reload with relationships
         return await self.session_repo.get_by_id(session.id)
 
@@ -102,54 +124,79 @@ class BookingService:
         """Get session by ID."""
         return await self.session_repo.get_by_id(session_id)
 
+    @asynccontextmanager
+    async def _unit_of_work(self, session: Session | SessionSnapshot):
+        """Serialize changes to one session's bookings and commit them once.
+
+        Callers in this process queue on a per-session asyncio lock, which
+        also keeps the session cache's write-through in commit order;
+        PostgreSQL additionally row-locks the session so other processes wait
+        on it (SQLite has no row locks). Anything staged inside is rolled
+        back on error.
+        """
+        lock = _session_locks.setdefault(session.id, asyncio.Lock())
+        await lock.acquire()
+        try:
+            await self.session_repo.lock(session.id)
+            yield
+            fresh = None
+            if self.cache is not None and self.cache.is_loaded(session.chat_id):
+                fresh = await self.session_repo.get_by_id(session.id, refresh=True)
+            await self.db.commit()
+            if fresh is not None:
+                self.cache.store(fresh)
+            elif self.cache is not None:
+                self.cache.invalidate(session.chat_id)
+        except BaseException:
+            await self.db.rollback()
+            raise
+        finally:
+            lock.release()
+
     async def book(
         self,
-        session: Session,
+        session: Session | SessionSnapshot,
         user_id: int,
         username: str,
         time_from: time,
         time_to: time,
     ) -> BookingResult:
-        """Create a booking for a session."""
-        # Check if user already booked
-        existing = await self.booking_repo.get_user_booking(session.id, user_id)
-        if existing:
-            return BookingResult(
-                success=False,
-                message="Ви вже маєте бронювання на цю сесію.",
-                session=session,
-            )
+        """Create a booking for a session.
 
-        # Get next position
-        position = await self.booking_repo.get_next_position(session.id)
-
-        # Determine status based on confirmed count (not position)
+        The returned ``session`` is the one passed in; its ``bookings`` are
+        not reloaded (send_session_message reads the updated session cache).
+        """
         max_slots = session.game.max_slots
-        confirmed = await self.booking_repo.get_confirmed(session.id)
-        is_waitlist = len(confirmed) >= max_slots
-        status = "waitlist" if is_waitlist else "confirmed"
-
-        # Create booking
-        booking = await self.booking_repo.create(
-            session_id=session.id,
-            user_id=user_id,
-            username=username,
-            time_from=time_from,
-            time_to=time_to,
-            position=position,
-            status=status,
-        )
 
-        # Add to history
-        await self.history_repo.add(
-            user_id=user_id,
-            username=username,
-            game=session.game.name,
-            action="booked",
-        )
+        async with self._unit_of_work(session):
+            confirmed, last_position, already_booked = await self.booking_repo.get_slot_summary(
+                session.id, user_id
+            )
+            if already_booked:
+                return BookingResult(
+                    success=False,
+                    message="Ви вже маєте бронювання на цю сесію.",
+                    session=session,
+                )
 
-        # Reload session (send_session_message uses fresh db session for latest data)
-        session = await self.session_repo.get_by_id(session.id)
+            # Status depends on the confirmed count, not the position
+            position = last_position + 1
+            is_waitlist = confirmed >= max_slots
+            booking = await self.booking_repo.create(
+                session_id=session.id,
+                user_id=user_id,
+                username=username,
+                time_from=time_from,
+                time_to=time_to,
+                position=position,
+                status="waitlist" if is_waitlist else "confirmed",
+            )
+            await self.history_repo.stage(
+                user_id=user_id,
+                username=username,
+                game=session.game.name,
+                action="booked",
+            )
 
         if is_waitlist:
             return BookingResult(
@@ -160,68 +207,59 @@ class BookingService:
                 is_waitlist=True,
             )
 
-        display_slot = len(confirmed) + 1
         return BookingResult(
             success=True,
-            message=f"Красава! Слот {display_slot} твій. Ніколи не здавайся! 💪",
+            message=f"Красава! Слот {confirmed + 1} твій. Ніколи не здавайся! 💪",
             session=session,
             booking=booking,
         )
 
     async def cancel(
-        self, session: Session, user_id: int, username: str
+        self, session: Session | SessionSnapshot, user_id: int, username: str
     ) -> BookingResult:
         """Cancel a booking and promote from waitlist if needed."""
-        booking = await self.booking_repo.get_user_booking(session.id, user_id)
-        if not booking:
-            return BookingResult(
-                success=False,
-                message="У вас немає бронювання на цю сесію.",
-                session=session,
-            )
-
-        was_confirmed = booking.status == "confirmed"
-        cancelled_position = booking.position
+        return await self._cancel(session, user_id, username, action="cancelled")
 
-        # Cancel the booking
-        await self.booking_repo.cancel_booking(booking.id)
+    async def remove_by_admin(
+        self, session: Session | SessionSnapshot, user_id: int, username: str
+    ) -> BookingResult:
+        """Remove someone's booking for an admin, promoting from the waitlist.
 
-        # Add to history
-        await self.history_repo.add(
-            user_id=user_id,
-            username=username,
-            game=session.game.name,
-            action="cancelled",
-        )
+        Recorded as "removed", which has no booking counter, so the kick does
+        not count as the player's own cancellation in /mystats and /stats.
+        """
+        return await self._cancel(session, user_id, username, action="removed")
 
+    async def _cancel(
+        self, session: Session | SessionSnapshot, user_id: int, username: str, action: str
+    ) -> BookingResult:
         promoted_user = None
 
-        # If was confirmed, try to promote from waitlist
-        if was_confirmed:
-            waitlist = await self.booking_repo.get_waitlist(
-                session.id, session.game.max_slots
-            )
-            if waitlist:
-                # Promote first person from waitlist
-                promoted = waitlist[0]
-                await self.booking_repo.update_position_and_status(
-                    promoted.id,
-                    cancelled_position,
-                    "confirmed",
+        async with self._unit_of_work(session):
+            booking = await self.booking_repo.get_user_booking(session.id, user_id)
+            if not booking:
+                return BookingResult(
+                    success=False,
+                    message="У вас немає бронювання на цю сесію.",
+                    session=session,
                 )
-                promoted_user = (promoted.user_id, promoted.username)
-
-                # Shift other waitlist positions
-                for i, wl_booking in enumerate(waitlist[1:], start=1):
-                    new_position = session.game.max_slots + i
-                    await self.booking_repo.update_position_and_status(
-                        wl_booking.id,
-                        new_position,
-                        "waitlist",
-                    )
 
-        # Reload session (send_session_message uses fresh db session for latest data)
-        session = await self.session_repo.get_by_id(session.id)
+            was_confirmed = booking.status == "confirmed"
+            cancelled_position = booking.position
+
+            await self.booking_repo.cancel_booking(booking.id)
+            await self.history_repo.stage(
+                user_id=user_id,
+                username=username,
+                game=session.game.name,
+                action=action,
+            )
+
+            # A freed confirmed slot goes to the head of the waitlist
+            if was_confirmed:
+                promoted_user = await self.booking_repo.promote_waitlist(
+                    session.id, session.game.max_slots, cancelled_position
+                )
 
         return BookingResult(
             success=True,
@@ -232,33 +270,31 @@ class BookingService:
 
     async def edit_booking(
         self,
-        session: Session,
+        session: Session | SessionSnapshot,
         user_id: int,
         username: str,
         time_from: time,
         time_to: time,
     ) -> BookingResult:
         """Edit booking times without affecting cancellation stats."""
-        booking = await self.booking_repo.get_user_booking(session.id, user_id)
-        if not booking:
-            return BookingResult(
-                success=False,
-                message="У вас немає бронювання на цю сесію.",
-                session=session,
-            )
-
-        await self.booking_repo.update_booking_times(
-            booking.id, time_from, time_to
-        )
-
-        await self.history_repo.add(
-            user_id=user_id,
-            username=username,
-            game=session.game.name,
-            action="edited",
-        )
+        async with self._unit_of_work(session):
+            booking = await self.booking_repo.get_user_booking(session.id, user_id)
+            if not booking:
+                return BookingResult(
+                    success=False,
+                    message="У вас немає бронювання на цю сесію.",
+                    session=session,
+                )
 
-        session = await self.session_repo.get_by_id(session.id)
+            await self.booking_repo.update_booking_times(
+                booking.id, time_from, time_to
+            )
+            await self.history_repo.stage(
+                user_id=user_id,
+                username=username,
+                game=session.game.name,
+                action="edited",
+            )
 
         return BookingResult(
             success=True,
@@ -316,6 +352,8 @@ class BookingService:
     async def update_message_id(self, session_id: int, message_id: int):
         """Update session message ID."""
         await self.session_repo.update_message_id(session_id, message_id)
+        if self.cache is not None:
+            self.cache.set_message_id(session_id, message_id)
 
     def format_session_message(self, session: Session) -> str:
         """Format session message for display (single day)."""
@@ -364,16 +402,33 @@ class BookingService:
 
         # Optimal time
         if confirmed:
-            optimal = calculate_optimal_time(confirmed)
+            window, note = self._play_window(confirmed)
             lines.append("")
-            if optimal:
-                start, end = optimal
-                lines.append(f"⏰ Оптимальний час: {format_time(start)}-{format_time(end)} (всі можуть)")
+            if window:
+                time_range = format_time_range(window.time_from, window.time_to)
+                lines.append(f"⏰ Оптимальний час: {time_range} ({note or 'всі можуть'})")
             else:
                 lines.append("⚠️ Немає спільного часу для всіх учасників")
 
         return "\n".join(lines)
 
+    @staticmethod
+    def _play_window(confirmed: list) -> tuple[Window | None, str]:
+        """Time to play for the confirmed players, and who can make it if not everyone.
+
+        Falls back to the best window for two or more players when nobody's
+        times all overlap; the note then reads e.g. "3 з 4: a, b, c".
+        """
+        availability = Availability(confirmed)
+        window = availability.play_window()
+        if window is None or window.players == len(confirmed):
+            return window, ""
+        note = f"{window.players} з {len(confirmed)}"
+        participants = availability.participants(window)
+        if len(participants) == window.players:
+            note += ": " + ", ".join(escape_markdown(b.username) for b in participants)
+        return window, note
+
     def _format_day_section(self, session: Session) -> list[str]:
         """Format a single day section for the weekly message."""
         game = session.game
@@ -411,10 +466,10 @@ class BookingService:
 
         # Optimal time
         if confirmed:
-            optimal = calculate_optimal_time(confirmed)
-            if optimal:
-                start, end = optimal
-                lines.append(f"⏰ Час: {format_time(start)}-{format_time(end)}")
+            window, note = self._play_window(confirmed)
+            if window:
+                time_range = format_time_range(window.time_from, window.time_to)
+                lines.append(f"⏰ Час: {time_range} ({note})" if note else f"⏰ Час: {time_range}")
             else:
                 lines.append("⚠️ Немає спільного часу")
 
@@ -460,18 +515,24 @@ class BookingService:
         """Close all open sessions for a chat."""
         sessions = await self.session_repo.get_open_sessions(chat_id)
 
+        played = []
         for session in sessions:
             # Query confirmed bookings directly from DB to avoid stale relationship data
             confirmed = await self.booking_repo.get_confirmed(session.id)
-            for booking in confirmed:
-                await self.history_repo.add(
-                    user_id=booking.user_id,
-                    username=booking.username,
-                    game=session.game.name,
-                    action="played",
-                )
+            played.extend(
+                {
+                    "user_id": booking.user_id,
+                    "username": booking.username,
+                    "game": session.game.name,
+                    "action": "played",
+                }
+                for booking in confirmed
+            )
+        await self.history_repo.add_many(played)
 
         await self.session_repo.close_all_sessions(chat_id)
+        if self.cache is not None:
+            self.cache.invalidate(chat_id)
 
     async def get_all_open_sessions(self) -> list[Session]:
         """Get all open sessions across all chats."""
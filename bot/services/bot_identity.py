@@ -0,0 +1,48 @@
+"""The bot's own Telegram identity, resolved once at startup and shared."""
+import re
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.types import Message, User
+
+
+@dataclass(frozen=True, slots=True)
+class BotIdentity:
+    id: int
+    username: str
+    mention_re: re.Pattern | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "BotIdentity":
+        username = user.username or ""
+        # Usernames are case-insensitive; \b stops "@bot" matching "@bot_fan".
+        mention_re = (
+            re.compile(rf"@{re.escape(username)}\b", re.IGNORECASE) if username else None
+        )
+        return cls(id=user.id, username=username, mention_re=mention_re)
+
+    def is_mentioned(self, text: str) -> bool:
+        """True if ``text`` contains an @mention of the bot."""
+        return bool(self.mention_re and self.mention_re.search(text))
+
+    def is_reply_to_bot(self, message: Message) -> bool:
+        """True if ``message`` replies to one of the bot's own messages."""
+        reply = message.reply_to_message
+        return bool(reply and reply.from_user and reply.from_user.id == self.id)
+
+
+bot_identity: BotIdentity | None = None
+
+
+async def load_bot_identity(bot: Bot) -> BotIdentity:
+    """Resolve the bot's identity via getMe and share it process-wide."""
+    global bot_identity
+    bot_identity = BotIdentity.from_user(await bot.me())
+    return bot_identity
+
+
+def current_bot_identity() -> BotIdentity:
+    """Return the shared identity without awaiting anything (hot-path safe)."""
+    if bot_identity is None:
+        raise RuntimeError("Bot identity is not loaded; call load_bot_identity() at startup")
+    return bot_identity
@@ -0,0 +1,84 @@
+"""In-memory catalog of games, loaded once at startup.
+
+The ``games`` table is seeded by ``init_db`` and only changes when a title is
+added by hand, yet every booking callback and /book, /cancel, /edit used to
+look its game up with an ``ILIKE`` query. The catalog keeps every game as a
+frozen snapshot indexed by normalized name and by id, so a lookup is one
+dictionary hit. After changing the table call :meth:`GameCatalog.reload`
+(/open does, so a newly added title can be opened right away).
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.models import Game
+from bot.database.session import async_session
+from bot.database.repositories import GameRepository
+
+
+def normalize_name(name: str) -> str:
+    """Catalog key for a game name: callback data carries it lower-cased, /book upper."""
+    return name.strip().casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class GameSnapshot:
+    id: int
+    name: str
+    max_slots: int
+
+    @classmethod
+    def from_model(cls, game: Game) -> "GameSnapshot":
+        return cls(id=game.id, name=game.name, max_slots=game.max_slots)
+
+
+class _Index:
+    """Both lookups of one load, swapped in together by a single assignment."""
+
+    __slots__ = ("by_name", "by_id", "games")
+
+    def __init__(self, games: list[GameSnapshot]):
+        self.games = tuple(sorted(games, key=lambda g: g.id))
+        self.by_name: Mapping[str, GameSnapshot] = MappingProxyType(
+            {normalize_name(g.name): g for g in self.games}
+        )
+        self.by_id: Mapping[int, GameSnapshot] = MappingProxyType({g.id: g for g in self.games})
+
+
+class GameCatalog:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session):
+        self._session_factory = session_factory
+        self._index: _Index | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    async def reload(self) -> int:
+        """(Re)read the games table; returns the number of games."""
+        async with self._session_factory() as db:
+            games = await GameRepository(db).get_all()
+        self._index = _Index([GameSnapshot.from_model(g) for g in games])
+        return len(self._index.games)
+
+    def get(self, name: str) -> GameSnapshot | None:
+        """Game by name, ignoring case and surrounding whitespace."""
+        if self._index is None:
+            return None
+        return self._index.by_name.get(normalize_name(name))
+
+    def get_by_id(self, game_id: int) -> GameSnapshot | None:
+        if self._index is None:
+            return None
+        return self._index.by_id.get(game_id)
+
+    def all(self) -> tuple[GameSnapshot, ...]:
+        """Every game, by id."""
+        if self._index is None:
+            return ()
+        return self._index.games
+
+
+game_catalog = GameCatalog()
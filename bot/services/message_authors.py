@@ -0,0 +1,160 @@
+"""Message → author index for reaction attribution.
+
+Reactions only carry the message id, so the bot remembers who wrote each
+message. Recent messages live in a fixed-size, array-backed ring per chat
+(O(1) lookup, 24 bytes per slot); every message is also written in batches to
+the ``message_authors`` table, so attribution survives restarts and reaches
+messages that have already left the ring. Rows older than the TTL are purged.
+"""
+import logging
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import config
+from bot.database.session import async_session
+from bot.database.repositories import MessageAuthorRepository
+
+logger = logging.getLogger(__name__)
+
+# Slots per chat: the newest 65536 messages resolve without touching the DB.
+RING_CAPACITY = 65536
+
+
+def _utc_naive(moment: datetime) -> datetime:
+    """Normalize to the naive-UTC form stored in the database."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _epoch(moment: datetime) -> int:
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+class _AuthorRing:
+    """Fixed-size slots indexed by ``message_id % capacity``.
+
+    Telegram message ids grow sequentially within a chat, so the newest
+    ``capacity`` messages never collide; an older message is simply
+    overwritten. Id 0 is never issued, so zeroed slots read as empty.
+    """
+
+    __slots__ = ("capacity", "message_ids", "user_ids", "stamps")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.message_ids = array("q", bytes(8 * capacity))
+        self.user_ids = array("q", bytes(8 * capacity))
+        self.stamps = array("q", bytes(8 * capacity))
+
+    def put(self, message_id: int, user_id: int, stamp: int):
+        slot = message_id % self.capacity
+        self.message_ids[slot] = message_id
+        self.user_ids[slot] = user_id
+        self.stamps[slot] = stamp
+
+    def get(self, message_id: int, not_before: int) -> int | None:
+        slot = message_id % self.capacity
+        if self.message_ids[slot] == message_id and self.stamps[slot] >= not_before:
+            return self.user_ids[slot]
+        return None
+
+
+class MessageAuthorIndex:
+    def __init__(
+        self,
+        ttl: timedelta,
+        capacity: int = RING_CAPACITY,
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+        max_pending: int = 50_000,
+    ):
+        """``max_pending`` caps the rows kept for retry while the database is down."""
+        self.ttl = ttl
+        self.capacity = capacity
+        self.max_pending = max_pending
+        self._session_factory = session_factory
+        self._rings: dict[int, _AuthorRing] = {}
+        self._pending: list[dict] = []
+
+    def _ring(self, chat_id: int) -> _AuthorRing:
+        ring = self._rings.get(chat_id)
+        if ring is None:
+            ring = self._rings[chat_id] = _AuthorRing(self.capacity)
+        return ring
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None) - self.ttl
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def remember(self, chat_id: int, message_id: int, user_id: int, sent_at: datetime):
+        """Record a message's author in memory; persisted by the next flush."""
+        sent_at = _utc_naive(sent_at)
+        self._ring(chat_id).put(message_id, user_id, _epoch(sent_at))
+        self._pending.append(
+            {"chat_id": chat_id, "message_id": message_id, "user_id": user_id, "sent_at": sent_at}
+        )
+
+    async def lookup(self, chat_id: int, message_id: int) -> int | None:
+        """Author of a message sent within the TTL, or None if unknown."""
+        cutoff = self._cutoff()
+        ring = self._rings.get(chat_id)
+        if ring is not None:
+            user_id = ring.get(message_id, _epoch(cutoff))
+            if user_id is not None:
+                return user_id
+
+        # Fell out of the ring (or was sent before this process started and
+        # load() was not run): one primary-key lookup.
+        async with self._session_factory() as db:
+            return await MessageAuthorRepository(db).get_author(chat_id, message_id, cutoff)
+
+    async def flush(self) -> int:
+        """Write remembered authors in one batched insert. Returns rows written."""
+        if not self._pending:
+            return 0
+
+        rows, self._pending = self._pending, []
+        try:
+            async with self._session_factory() as db:
+                await MessageAuthorRepository(db).add_many(rows)
+        except Exception as e:
+            logger.error(f"Message author flush error ({len(rows)} rows kept for retry): {e}")
+            self._pending = rows + self._pending
+            self._drop_overflow()
+            return 0
+        return len(rows)
+
+    def _drop_overflow(self):
+        """Drop the oldest rows beyond ``max_pending`` so an outage cannot grow memory forever.
+
+        Dropped authors still resolve from the rings until they are overwritten.
+        """
+        overflow = len(self._pending) - self.max_pending
+        if overflow <= 0:
+            return
+        dropped, self._pending = self._pending[:overflow], self._pending[overflow:]
+        logger.error(
+            f"Message author buffer over {self.max_pending} rows: dropped {overflow} rows "
+            f"(sent {dropped[0]['sent_at']} to {dropped[-1]['sent_at']})"
+        )
+
+    async def load(self) -> int:
+        """Warm the rings from the database (call once at startup)."""
+        async with self._session_factory() as db:
+            rows = await MessageAuthorRepository(db).get_since(self._cutoff())
+        for chat_id, message_id, user_id, sent_at in rows:
+            self._ring(chat_id).put(message_id, user_id, _epoch(sent_at))
+        return len(rows)
+
+    async def purge(self) -> int:
+        """Delete stored authors older than the TTL. Returns rows deleted."""
+        async with self._session_factory() as db:
+            return await MessageAuthorRepository(db).delete_before(self._cutoff())
+
+
+message_author_index = MessageAuthorIndex(ttl=timedelta(days=config.message_author_ttl_days))
@@ -0,0 +1,41 @@
+"""Per-message activity features, extracted in one step.
+
+Everything the tracker counts about a message is derived here, once per
+message, from its text and entities: length and length bucket, media,
+questions, swears, and whether the message mentions or replies to the bot.
+Only these numbers leave the function — never the text.
+"""
+from aiogram.types import Message
+
+from bot.services.bot_identity import BotIdentity
+from bot.utils.message_features import MessageFeatures
+
+_MEDIA_FIELDS = (
+    "photo", "video", "animation", "sticker", "document", "voice", "video_note", "audio",
+)
+
+
+def _mentions_bot(message: Message, text: str, identity: BotIdentity) -> bool:
+    # Telegram already tokenized @mentions into entities, so the text is not
+    # rescanned; offsets are UTF-16 based, which extract_from handles.
+    entities = message.entities if message.text is not None else message.caption_entities
+    username = identity.username.lower()
+    for entity in entities or ():
+        if entity.type == "mention":
+            if username and entity.extract_from(text)[1:].lower() == username:
+                return True
+        elif entity.type == "text_mention":
+            if entity.user and entity.user.id == identity.id:
+                return True
+    return False
+
+
+def extract_features(message: Message, identity: BotIdentity) -> MessageFeatures:
+    """Compute every per-message metric the activity tracker stores."""
+    text = message.text or message.caption or ""
+    return MessageFeatures.of_text(
+        text,
+        has_media=any(getattr(message, field) for field in _MEDIA_FIELDS),
+        bot_mention=_mentions_bot(message, text, identity),
+        bot_reply=identity.is_reply_to_bot(message),
+    )
@@ -0,0 +1,158 @@
+"""Batched AI classification of mom insults aimed at the bot.
+
+Bot-directed messages are queued for a short window and classified together
+in one prompt with numbered answers, with a cap on concurrent LLM requests.
+Hits are credited through the activity buffer, so they reach the database in
+its next bulk upsert. Message texts only ever live in this in-memory queue.
+"""
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Awaitable, Callable
+
+from groq import AsyncGroq
+
+from bot.config import config
+from bot.services.activity_buffer import activity_buffer
+from bot.services.tasks import Overflow, TaskGroup, supervisor
+
+logger = logging.getLogger(__name__)
+
+_MODEL = "moonshotai/kimi-k2-instruct"
+_BATCH_WINDOW = 2.0      # seconds to collect candidates before classifying
+_MAX_BATCH = 20          # messages per prompt
+_MAX_IN_FLIGHT = 2       # concurrent LLM requests
+_MAX_QUEUED = 500        # candidates kept while the LLM is slow or down
+_MAX_TEXT = 500          # characters of each message sent to the LLM
+
+_ANSWER_RE = re.compile(r"(\d+)\s*[:.)\-]\s*(ТАК|НІ|YES|NO|ДА|НЕТ)", re.IGNORECASE)
+_YES = {"ТАК", "YES", "ДА"}
+
+
+@dataclass(slots=True)
+class Candidate:
+    user_id: int
+    text: str
+    msg_date: date
+
+
+def build_prompt(batch: list[Candidate]) -> str:
+    numbered = "\n".join(
+        f"{i}. {' '.join(c.text[:_MAX_TEXT].split())}" for i, c in enumerate(batch, start=1)
+    )
+    return (
+        "Для кожного повідомлення визнач, чи є в ньому образа мами. "
+        "Відповідай рядками у форматі «номер: ТАК» або «номер: НІ», без пояснень.\n\n"
+        f"{numbered}"
+    )
+
+
+def parse_answers(answer: str, size: int) -> set[int]:
+    """1-based indexes answered "yes"; unknown or out-of-range lines are ignored."""
+    hits = set()
+    for number, verdict in _ANSWER_RE.findall(answer):
+        index = int(number)
+        if 1 <= index <= size and verdict.upper() in _YES:
+            hits.add(index)
+    return hits
+
+
+class MomInsultClassifier:
+    def __init__(
+        self,
+        complete: Callable[[str, int], Awaitable[str]] | None = None,
+        record: Callable[[int, date], None] = activity_buffer.record_mom_insult,
+        window: float = _BATCH_WINDOW,
+        max_batch: int = _MAX_BATCH,
+        tasks: TaskGroup | None = None,
+    ):
+        self._client = None if complete else AsyncGroq(api_key=config.groq_api_key)
+        self._complete = complete or self._groq_complete
+        self._record = record
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: list[Candidate] = []
+        self._wake = asyncio.Event()
+        # LLM requests run in a bounded group; extra batches wait their turn
+        self._tasks = tasks or supervisor.group(
+            "mom_insults",
+            limit=_MAX_IN_FLIGHT,
+            overflow=Overflow.QUEUE,
+            max_queued=_MAX_QUEUED // _MAX_BATCH,
+        )
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    async def _groq_complete(self, prompt: str, max_tokens: int) -> str:
+        response = await self._client.chat.completions.create(
+            model=_MODEL,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return response.choices[0].message.content or ""
+
+    def submit(self, user_id: int, text: str, msg_date: date):
+        """Queue a bot-directed message for the next batch."""
+        if len(self._queue) >= _MAX_QUEUED:
+            logger.warning("Mom insult queue is full, dropping the oldest candidate")
+            self._queue.pop(0)
+        self._queue.append(Candidate(user_id, text, msg_date))
+        self._wake.set()
+
+    async def classify(self, batch: list[Candidate]) -> int:
+        """Classify one batch in a single request. Returns the number of hits."""
+        try:
+            # ~8 tokens per "12: ТАК" line
+            answer = await self._complete(build_prompt(batch), 8 * len(batch))
+        except Exception as e:
+            logger.error(f"Mom insult classification error ({len(batch)} messages): {e}")
+            return 0
+
+        hits = parse_answers(answer, len(batch))
+        for index in hits:
+            candidate = batch[index - 1]
+            self._record(candidate.user_id, candidate.msg_date)
+        return len(hits)
+
+    def _dispatch(self):
+        """Hand queued candidates to the task group, one request per batch."""
+        while self._queue:
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            self._tasks.spawn(self.classify, batch)
+
+    async def _run(self):
+        while not self._closing:
+            await self._wake.wait()
+            if not self._closing and len(self._queue) < self.max_batch:
+                # Give the pile-on a moment to arrive so it shares one prompt
+                await asyncio.sleep(self.window)
+            self._wake.clear()
+            self._dispatch()
+
+    def start(self):
+        """Start the batching loop (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Classify what is still queued and wait for in-flight requests."""
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        self._dispatch()
+        await self._tasks.join()
+
+
+# Singleton instance (None if disabled or no API key)
+mom_insult_classifier: MomInsultClassifier | None = None
+if config.ai_enabled and config.groq_api_key:
+    mom_insult_classifier = MomInsultClassifier()
@@ -5,33 +5,28 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from bot.database.models import Session
 from bot.database.session import async_session
 from bot.services.booking import BookingService, escape_markdown, format_user_mention
+from bot.services.session_cache import SessionSnapshot, session_cache
 from bot.keyboards.inline import session_keyboard, weekly_keyboard
 
 
 async def send_session_message(
-    bot: Bot, db_session: AsyncSession, session: Session
+    bot: Bot, db_session: AsyncSession, session: Session | SessionSnapshot
 ) -> int | None:
     """Send or update weekly combined message. Returns message_id."""
-    # Use a fresh db session to ensure we get the latest data
-    async with async_session() as fresh_db:
-        service = BookingService(fresh_db)
-
-        # Get both Saturday and Sunday sessions for this game/chat
-        game = session.game
-        chat_id = session.chat_id
-        week_start = session.week_start
+    # Every committed booking change is already in the session cache
+    game_name = session.game.name
+    chat_id = session.chat_id
+    week_start = session.week_start
 
-        sat_session = await service.get_session(game, chat_id, "saturday", week_start)
-        sun_session = await service.get_session(game, chat_id, "sunday", week_start)
+    # Get both Saturday and Sunday sessions for this game/chat
+    sat_session = await session_cache.get(chat_id, game_name, "saturday", week_start)
+    sun_session = await session_cache.get(chat_id, game_name, "sunday", week_start)
 
-        if not sat_session and not sun_session:
-            return None
+    if not sat_session and not sun_session:
+        return None
 
-        # Refresh to get latest bookings
-        if sat_session:
-            sat_session = await service.get_session_by_id(sat_session.id)
-        if sun_session:
-            sun_session = await service.get_session_by_id(sun_session.id)
+    async with async_session() as fresh_db:
+        service = BookingService(fresh_db)
 
         # Format combined message
         text = service.format_weekly_message(sat_session, sun_session)
@@ -1,15 +1,25 @@
 from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from aiogram import Bot
 
 from bot.config import config
 from bot.database.session import async_session
-from bot.database.repositories import GameRepository, UserActivityRepository, BookingHistoryRepository
+from bot.database.repositories import (
+    BookingHistoryRepository,
+    RankingRepository,
+    UserActivityRepository,
+)
+from bot.database.windows import roll_windows
 from bot.services.booking import BookingService
 from bot.services.notifications import send_session_message, send_reminder
 from bot.services.analytics import analytics_service
-from bot.utils.time_utils import get_week_start, get_timezone, calculate_optimal_time
+from bot.services.analytics_cache import analytics_cache
+from bot.services.message_authors import message_author_index
+from bot.services.session_cache import session_cache
+from bot.utils.availability import Availability
+from bot.utils.time_utils import get_week_start, get_timezone
 
 
 scheduler = AsyncIOScheduler(timezone=get_timezone())
@@ -21,10 +31,9 @@ async def open_booking_sessions(bot: Bot):
         return
 
     async with async_session() as db:
-        game_repo = GameRepository(db)
         service = BookingService(db)
 
-        games = await game_repo.get_all()
+        games = await service.get_games()
         week_start = get_week_start()
 
         # Send announcement (with notification)
@@ -47,6 +56,8 @@ async def open_booking_sessions(bot: Bot):
                 day="sunday",
                 week_start=week_start,
             )
+            # Load the new sessions before the first presses on them
+            await session_cache.reload(config.chat_id)
             # Send one combined message for both days
             await send_session_message(bot, db, sat_session)
 
@@ -59,6 +70,7 @@ async def close_booking_sessions(bot: Bot):
     async with async_session() as db:
         service = BookingService(db)
         await service.close_all_sessions(config.chat_id)
+        await session_cache.reload(config.chat_id)
 
         await bot.send_message(
             chat_id=config.chat_id,
@@ -82,6 +94,22 @@ async def send_weekly_report(bot: Bot):
     await bot.send_message(chat_id=config.chat_id, text=report, disable_notification=True)
 
 
+async def roll_activity_windows():
+    """Drop the day that left the rolling 7/30-day windows (runs nightly)."""
+    async with async_session() as db:
+        await roll_windows(db)
+    # 7-day results computed before the roll describe yesterday's window
+    analytics_cache.clear()
+
+
+async def snapshot_rankings():
+    """Record today's XP ranking as the baseline for rank movement (runs nightly)."""
+    async with async_session() as db:
+        await RankingRepository(db).take_snapshot()
+    # Cached /ranking replies show movement against the previous snapshot
+    analytics_cache.clear()
+
+
 async def schedule_game_reminders(bot: Bot):
     """Schedule reminders for games based on optimal time."""
     async with async_session() as db:
@@ -96,19 +124,18 @@ async def schedule_game_reminders(bot: Bot):
             if not confirmed:
                 continue
 
-            optimal = calculate_optimal_time(confirmed)
-            if not optimal:
+            # Everyone's common time, else the best window for most of them
+            window = Availability(confirmed).play_window()
+            if not window:
                 continue
 
-            start_time, _ = optimal
-
             # Calculate reminder time (1 hour before)
             from bot.utils.time_utils import get_day_date
 
             game_date = get_day_date(session.day, session.week_start)
             game_datetime = datetime.combine(
                 game_date,
-                start_time,
+                window.time_from,
                 tzinfo=tz,
             )
 
@@ -166,6 +193,38 @@ def setup_scheduler(bot: Bot):
         replace_existing=True,
     )
 
+    # Persist message authors in batches, on the same cadence as activity
+    scheduler.add_job(
+        message_author_index.flush,
+        IntervalTrigger(seconds=config.activity_flush_interval),
+        id="flush_message_authors",
+        replace_existing=True,
+    )
+
+    # Move the rolling activity windows forward right after midnight
+    scheduler.add_job(
+        roll_activity_windows,
+        CronTrigger(hour=0, minute=1, timezone=tz),
+        id="roll_activity_windows",
+        replace_existing=True,
+    )
+
+    # Snapshot the XP ranking for ▲/▼ movement after the windows roll
+    scheduler.add_job(
+        snapshot_rankings,
+        CronTrigger(hour=0, minute=5, timezone=tz),
+        id="snapshot_rankings",
+        replace_existing=True,
+    )
+
+    # Drop message authors past their TTL every night at 04:00
+    scheduler.add_job(
+        message_author_index.purge,
+        CronTrigger(hour=4, minute=0, timezone=tz),
+        id="purge_message_authors",
+        replace_existing=True,
+    )
+
     scheduler.start()
 
 
@@ -0,0 +1,196 @@
+"""Write-through cache of each chat's open booking sessions.
+
+Every button press and /book, /status used to look the game up, find the
+session and ``selectinload`` all of its bookings before doing anything. The
+open sessions of a chat (two per game per week) and their bookings are tiny,
+so they are kept here as immutable snapshots instead: a chat is loaded from
+the database on first use and then served from memory.
+
+:class:`~bot.services.booking.BookingService` is the only writer of sessions
+and bookings. After each change it reloads the touched session, commits and
+passes it to :meth:`SessionCache.store` while still holding the session's
+lock, so readers never see a snapshot older than the last committed write.
+Opening and closing sessions (the Thursday and Sunday jobs, /open, /close)
+drops the chat's entry; the jobs then :meth:`SessionCache.reload` it.
+"""
+from dataclasses import dataclass, replace
+from datetime import date, time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.models import Session
+from bot.database.session import async_session
+from bot.database.repositories import SessionRepository
+from bot.services.game_catalog import GameSnapshot, normalize_name
+from bot.utils.time_utils import get_week_start
+
+
+@dataclass(frozen=True, slots=True)
+class BookingSnapshot:
+    id: int
+    user_id: int
+    username: str
+    time_from: time
+    time_to: time
+    position: int
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class SessionSnapshot:
+    """Read-only copy of a session with its active bookings, by position.
+
+    Has the attributes of :class:`~bot.database.models.Session` that the
+    formatters, keyboards and ``BookingService`` read, so it can be passed
+    wherever they expect a session.
+    """
+
+    id: int
+    game: GameSnapshot
+    chat_id: int
+    day: str
+    week_start: date
+    status: str
+    message_id: int | None
+    bookings: tuple[BookingSnapshot, ...]
+
+    @classmethod
+    def from_model(cls, session: Session) -> "SessionSnapshot":
+        bookings = sorted(
+            (b for b in session.bookings if b.status != "cancelled"),
+            key=lambda b: b.position,
+        )
+        return cls(
+            id=session.id,
+            game=GameSnapshot.from_model(session.game),
+            chat_id=session.chat_id,
+            day=session.day,
+            week_start=session.week_start,
+            status=session.status,
+            message_id=session.message_id,
+            bookings=tuple(
+                BookingSnapshot(
+                    id=b.id,
+                    user_id=b.user_id,
+                    username=b.username,
+                    time_from=b.time_from,
+                    time_to=b.time_to,
+                    position=b.position,
+                    status=b.status,
+                )
+                for b in bookings
+            ),
+        )
+
+    def booking_for(self, user_id: int) -> BookingSnapshot | None:
+        """The user's active booking in this session, if any."""
+        return next((b for b in self.bookings if b.user_id == user_id), None)
+
+
+class SessionCache:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session):
+        self._session_factory = session_factory
+        self._chats: dict[int, dict[int, SessionSnapshot]] = {}  # chat_id -> {session_id: snapshot}
+        # Bumped by every write or invalidation of a chat, so a load that
+        # raced with one is not installed over fresher data
+        self._versions: dict[int, int] = {}
+
+    def is_loaded(self, chat_id: int) -> bool:
+        return chat_id in self._chats
+
+    async def _load(self, chat_id: int) -> dict[int, SessionSnapshot]:
+        version = self._versions.get(chat_id, 0)
+        async with self._session_factory() as db:
+            sessions = await SessionRepository(db).get_open_sessions(chat_id)
+        snapshots = {s.id: SessionSnapshot.from_model(s) for s in sessions}
+        if self._versions.get(chat_id, 0) == version:
+            self._chats[chat_id] = snapshots
+        return snapshots
+
+    async def _chat(self, chat_id: int) -> dict[int, SessionSnapshot]:
+        snapshots = self._chats.get(chat_id)
+        if snapshots is None:
+            snapshots = await self._load(chat_id)
+        return snapshots
+
+    async def open_sessions(self, chat_id: int) -> list[SessionSnapshot]:
+        """All open sessions of a chat, oldest first."""
+        snapshots = await self._chat(chat_id)
+        return sorted(snapshots.values(), key=lambda s: s.id)
+
+    async def get(
+        self, chat_id: int, game_name: str, day: str, week_start: date | None = None
+    ) -> SessionSnapshot | None:
+        """The open session for a game and day of the current (or given) week."""
+        if week_start is None:
+            week_start = get_week_start()
+        game_name = normalize_name(game_name)
+        for snapshot in (await self._chat(chat_id)).values():
+            if (
+                snapshot.day == day
+                and snapshot.week_start == week_start
+                and normalize_name(snapshot.game.name) == game_name
+            ):
+                return snapshot
+        return None
+
+    async def get_by_id(self, session_id: int) -> SessionSnapshot | None:
+        """Session by id; closed sessions are read from the database, not cached."""
+        for snapshots in self._chats.values():
+            if session_id in snapshots:
+                return snapshots[session_id]
+
+        async with self._session_factory() as db:
+            session = await SessionRepository(db).get_by_id(session_id)
+        if session is None:
+            return None
+        if session.status == "open":
+            snapshot = (await self._chat(session.chat_id)).get(session_id)
+            if snapshot is not None:
+                return snapshot
+        return SessionSnapshot.from_model(session)
+
+    def store(self, session: Session):
+        """Replace a session's snapshot after a committed write.
+
+        A chat that was never loaded is only marked as changed; the next read
+        loads it whole.
+        """
+        chat_id = session.chat_id
+        self._versions[chat_id] = self._versions.get(chat_id, 0) + 1
+        snapshots = self._chats.get(chat_id)
+        if snapshots is None:
+            return
+        snapshots = dict(snapshots)
+        if session.status == "open":
+            snapshots[session.id] = SessionSnapshot.from_model(session)
+        else:
+            snapshots.pop(session.id, None)
+        self._chats[chat_id] = snapshots
+
+    def set_message_id(self, session_id: int, message_id: int):
+        for chat_id, snapshots in self._chats.items():
+            snapshot = snapshots.get(session_id)
+            if snapshot is not None:
+                self._chats[chat_id] = {
+                    **snapshots, session_id: replace(snapshot, message_id=message_id)
+                }
+                return
+
+    def invalidate(self, chat_id: int | None = None):
+        """Drop one chat (or every chat); it reloads on next use."""
+        if chat_id is None:
+            for chat in self._chats:
+                self._versions[chat] = self._versions.get(chat, 0) + 1
+            self._chats.clear()
+            return
+        self._versions[chat_id] = self._versions.get(chat_id, 0) + 1
+        self._chats.pop(chat_id, None)
+
+    async def reload(self, chat_id: int) -> list[SessionSnapshot]:
+        """Drop a chat and load it again right away (after opening/closing sessions)."""
+        self.invalidate(chat_id)
+        return await self.open_sessions(chat_id)
+
+
+session_cache = SessionCache()
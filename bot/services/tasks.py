@@ -0,0 +1,200 @@
+"""Supervised background tasks.
+
+Fire-and-forget work (auto-deleting prompts, AI classification, ...) is
+spawned through named groups instead of bare ``asyncio.create_task``. Each
+group keeps references to its tasks, bounds how many run at once, applies an
+overflow policy when that bound is reached, counts outcomes, and can be
+drained on shutdown.
+
+Overflow policies:
+
+* ``DROP``     — reject the new task;
+* ``QUEUE``    — run it once a slot frees up (the queue itself is bounded);
+* ``COALESCE`` — like ``QUEUE``, but a new task replaces a queued task with
+  the same key, so only the latest of a burst runs.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class Overflow(str, Enum):
+    DROP = "drop"
+    QUEUE = "queue"
+    COALESCE = "coalesce"
+
+
+class TaskGroup:
+    def __init__(
+        self,
+        name: str,
+        limit: int = 0,
+        overflow: Overflow = Overflow.QUEUE,
+        max_queued: int = 1000,
+    ):
+        """``limit`` caps concurrently running tasks (0 = unbounded)."""
+        self.name = name
+        self.limit = limit
+        self.overflow = overflow
+        self.max_queued = max_queued
+        self._running: set[asyncio.Task] = set()
+        self._queue: OrderedDict[Hashable, tuple[Callable[..., Awaitable], tuple]] = OrderedDict()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._accepting = True
+
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    def spawn(self, fn: Callable[..., Awaitable[Any]], *args, key: Hashable | None = None) -> bool:
+        """Run ``fn(*args)`` in the group. Returns False if the task was dropped.
+
+        Takes the coroutine function rather than a coroutine so that queued or
+        dropped work never leaves an un-awaited coroutine behind.
+        """
+        if not self._accepting:
+            self.dropped += 1
+            logger.warning(f"Task group {self.name!r} is draining, dropped {fn.__name__}")
+            return False
+
+        if not self.limit or len(self._running) < self.limit:
+            self._start(fn, args)
+            return True
+
+        if self.overflow is Overflow.DROP:
+            self.dropped += 1
+            return False
+
+        if self.overflow is Overflow.COALESCE and key is not None and key in self._queue:
+            self._queue[key] = (fn, args)
+            self.coalesced += 1
+            return True
+
+        if len(self._queue) >= self.max_queued:
+            self.dropped += 1
+            logger.warning(f"Task group {self.name!r} queue is full, dropped {fn.__name__}")
+            return False
+
+        if self.overflow is not Overflow.COALESCE or key is None:
+            key = object()
+        self._queue[key] = (fn, args)
+        self._idle.clear()
+        return True
+
+    def _start(self, fn: Callable[..., Awaitable], args: tuple):
+        task = asyncio.create_task(self._run(fn, args), name=f"{self.name}:{fn.__name__}")
+        self.started += 1
+        self._running.add(task)
+        self._idle.clear()
+        task.add_done_callback(self._on_done)
+
+    async def _run(self, fn: Callable[..., Awaitable], args: tuple):
+        try:
+            await fn(*args)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            logger.exception(f"Task {fn.__name__} in group {self.name!r} failed")
+        else:
+            self.completed += 1
+
+    def _on_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if self._queue:
+            _, (fn, args) = self._queue.popitem(last=False)
+            self._start(fn, args)
+        elif not self._running:
+            self._idle.set()
+
+    async def join(self):
+        """Wait until nothing is running or queued."""
+        await self._idle.wait()
+
+    async def drain(self, timeout: float):
+        """Stop accepting work, let running and queued tasks finish for up to
+        ``timeout`` seconds, then cancel whatever is left."""
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            self.dropped += len(self._queue)
+            self._queue.clear()
+            running = list(self._running)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+class TaskSupervisor:
+    def __init__(self):
+        self._groups: dict[str, TaskGroup] = {}
+
+    def group(
+        self,
+        name: str,
+        limit: int = 0,
+        overflow: Overflow = Overflow.QUEUE,
+        max_queued: int = 1000,
+    ) -> TaskGroup:
+        """Return the named group, creating it with these settings on first use."""
+        group = self._groups.get(name)
+        if group is None:
+            group = self._groups[name] = TaskGroup(name, limit, overflow, max_queued)
+        return group
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: group.stats() for name, group in self._groups.items()}
+
+    async def drain(self, timeout: float = 10):
+        """Drain every group concurrently within one shared ``timeout``."""
+        await asyncio.gather(*(group.drain(timeout) for group in self._groups.values()))
+        for name, stats in self.stats().items():
+            logger.info(f"Task group {name}: {stats}")
+
+
+supervisor = TaskSupervisor()
+
+# Bounded so a burst of commands cannot pile up unlimited sleeping tasks
+auto_delete_tasks = supervisor.group("auto_delete", limit=100, overflow=Overflow.QUEUE)
+
+
+async def auto_delete(bot, chat_id: int, message_id: int, delay: int = 20):
+    """Delete a bot prompt after ``delay`` seconds; spawn on ``auto_delete_tasks``."""
+    try:
+        await asyncio.sleep(delay)
+    finally:
+        # Also reached when the shutdown drain cancels the wait: delete right away
+        try:
+            await bot.delete_message(chat_id, message_id)
+        except Exception:
+            pass
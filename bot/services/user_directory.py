@@ -0,0 +1,90 @@
+"""Username ↔ user id directory with an in-process LRU cache.
+
+The ``users`` table is the single place a user's current @username is stored;
+it is written by the activity flush. Commands such as ``/stat @user`` resolve
+names through this cache first and fall back to one indexed lookup, so anyone
+the bot has ever seen can be found — not just recent top posters.
+"""
+from collections import OrderedDict
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.session import async_session
+from bot.database.repositories import UserRepository
+
+# Entries per map; a username/id pair is a few hundred bytes at most.
+CACHE_CAPACITY = 4096
+
+
+class _LRU(OrderedDict):
+    """OrderedDict that evicts the least recently used key past ``capacity``."""
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.capacity = capacity
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+
+class UserDirectory:
+    def __init__(
+        self,
+        capacity: int = CACHE_CAPACITY,
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+    ):
+        self._session_factory = session_factory
+        self._ids = _LRU(capacity)  # lowercased username -> user_id
+        self._names = _LRU(capacity)  # user_id -> username
+
+    def _put(self, user_id: int, username: str):
+        previous = self._names.get(user_id)
+        if previous and previous.lower() != username.lower():
+            # Renamed: the old name must stop resolving to this user
+            if self._ids.get(previous.lower()) == user_id:
+                del self._ids[previous.lower()]
+        self._names.put(user_id, username)
+        self._ids.put(username.lower(), user_id)
+
+    def remember(self, user_id: int, username: str | None):
+        """Note a username seen on ingest; the table is updated by the buffer flush."""
+        if username:
+            self._put(user_id, username)
+
+    async def resolve(self, username: str) -> int | None:
+        """User id for ``@username`` (case-insensitive, leading @ optional)."""
+        key = username.lstrip("@").lower()
+        if not key:
+            return None
+        user_id = self._ids.get(key)
+        if user_id is not None:
+            return user_id
+
+        async with self._session_factory() as db:
+            user_id = await UserRepository(db).find_by_username(key)
+        if user_id is not None:
+            self._ids.put(key, user_id)
+        return user_id
+
+    async def username(self, user_id: int) -> str | None:
+        username = self._names.get(user_id)
+        if username is not None:
+            return username
+
+        async with self._session_factory() as db:
+            username = await UserRepository(db).get_username(user_id)
+        if username:
+            self._put(user_id, username)
+        return username
+
+
+user_directory = UserDirectory()
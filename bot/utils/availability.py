@@ -0,0 +1,133 @@
+"""Sweep-line availability over booking intervals.
+
+Intersecting every confirmed booking (``calculate_optimal_time``) lets one
+player with a narrow window hide hours in which everyone else overlaps.
+:class:`Availability` sorts the bookings' start and end points once and
+sweeps them, tracking how many players are free; every time the count rises
+past ``k`` a window for ``k`` players opens, and it closes when the count
+drops below ``k`` again. That yields the maximal windows for every player
+count in O(n log n), with at most one window per booking in total.
+
+Times are minutes from the session day's midnight. An end of 00:00 is
+midnight, and any end not after its start lies on the next day, so windows
+may run past 1440 (shown as e.g. 23:00-01:00).
+"""
+from dataclasses import dataclass
+from datetime import time
+from itertools import groupby
+from operator import itemgetter
+from typing import Sequence
+
+MINUTES_PER_DAY = 24 * 60
+# Shortest window worth proposing when not everyone can make it
+MIN_PLAY_MINUTES = 60
+
+
+def to_minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def minutes_to_time(minutes: int) -> time:
+    minutes %= MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+
+def interval_minutes(time_from: time, time_to: time) -> tuple[int, int]:
+    """A booking as ``[start, end)`` minutes, moving an early end to the next day."""
+    start = to_minutes(time_from)
+    end = to_minutes(time_to)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+@dataclass(frozen=True, slots=True)
+class Window:
+    """``players`` people are free at every moment of ``[start, end)``."""
+
+    start: int
+    end: int
+    players: int
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+    @property
+    def time_from(self) -> time:
+        return minutes_to_time(self.start)
+
+    @property
+    def time_to(self) -> time:
+        return minutes_to_time(self.end)
+
+
+class Availability:
+    def __init__(self, bookings: Sequence):
+        """Index the given bookings (anything with ``time_from``/``time_to``)."""
+        self.bookings = tuple(bookings)
+        self._intervals = [interval_minutes(b.time_from, b.time_to) for b in self.bookings]
+
+        events = sorted(
+            [(start, 1) for start, _ in self._intervals]
+            + [(end, -1) for _, end in self._intervals]
+        )
+        windows: list[list[Window]] = [[] for _ in range(len(self.bookings) + 1)]
+        opened: list[int] = []  # opened[k - 1]: where the current run of >= k players began
+        count = 0
+        # Ends and starts at the same minute are applied together: back-to-back
+        # bookings neither overlap nor split a window
+        for minute, group in groupby(events, key=itemgetter(0)):
+            count += sum(delta for _, delta in group)
+            while len(opened) < count:
+                opened.append(minute)
+            while len(opened) > count:
+                players = len(opened)
+                windows[players].append(Window(opened.pop(), minute, players))
+
+        self._windows = tuple(
+            tuple(sorted(ranked, key=lambda w: (-w.duration, w.start))) for ranked in windows
+        )
+
+    @property
+    def max_players(self) -> int:
+        """Most players free at the same moment."""
+        return next((k for k in range(len(self.bookings), 0, -1) if self._windows[k]), 0)
+
+    def windows(self, players: int) -> tuple[Window, ...]:
+        """Maximal windows with at least ``players`` free throughout, longest first."""
+        if not 0 < players < len(self._windows):
+            return ()
+        return self._windows[players]
+
+    def common(self) -> Window | None:
+        """The window in which every booking overlaps, if there is one."""
+        if not self.bookings:
+            return None
+        return next(iter(self.windows(len(self.bookings))), None)
+
+    def best(self, min_duration: int = 0, min_players: int = 1) -> Window | None:
+        """Window with the most players lasting at least ``min_duration`` minutes.
+
+        Ties go to the longer, then the earlier window.
+        """
+        for players in range(self.max_players, max(min_players, 1) - 1, -1):
+            longest = self._windows[players][0]
+            if longest.duration >= min_duration:
+                return longest
+        return None
+
+    def play_window(self, min_duration: int = MIN_PLAY_MINUTES) -> Window | None:
+        """Everyone's common time, else the best window for two or more players."""
+        return self.common() or self.best(min_duration=min_duration, min_players=2)
+
+    def participants(self, window: Window) -> tuple:
+        """Bookings free for the whole window, in the order they were given.
+
+        Fewer than ``window.players`` when players hand over within the window.
+        """
+        return tuple(
+            booking
+            for booking, (start, end) in zip(self.bookings, self._intervals)
+            if start <= window.start and end >= window.end
+        )
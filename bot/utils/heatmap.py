@@ -0,0 +1,70 @@
+"""Dense ``rows × 24`` hour-of-day count matrices.
+
+Counts live in one flat, row-major ``array('Q')`` so whole rows and columns are
+sliced and summed at C speed instead of looping over dicts. The array exposes
+the buffer protocol, so ``numpy.frombuffer(m.data, dtype="uint64")
+.reshape(-1, 24)`` wraps a matrix without copying where numpy is available.
+"""
+from array import array
+from typing import Hashable, Iterable, Sequence
+
+HOURS = 24
+
+# activity_hours column per hour of day
+HOUR_COLUMNS = tuple(f"h{hour:02d}" for hour in range(HOURS))
+
+
+class HourMatrix:
+    __slots__ = ("labels", "data")
+
+    def __init__(self, labels: Sequence[Hashable], data: array | None = None):
+        self.labels = list(labels)
+        self.data = data if data is not None else array("Q", bytes(8 * HOURS * len(self.labels)))
+        if len(self.data) != HOURS * len(self.labels):
+            raise ValueError("data must hold 24 counts per label")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[Hashable, Sequence[int]]]) -> "HourMatrix":
+        """Build from ``(label, 24 counts)`` pairs, one row per pair in order."""
+        labels, data = [], array("Q")
+        for label, counts in rows:
+            labels.append(label)
+            data.extend(counts)
+        return cls(labels, data)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.labels), HOURS
+
+    def row(self, index: int) -> array:
+        start = index * HOURS
+        return self.data[start:start + HOURS]
+
+    def add_row(self, index: int, counts: Sequence[int]):
+        start = index * HOURS
+        row = self.data[start:start + HOURS]
+        self.data[start:start + HOURS] = array("Q", map(sum, zip(row, counts)))
+
+    def hour_totals(self) -> list[int]:
+        """Column sums: activity per hour of day across all rows."""
+        return [sum(self.data[hour::HOURS]) for hour in range(HOURS)]
+
+    def row_totals(self) -> list[int]:
+        return [sum(self.row(index)) for index in range(len(self.labels))]
+
+    def to_lists(self) -> list[list[int]]:
+        return [self.row(index).tolist() for index in range(len(self.labels))]
+
+
+def busiest_window(hour_counts: Sequence[int], width: int = 3) -> tuple[int, int]:
+    """Start hour and total of the busiest ``width``-hour span, wrapping past midnight."""
+    if not 1 <= width <= HOURS:
+        raise ValueError("width must be between 1 and 24")
+    wrapped = list(hour_counts) + list(hour_counts[:width - 1])
+    total = sum(wrapped[:width])
+    best_start, best_total = 0, total
+    for start in range(1, HOURS):
+        total += wrapped[start + width - 1] - wrapped[start - 1]
+        if total > best_total:
+            best_start, best_total = start, total
+    return best_start, best_total
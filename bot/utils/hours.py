@@ -0,0 +1,40 @@
+"""Hour-of-day sets packed into 24-bit integer masks (bit N = hour N)."""
+from typing import Iterable
+
+# Bit positions set in each byte value, for decoding masks a byte at a time.
+_BYTE_HOURS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+)
+
+
+def hour_bit(hour: int) -> int:
+    """Mask with only ``hour`` set."""
+    return 1 << hour
+
+
+def hours_to_mask(hours: Iterable[int]) -> int:
+    """Pack hours (0-23) into a mask."""
+    mask = 0
+    for hour in hours:
+        mask |= 1 << hour
+    return mask
+
+
+def hours_csv_to_mask(value: str | None) -> int:
+    """Convert the legacy comma-separated hours string (e.g. "9,18") to a mask."""
+    if not value:
+        return 0
+    return hours_to_mask(int(h) for h in value.split(",") if h.strip())
+
+
+def mask_to_hours(mask: int) -> list[int]:
+    """Unpack a mask into a sorted list of hours."""
+    return [
+        *_BYTE_HOURS[mask & 0xFF],
+        *(h + 8 for h in _BYTE_HOURS[mask >> 8 & 0xFF]),
+        *(h + 16 for h in _BYTE_HOURS[mask >> 16 & 0xFF]),
+    ]
+
+
+# 00:00-05:59 — used for night-owl detection
+NIGHT_HOURS_MASK = hours_to_mask(range(0, 6))
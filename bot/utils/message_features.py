@@ -0,0 +1,48 @@
+"""The numbers the activity tracker keeps about one message.
+
+:class:`MessageFeatures` is what leaves a message once its text has been
+looked at — length and length bucket, media, questions, swears, and whether
+it mentions or replies to the bot — and what the activity buffer and the
+repository fold into the per-day counters. Never the text itself.
+"""
+from dataclasses import dataclass
+
+from bot.utils.profanity import swear_matcher
+
+# Length buckets, in characters: short <= SHORT_MAX < medium < LONG_MIN <= long
+SHORT_MAX = 20
+LONG_MIN = 200
+
+SHORT, MEDIUM, LONG = 0, 1, 2
+
+
+def length_bucket(length: int) -> int:
+    if length <= SHORT_MAX:
+        return SHORT
+    if length < LONG_MIN:
+        return MEDIUM
+    return LONG
+
+
+@dataclass(frozen=True, slots=True)
+class MessageFeatures:
+    length: int = 0
+    # None for messages without text (a bare photo or sticker): they count
+    # as messages and media, but not as short, medium or long text
+    bucket: int | None = None
+    has_media: bool = False
+    is_question: bool = False
+    swear_count: int = 0
+    bot_mention: bool = False
+    bot_reply: bool = False
+
+    @classmethod
+    def of_text(cls, text: str, **flags) -> "MessageFeatures":
+        """Features of plain text; ``flags`` set media/mention/reply."""
+        return cls(
+            length=len(text),
+            bucket=length_bucket(len(text)) if text else None,
+            is_question="?" in text,
+            swear_count=swear_matcher.count(text),
+            **flags,
+        )
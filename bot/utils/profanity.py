@@ -0,0 +1,204 @@
+"""Precompiled profanity matcher.
+
+Text is folded to a canonical Cyrillic skeleton before matching:
+
+* Latin look-alike letters inside Cyrillic words are mapped back ("xуй");
+* Ukrainian/Russian letter variants are merged (і/ї/й/и, є/е, ґ/г);
+* repeated letters are collapsed ("сууука" -> "сука").
+
+Latin-only words stay Latin and can only match the Latin spellings listed
+below: transliterating them onto the Cyrillic stems turned English words
+into swears ("her" -> "хер", "nah" -> "нах").
+
+The word list and stems are compiled into one trie-shaped regular expression,
+so counting hits is a single linear scan done by the regex engine.
+"""
+import re
+from typing import Iterable
+
+# Ukrainian profanity word list, matched as whole words.
+# Only the count is stored — raw text is never persisted.
+SWEAR_WORDS = frozenset({
+    "бля", "блядей", "блядина", "блядота", "блядство", "блядська", "блядь",
+    "блядів", "блять",
+    "найобувати", "найобують", "найобує", "найобщик", "найобщиця",
+    "найопувати", "найопують", "найопує", "найопщик", "найопщиця",
+    "напзиділи", "напиздів", "напизділа", "напіздив", "напіздила", "напіздили",
+    "нах", "нахуй", "нахуя", "нахєр", "нахєра",
+    "наєбав", "наєбала", "наєбали", "наєбати",
+    "наїбав", "наїбала", "наїбали", "наїбати",
+    "пизд", "пизда", "пиздато", "пиздець", "пизди", "пиздолиз",
+    "пиздолизить", "пиздолизня", "пиздоти", "пиздуємо",
+    "пососав", "пососати", "пососи",
+    "похуй", "похую", "похуям", "поєбать", "пройоб", "проєбали",
+    "пізда", "піздата", "піздати", "піздато", "піздаті", "піздец", "піздець",
+    "піздиш", "піздолиз", "піздолизня", "піздота", "піздотой", "піздотою",
+    "піздти", "пізду", "піздує", "піздуємо", "піздуєте",
+    "піздюк", "піздюки", "піздюків",
+    "пісюн", "пісюна", "пісюни", "пісюнів", "піхуй",
+    "соси", "сук", "сука", "суки", "сукою",
+    "сучара", "сучарами", "сучарою", "сучий", "сучка", "сучок", "сучці",
+    "уйоб", "уйобина", "уйобище", "уйобок", "уйобство",
+    "уїбати", "уїбатись", "уїбатися", "уїбаться",
+    "хер", "херовий", "херово", "хером",
+    "хуй", "хуйло", "хуйлопан", "хуйовий", "хуйово", "хуйом", "хуя",
+    "хуяльник", "хуяльнік", "хуями",
+    "хуєвий", "хуєм", "хуєсос", "хуєсосити", "хуєсосний", "хуї", "хуїв", "хєр",
+    "підар", "підор", "підарас", "підараси", "підарів", "підори", "підорас",
+    "єбобо", "єбучий",
+    "їбав", "їбала", "їбали", "їбальний", "їбальник", "їбальнику",
+    "їбана", "їбанат", "їбанута", "їбанути", "їбанутий", "їбанутись", "їбанько",
+    "їбати", "їбатись", "їбатися", "їбе", "їбеш", "їблана", "їблани",
+    # Latin spellings, matched only against Latin words
+    "khuy", "huy", "xuy", "khuyna", "khuilo",
+    "pizda", "pyzda", "pizdec", "pizdets",
+    "yibaty", "yibat", "yiban", "yibana",
+    "yebat", "yebaty", "yeban",
+    "blyad", "bliad",
+    "suka",
+    "pidar", "pidor", "pidaras",
+    "mudak",
+    "zalupa",
+    "nakhuy", "nahuy",
+})
+
+
+# Matched at the start of a word, so inflections are caught ("пиздюлі", "хуярити").
+# Kept to stems with no common innocent words behind them.
+SWEAR_PREFIXES = frozenset({
+    "бляд", "блят",
+    "хуй", "хує", "хуя", "хуї", "похуй", "похую", "похуя", "наху",
+    "пизд", "пізд",
+    "їбан", "їбат", "їбал", "їбло", "їблан",
+    "єбан", "єбат", "єбал", "наєба", "наїба", "уйоб", "уїба", "пройоб", "проєба",
+    "підор", "підар",
+    "сучар", "мудак", "мудил", "залуп",
+    # Latin spellings
+    "khuy", "khui", "xuy", "pizd", "pyzd", "blya", "blia",
+    "yeba", "yiba", "nakhu", "pidar", "pidor", "mudak", "zalup",
+})
+
+# Matched anywhere inside a word ("розпиздяй", "охуєти").
+SWEAR_ROOTS = frozenset({
+    "пизд", "хуй", "хує", "хуя", "бляд", "єбан", "їбан",
+})
+
+# Letters that make an in-word root innocent when right before it:
+# "рахуй", "страхуй", "психує", "колебания", "хлебанул".
+SWEAR_ROOT_EXCLUSIONS = frozenset({"ра", "пси", "кол", "хл"})
+
+# Latin letters that look like Cyrillic ones, for words written mostly in Cyrillic.
+_HOMOGLYPHS = {
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "i": "і", "k": "к",
+    "m": "м", "o": "о", "p": "р", "t": "т", "x": "х", "y": "у",
+}
+
+# Letter variants merged into one canonical letter; soft signs and apostrophes dropped.
+_CYRILLIC_FOLD = {
+    "і": "и", "ї": "и", "й": "и", "ы": "и",
+    "є": "е", "ё": "е", "э": "е",
+    "ґ": "г",
+    "ь": None, "ъ": None, "'": None, "’": None, "ʼ": None,
+}
+
+
+def _table(mapping: dict[str, str]) -> dict[str, str]:
+    """Apply ``mapping`` and then the Cyrillic fold, as one char -> str table."""
+    table = {k: v or "" for k, v in _CYRILLIC_FOLD.items()}
+    for src, dst in mapping.items():
+        table[src] = "".join(table.get(char, char) for char in dst)
+    return table
+
+
+def _replace_all(text: str, replacements: tuple[tuple[str, str], ...]) -> str:
+    # A chain of C-level str.replace calls beats str.translate with a dict
+    # table on non-ASCII text; checking ``in`` first skips absent letters.
+    for src, dst in replacements:
+        if src in text:
+            text = text.replace(src, dst)
+    return text
+
+
+_HOMOGLYPH_REPLACEMENTS = tuple(_table(_HOMOGLYPHS).items())
+_FOLD_REPLACEMENTS = tuple(_table({}).items())
+_MIXED_PAIR_RE = re.compile(r"[a-z][а-яёіїєґ]|[а-яёіїєґ][a-z]")
+_MIXED_WORD_RE = re.compile(r"\b(?=\w*[a-z])(?=\w*[а-яёіїєґ])\w+")
+_REPEAT_RE = re.compile(r"(\w)\1+")
+
+
+def _fold_mixed_word(match: re.Match) -> str:
+    return _replace_all(match.group(), _HOMOGLYPH_REPLACEMENTS)
+
+
+def _collapse(match: re.Match) -> str:
+    return match.group(1)
+
+
+def fold(text: str) -> str:
+    """Fold text to the canonical skeleton used for matching."""
+    text = text.lower()
+    # Look-alike letters inside Cyrillic words first; any Latin left after
+    # that belongs to a Latin-only word and is kept as it is.
+    if _MIXED_PAIR_RE.search(text):
+        text = _MIXED_WORD_RE.sub(_fold_mixed_word, text)
+    text = _replace_all(text, _FOLD_REPLACEMENTS)
+    return _REPEAT_RE.sub(_collapse, text)
+
+
+class _Trie:
+    """Character trie that compiles to an equivalent regular expression."""
+
+    _END = ""
+
+    def __init__(self, words: Iterable[str]):
+        self.root: dict = {}
+        for word in words:
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[self._END] = {}
+
+    def pattern(self) -> str:
+        return self._pattern(self.root) or "(?!)"
+
+    def _pattern(self, node: dict) -> str:
+        optional = self._END in node
+        branches = [
+            re.escape(char) + self._pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if optional else body
+
+
+class SwearMatcher:
+    """Counts profane words in a message with one precompiled regex."""
+
+    def __init__(
+        self,
+        words: Iterable[str] = SWEAR_WORDS,
+        prefixes: Iterable[str] = SWEAR_PREFIXES,
+        roots: Iterable[str] = SWEAR_ROOTS,
+        root_exclusions: Iterable[str] = SWEAR_ROOT_EXCLUSIONS,
+    ):
+        exact = _Trie({fold(w) for w in words}).pattern()
+        prefix = _Trie({fold(w) for w in prefixes}).pattern()
+        root = _Trie({fold(w) for w in roots}).pattern()
+        # One fixed-width lookbehind per exclusion
+        excluded = "".join(f"(?<!{re.escape(fold(e))})" for e in sorted(root_exclusions))
+        # Each alternative consumes a whole word, so a word counts at most once.
+        self._regex = re.compile(
+            rf"\b(?:(?:{prefix})\w*|\w*?{excluded}(?:{root})\w*|(?:{exact})\b)"
+        )
+
+    def count(self, text: str) -> int:
+        """Number of profane words in ``text``."""
+        if not text:
+            return 0
+        return len(self._regex.findall(fold(text)))
+
+
+swear_matcher = SwearMatcher()
@@ -2,6 +2,7 @@ from datetime import datetime, date, time, timedelta
 import pytz
 
 from bot.config import config
+from bot.utils.availability import Availability
 
 
 def get_timezone():
@@ -14,6 +15,11 @@ def now() -> datetime:
     return datetime.now(get_timezone())
 
 
+def local_today() -> date:
+    """Get today's date in configured timezone (not the server's)."""
+    return now().date()
+
+
 def get_week_start(dt: datetime | None = None) -> date:
     """Get Monday of the current week."""
     if dt is None:
@@ -101,31 +107,11 @@ def calculate_optimal_time(
     bookings: list,
 ) -> tuple[time, time] | None:
     """Find time window when all booked players can play."""
-    if not bookings:
-        return None
-
     # Filter only confirmed bookings
     confirmed = [b for b in bookings if b.status == "confirmed"]
-    if not confirmed:
-        return None
 
-    # Handle midnight crossing (time_to can be 00:00 meaning midnight)
-    def to_minutes(t: time, is_end: bool = False) -> int:
-        minutes = t.hour * 60 + t.minute
-        # If it's end time and it's 00:00, treat as 24:00 (1440 minutes)
-        if is_end and minutes == 0:
-            return 1440
-        return minutes
-
-    def from_minutes(minutes: int) -> time:
-        if minutes >= 1440:
-            return time(0, 0)
-        return time(minutes // 60, minutes % 60)
-
-    latest_start = max(to_minutes(b.time_from) for b in confirmed)
-    earliest_end = min(to_minutes(b.time_to, is_end=True) for b in confirmed)
-
-    if latest_start < earliest_end:
-        return (from_minutes(latest_start), from_minutes(earliest_end))
-
-    return None
+    # Midnight (an end of 00:00 or past it) is handled by the availability sweep
+    window = Availability(confirmed).common()
+    if window is None:
+        return None
+    return (window.time_from, window.time_to)
@@ -0,0 +1,128 @@
+"""XP formula and level table shared by the bot, the rollup and the web backend.
+
+The formula exists in three forms that must agree: :func:`calculate_xp` for
+one user's counters, :func:`calculate_xp_batch` for whole columns of counters
+(the leaderboard), and :func:`xp_expr` which builds the same arithmetic as a
+SQL expression so the database can store and sort by XP.
+"""
+from bisect import bisect_right
+from itertools import repeat
+from typing import Mapping, NamedTuple, Sequence, TypedDict
+
+from sqlalchemy import ColumnElement, case, literal
+
+
+class Level(NamedTuple):
+    threshold: int
+    emoji: str
+    name: str
+
+    @property
+    def title(self) -> str:
+        return f"{self.emoji} {self.name}"
+
+
+# Less offensive at lower levels
+LEVELS = (
+    Level(0, "🥚", "Не вилупився"),
+    Level(50, "🐣", "Курча"),
+    Level(150, "🎮", "Диванний стратег"),
+    Level(350, "🍺", "Пивний аналітик"),
+    Level(700, "🔫", "Збройний мудак"),
+    Level(1200, "🏕", "Кемпер-підар"),
+    Level(2000, "💀", "Ходячий труп"),
+    Level(3000, "🤬", "Гроза маминих ботів"),
+    Level(5000, "👑", "Король хаосу"),
+    Level(8000, "🍗", "Трахнув маму бота"),
+)
+LEVEL_THRESHOLDS = tuple(level.threshold for level in LEVELS)
+
+# XP per unit of each counter; total_chars earns 1 XP per CHARS_PER_XP.
+XP_WEIGHTS = {
+    "message_count": 1,
+    "bot_mentions": 3,
+    "bot_replies": 3,
+    "mom_insult_count": 5,
+    "fire_reactions": 2,
+    "heart_reactions": 1,
+}
+CHARS_PER_XP = 100
+# Every counter the formula reads
+XP_COLUMNS = ("total_chars", *XP_WEIGHTS)
+
+
+def calculate_xp(stats: Mapping[str, int]) -> int:
+    xp = stats.get("total_chars", 0) // CHARS_PER_XP
+    for name, weight in XP_WEIGHTS.items():
+        xp += stats.get(name, 0) * weight
+    return xp
+
+
+def calculate_xp_batch(columns: Mapping[str, Sequence[int]]) -> list[int]:
+    """XP for many users at once from columnar counters (one sequence per name).
+
+    Missing columns count as zero; all given sequences must have equal length.
+    """
+    size = len(next(iter(columns.values()), ()))
+    chars = columns.get("total_chars") or repeat(0, size)
+    xp = [value // CHARS_PER_XP for value in chars]
+    for name, weight in XP_WEIGHTS.items():
+        values = columns.get(name)
+        if values:
+            xp = [total + value * weight for total, value in zip(xp, values)]
+    return xp
+
+
+def level_index(xp: int) -> int:
+    """0-based index into LEVELS of the highest threshold reached."""
+    return max(bisect_right(LEVEL_THRESHOLDS, xp) - 1, 0)
+
+
+class LevelInfo(TypedDict):
+    level_num: int  # 0-based index into LEVELS
+    level_name: str
+    level_emoji: str
+    xp_to_next: int
+    progress: int
+    is_max: bool
+
+
+def get_level(xp: int) -> LevelInfo:
+    index = level_index(xp)
+    level = LEVELS[index]
+    is_max = index == len(LEVELS) - 1
+
+    if is_max:
+        xp_to_next = 0
+        progress = 100
+    else:
+        next_threshold = LEVELS[index + 1].threshold
+        xp_to_next = next_threshold - xp
+        progress = min(100, (xp - level.threshold) * 100 // (next_threshold - level.threshold))
+
+    return LevelInfo(
+        level_num=index,
+        level_name=level.title,
+        level_emoji=level.emoji,
+        xp_to_next=xp_to_next,
+        progress=progress,
+        is_max=is_max,
+    )
+
+
+def xp_expr(columns: Mapping[str, ColumnElement]) -> ColumnElement:
+    """SQL form of :func:`calculate_xp` over the given column expressions."""
+    xp = columns["total_chars"] // CHARS_PER_XP
+    for name, weight in XP_WEIGHTS.items():
+        xp = xp + columns[name] * weight
+    return xp
+
+
+def level_expr(xp: ColumnElement) -> ColumnElement:
+    """SQL form of :func:`level_index`."""
+    whens = [
+        (xp >= level.threshold, literal(index))
+        for index, level in reversed(list(enumerate(LEVELS)))
+        if index
+    ]
+    return case(*whens, else_=literal(0))
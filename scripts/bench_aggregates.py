@@ -0,0 +1,172 @@
+"""
+Benchmark analytics aggregation: Python loops over ORM rows vs SQL GROUP BY.
+Usage: python scripts/bench_aggregates.py [users] [days]
+
+Seeds users × days rows of user_activity (default 200 × 500 = 100k) in a
+temporary SQLite file and, if BENCH_POSTGRES_URL is set, in that PostgreSQL
+database too (all tables are dropped and recreated — use a scratch DB). Each
+query is checked to return the same dicts as the legacy implementation, then
+timed, with peak Python memory measured by tracemalloc.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.database.models import Base, User, UserActivity  # noqa: E402
+from bot.database.repositories import UserActivityRepository  # noqa: E402
+from bot.database.rollup import rebuild_user_totals  # noqa: E402
+from bot.database.windows import rebuild_windows  # noqa: E402
+from bot.utils.xp import calculate_xp  # noqa: E402
+
+COUNTERS = (
+    "message_count", "total_chars", "short_count", "medium_count", "long_count",
+    "media_count", "question_count", "reactions_received", "bot_mentions",
+    "bot_replies", "swear_count", "mom_insult_count", "fire_reactions", "heart_reactions",
+)
+
+
+async def seed(sessionmaker, users: int, days: int):
+    rng = random.Random(11)
+    today = date.today()
+    rows = [
+        {
+            "user_id": 1000 + u,
+            "username": f"user{u}",
+            "date": today - timedelta(days=d),
+            **{name: rng.randint(0, 40) for name in COUNTERS},
+            "active_hours_mask": rng.getrandbits(24),
+        }
+        for u in range(users)
+        for d in range(days)
+    ]
+    async with sessionmaker() as db:
+        for start in range(0, len(rows), 5000):
+            await db.execute(insert(UserActivity), rows[start:start + 5000])
+        # The grouped queries take names from the users directory
+        await db.execute(
+            insert(User), [{"user_id": 1000 + u, "username": f"user{u}"} for u in range(users)]
+        )
+        await db.commit()
+        await rebuild_user_totals(db)
+        await rebuild_windows(db)
+    return len(rows)
+
+
+# --- legacy implementations (load every row, sum in Python) ---
+# Lifetime totals are compared against the user_totals rollup read.
+
+async def legacy_all_users_total_stats(db) -> list[dict]:
+    rows = (await db.execute(select(UserActivity))).scalars().all()
+    user_map: dict[int, dict] = {}
+    for r in rows:
+        if r.user_id not in user_map:
+            user_map[r.user_id] = {
+                "user_id": r.user_id, "username": r.username, "message_count": 0,
+                "total_chars": 0, "bot_mentions": 0, "bot_replies": 0,
+                "mom_insult_count": 0, "fire_reactions": 0, "heart_reactions": 0,
+            }
+        u = user_map[r.user_id]
+        for name in ("message_count", "total_chars", "bot_mentions", "bot_replies",
+                     "mom_insult_count", "fire_reactions", "heart_reactions"):
+            u[name] += getattr(r, name)
+        if r.username:
+            u["username"] = r.username
+    for u in user_map.values():
+        u["xp"] = calculate_xp(u)
+    return list(user_map.values())
+
+
+async def legacy_all_week_stats(db, days: int = 7) -> list[dict]:
+    since = date.today() - timedelta(days=days)
+    rows = (await db.execute(select(UserActivity).where(UserActivity.date >= since))).scalars().all()
+    fields = ("message_count", "total_chars", "short_count", "medium_count", "long_count",
+              "media_count", "question_count", "reactions_received", "bot_mentions",
+              "bot_replies", "swear_count", "mom_insult_count")
+    user_map: dict[int, dict] = {}
+    for r in rows:
+        if r.user_id not in user_map:
+            user_map[r.user_id] = {
+                "user_id": r.user_id, "username": r.username,
+                **{name: 0 for name in fields}, "active_days": 0,
+            }
+        u = user_map[r.user_id]
+        for name in fields:
+            u[name] += getattr(r, name)
+        if r.message_count > 0:
+            u["active_days"] += 1
+        if r.username:
+            u["username"] = r.username
+    return sorted(user_map.values(), key=lambda x: x["message_count"], reverse=True)
+
+
+async def measure(sessionmaker, fn) -> tuple[float, int, list[dict]]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    async with sessionmaker() as db:
+        result = await fn(db)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def _by_user(rows: list[dict]) -> dict[int, dict]:
+    return {row["user_id"]: row for row in rows}
+
+
+async def run(label: str, url: str, users: int, days: int):
+    engine = create_async_engine(url, echo=False)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    count = await seed(sessionmaker, users, days)
+    print(f"\n== {label} ({count} activity rows, {users} users) ==")
+
+    cases = [
+        ("lifetime totals", legacy_all_users_total_stats,
+         lambda db: UserActivityRepository(db).get_all_users_total_stats()),
+        ("7-day stats", legacy_all_week_stats,
+         lambda db: UserActivityRepository(db).get_all_week_stats(days=7)),
+        ("90-day stats", lambda db: legacy_all_week_stats(db, days=90),
+         lambda db: UserActivityRepository(db).get_all_week_stats(days=90)),
+    ]
+    for name, legacy, grouped in cases:
+        old_time, old_mem, old = await measure(sessionmaker, legacy)
+        new_time, new_mem, new = await measure(sessionmaker, grouped)
+        assert _by_user(old) == _by_user(new), f"{name}: results differ"
+        print(
+            f"  {name:<16} python loop {old_time * 1000:8.1f} ms {old_mem / 2**20:7.1f} MiB"
+            f"  | GROUP BY {new_time * 1000:7.1f} ms {new_mem / 2**20:6.2f} MiB"
+            f"  ({old_time / new_time:4.1f}x faster)"
+        )
+
+    await engine.dispose()
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("SQLite", f"sqlite+aiosqlite:///{tmp}/bench.db", users, days)
+
+    pg_url = os.getenv("BENCH_POSTGRES_URL")
+    if pg_url:
+        await run("PostgreSQL", pg_url, users, days)
+    else:
+        print("\n(set BENCH_POSTGRES_URL to also benchmark PostgreSQL)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
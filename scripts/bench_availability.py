@@ -0,0 +1,98 @@
+"""
+Benchmark the sweep-line availability engine against a per-minute count.
+Usage: python scripts/bench_availability.py [repeats]
+
+For 1000, 5000 and 20000 random bookings (30-minute steps, up to 8 hours,
+some past midnight) builds the k-of-n windows for every player count both
+ways and checks that they agree. The per-minute baseline fills a counter
+for every booked minute and then scans the day once per player count.
+"""
+import os
+import random
+import sys
+import time
+from datetime import time as clock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot.utils.availability import MINUTES_PER_DAY, Availability, interval_minutes  # noqa: E402
+
+
+class _Booking:
+    __slots__ = ("time_from", "time_to")
+
+    def __init__(self, time_from: clock, time_to: clock):
+        self.time_from = time_from
+        self.time_to = time_to
+
+
+def random_bookings(count: int, rng: random.Random) -> list[_Booking]:
+    bookings = []
+    for _ in range(count):
+        start = rng.randrange(12 * 60, MINUTES_PER_DAY, 30)
+        end = (start + rng.randrange(30, 8 * 60 + 1, 30)) % MINUTES_PER_DAY
+        bookings.append(_Booking(clock(start // 60, start % 60), clock(end // 60, end % 60)))
+    return bookings
+
+
+def per_minute(bookings) -> dict[int, list[tuple[int, int]]]:
+    counts = [0] * (2 * MINUTES_PER_DAY + 1)
+    for booking in bookings:
+        start, end = interval_minutes(booking.time_from, booking.time_to)
+        for minute in range(start, end):
+            counts[minute] += 1
+    runs = {}
+    for k in range(1, max(counts) + 1):
+        found, start = [], None
+        for minute, count in enumerate(counts):
+            if count >= k and start is None:
+                start = minute
+            elif count < k and start is not None:
+                found.append((start, minute))
+                start = None
+        runs[k] = sorted(found)
+    return runs
+
+
+def sweep(bookings) -> dict[int, list[tuple[int, int]]]:
+    availability = Availability(bookings)
+    return {
+        k: sorted((w.start, w.end) for w in availability.windows(k))
+        for k in range(1, availability.max_players + 1)
+    }
+
+
+def timed(fn, bookings, repeats: int) -> tuple[float, object]:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn(bookings)
+    return (time.perf_counter() - started) / repeats, result
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rng = random.Random(25)
+
+    print(f"k-of-n windows for every player count ({repeats} runs each)")
+    for count in (1000, 5000, 20000):
+        bookings = random_bookings(count, rng)
+        old, old_windows = timed(per_minute, bookings, repeats)
+        new, new_windows = timed(sweep, bookings, repeats)
+        assert new_windows == old_windows, "results differ"
+
+        availability = Availability(bookings)
+        started = time.perf_counter()
+        best = availability.best(min_duration=60)
+        participants = availability.participants(best)
+        lookup = time.perf_counter() - started
+
+        print(
+            f"  {count:>6} bookings: per-minute {old * 1000:9.1f} ms"
+            f"  | sweep {new * 1000:7.1f} ms  ({old / new:5.1f}x)"
+            f"  | best+participants {lookup * 1000:5.2f} ms"
+            f"  ({best.players} players, {len(participants)} throughout)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark swear detection: legacy set intersection vs the compiled matcher.
+Usage: python scripts/bench_profanity.py [messages]
+
+Builds a synthetic chat corpus mixing ordinary words, dictionary swears,
+inflected and stretched spellings, Latin transliterations and look-alike
+letters, then reports throughput and how many messages each approach flags,
+split by what was planted: nothing, a dictionary word or a variant. Flags on
+"clean" messages are false positives.
+"""
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot.utils.profanity import SWEAR_WORDS, swear_matcher  # noqa: E402
+
+ORDINARY = (
+    "привіт як справи хто сьогодні грає пабг о восьмій я буду трохи пізніше "
+    "ну давай збираємось на карті ерангель дроп в школу знову вбили з кемперки "
+    "херсон сукня находка дебати похудіти команда вихідні субота неділя слот "
+    "ok lol gg wp rush b go go go her nah hue psycho "
+    "рахуй психує колебания хлебанул підряд"
+).split()
+
+VARIANTS = [
+    "сууука", "бляяять", "пиздюлі", "хуярити", "розпиздяй", "xуйня", "cука",
+    "khuynya", "pyzdets", "blyat", "suuuka", "підорасина", "наєбалово",
+]
+
+
+def make_corpus(count: int) -> list[tuple[str, str]]:
+    """``(kind, text)`` pairs; kind is what was planted in the message."""
+    rng = random.Random(7)
+    swears = sorted(SWEAR_WORDS)
+    corpus = []
+    for _ in range(count):
+        words = rng.choices(ORDINARY, k=rng.randint(2, 25))
+        roll = rng.random()
+        kind = "clean"
+        if roll < 0.15:
+            kind = "word"
+            words.insert(rng.randrange(len(words) + 1), rng.choice(swears))
+        elif roll < 0.25:
+            kind = "variant"
+            words.insert(rng.randrange(len(words) + 1), rng.choice(VARIANTS))
+        text = " ".join(words).capitalize() + rng.choice(["", "!", "?", "..."])
+        corpus.append((kind, text))
+    return corpus
+
+
+def legacy_has_swear(text: str) -> bool:
+    words = set(re.split(r"\W+", text.lower()))
+    return bool(words & SWEAR_WORDS)
+
+
+def bench(label: str, fn, corpus: list[tuple[str, str]]) -> Counter:
+    started = time.perf_counter()
+    flagged = Counter(kind for kind, text in corpus if fn(text))
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<22} {elapsed * 1000:8.1f} ms  "
+        f"({len(corpus) / elapsed:9.0f} msg/s)  flagged "
+        + "  ".join(f"{kind} {flagged[kind]}" for kind in ("clean", "word", "variant"))
+    )
+    return flagged
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = make_corpus(count)
+    planted = Counter(kind for kind, _ in corpus)
+    print(
+        f"== {count} synthetic messages: "
+        + ", ".join(f"{planted[kind]} {kind}" for kind in ("clean", "word", "variant"))
+        + " =="
+    )
+    bench("set intersection", legacy_has_swear, corpus)
+    bench("compiled matcher", swear_matcher.count, corpus)
+
+
+if __name__ == "__main__":
+    main()
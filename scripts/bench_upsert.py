@@ -0,0 +1,114 @@
+"""
+Benchmark activity upserts: one statement per message vs batched deltas.
+Usage: python scripts/bench_upsert.py [messages] [users]
+
+Runs against a temporary SQLite file and, if BENCH_POSTGRES_URL is set
+(postgresql+asyncpg://...), against that PostgreSQL database too. The
+PostgreSQL run drops and recreates all tables — point it at a scratch DB.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.database.models import Base, UserActivity  # noqa: E402
+from bot.database.repositories import UserActivityRepository  # noqa: E402
+from bot.services.activity_buffer import ActivityBuffer  # noqa: E402
+from bot.utils.message_features import MessageFeatures, length_bucket  # noqa: E402
+
+
+def make_messages(count: int, users: int) -> list[tuple]:
+    rng = random.Random(42)
+    today = date.today()
+    messages = []
+    for _ in range(count):
+        length = rng.randint(1, 300)
+        features = MessageFeatures(
+            length=length,
+            bucket=length_bucket(length),
+            is_question=rng.random() < 0.2,
+            swear_count=int(rng.random() < 0.1),
+        )
+        messages.append((rng.randrange(users), today, rng.randrange(24), features))
+    return messages
+
+
+async def reset(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def total_messages(sessionmaker) -> int:
+    async with sessionmaker() as db:
+        return (await db.execute(select(func.sum(UserActivity.message_count)))).scalar() or 0
+
+
+async def per_message(sessionmaker, messages) -> float:
+    started = time.perf_counter()
+    async with sessionmaker() as db:
+        repo = UserActivityRepository(db)
+        for user_id, day, hour, features in messages:
+            await repo.upsert_message(user_id, f"user{user_id}", day, hour, features)
+    return time.perf_counter() - started
+
+
+async def batched(sessionmaker, messages, batch: int) -> float:
+    async def write(rows):
+        async with sessionmaker() as db:
+            await UserActivityRepository(db).upsert_messages(rows)
+
+    buffer = ActivityBuffer(flush_interval=3600, max_messages=batch, writer=write)
+    started = time.perf_counter()
+    for i, (user_id, day, hour, features) in enumerate(messages, start=1):
+        buffer.record_message(user_id, f"user{user_id}", day, hour, features)
+        if i % batch == 0:
+            await buffer.flush()
+    await buffer.flush()
+    return time.perf_counter() - started
+
+
+async def run(label: str, url: str, messages):
+    engine = create_async_engine(url, echo=False)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"\n== {label} ({len(messages)} messages) ==")
+
+    await reset(engine)
+    elapsed = await per_message(sessionmaker, messages)
+    assert await total_messages(sessionmaker) == len(messages)
+    print(f"  per-message upsert:   {elapsed * 1000:9.1f} ms  ({len(messages) / elapsed:8.0f} msg/s)")
+
+    for batch in (50, 200, 1000):
+        await reset(engine)
+        elapsed = await batched(sessionmaker, messages, batch)
+        assert await total_messages(sessionmaker) == len(messages)
+        print(f"  batched every {batch:<5}: {elapsed * 1000:9.1f} ms  ({len(messages) / elapsed:8.0f} msg/s)")
+
+    await engine.dispose()
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    messages = make_messages(count, users)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("SQLite", f"sqlite+aiosqlite:///{tmp}/bench.db", messages)
+
+    pg_url = os.getenv("BENCH_POSTGRES_URL")
+    if pg_url:
+        await run("PostgreSQL", pg_url, messages)
+    else:
+        print("\n(set BENCH_POSTGRES_URL to also benchmark PostgreSQL)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Benchmark waitlist promotion on cancel: one UPDATE + commit per waitlisted
+booking vs a single set-based UPDATE.
+Usage: python scripts/bench_waitlist.py [cancels]
+
+For waitlists of 100, 300 and 1000 bookings, a confirmed player cancels
+``cancels`` times (default 10) and the next one re-books, so the waitlist
+keeps its length. Runs against a temporary SQLite file and, if
+BENCH_POSTGRES_URL is set, against that PostgreSQL database too (all tables
+are dropped and recreated — use a scratch DB). Both variants are checked to
+leave identical bookings.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, time as clock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, insert, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.database.models import Base, Booking, Game, Session  # noqa: E402
+from bot.database.repositories import BookingRepository  # noqa: E402
+
+MAX_SLOTS = 4
+
+
+async def seed(engine, sessionmaker, waitlist: int) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker() as db:
+        await db.execute(insert(Game), [{"id": 1, "name": "PUBG", "max_slots": MAX_SLOTS}])
+        await db.execute(insert(Session), [{
+            "id": 1, "game_id": 1, "chat_id": 1, "day": "saturday",
+            "week_start": date(2026, 3, 2), "status": "open",
+        }])
+        await db.execute(insert(Booking), [
+            {
+                "session_id": 1,
+                "user_id": position,
+                "username": f"user{position}",
+                "time_from": clock(18),
+                "time_to": clock(22),
+                "position": position,
+                "status": "confirmed" if position <= MAX_SLOTS else "waitlist",
+            }
+            for position in range(1, MAX_SLOTS + waitlist + 1)
+        ])
+        await db.commit()
+    return 1
+
+
+async def legacy_promote(db, session_id: int, freed_position: int):
+    """The pre-set-based cancel: load the waitlist, then one UPDATE + commit per row."""
+    result = await db.execute(
+        select(Booking)
+        .where(
+            Booking.session_id == session_id,
+            Booking.status == "waitlist",
+            Booking.position > MAX_SLOTS,
+        )
+        .order_by(Booking.position)
+    )
+    waitlist = list(result.scalars().all())
+    if not waitlist:
+        return
+    for i, booking in enumerate(waitlist):
+        position, status = (freed_position, "confirmed") if i == 0 else (MAX_SLOTS + i, "waitlist")
+        await db.execute(
+            update(Booking).where(Booking.id == booking.id).values(position=position, status=status)
+        )
+        await db.commit()
+
+
+async def set_based_promote(db, session_id: int, freed_position: int):
+    await BookingRepository(db).promote_waitlist(session_id, MAX_SLOTS, freed_position)
+    await db.commit()
+
+
+async def churn(sessionmaker, session_id: int, cancels: int, promote) -> float:
+    """Cancel the first confirmed booking and re-book its player at the end, ``cancels`` times."""
+    elapsed = 0.0
+    for _ in range(cancels):
+        async with sessionmaker() as db:
+            repo = BookingRepository(db)
+            first = (await repo.get_confirmed(session_id))[0]
+            last = await db.scalar(
+                select(func.max(Booking.position) + 1)
+                .where(Booking.session_id == session_id, Booking.status != "cancelled")
+            )
+            await repo.cancel_booking(first.id)
+
+            started = time.perf_counter()
+            await promote(db, session_id, first.position)
+            elapsed += time.perf_counter() - started
+
+            await repo.create(
+                session_id, first.user_id, first.username, first.time_from, first.time_to,
+                position=last, status="waitlist",
+            )
+            await db.commit()
+    return elapsed
+
+
+async def snapshot(sessionmaker, session_id: int) -> list[tuple]:
+    async with sessionmaker() as db:
+        result = await db.execute(
+            select(Booking.user_id, Booking.position, Booking.status)
+            .where(Booking.session_id == session_id, Booking.status != "cancelled")
+            .order_by(Booking.position)
+        )
+        return [tuple(row) for row in result]
+
+
+async def run(label: str, url: str, cancels: int):
+    engine = create_async_engine(url, echo=False)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"\n== {label} ({cancels} cancels per run) ==")
+
+    for waitlist in (100, 300, 1000):
+        session_id = await seed(engine, sessionmaker, waitlist)
+        old = await churn(sessionmaker, session_id, cancels, legacy_promote)
+        old_rows = await snapshot(sessionmaker, session_id)
+
+        session_id = await seed(engine, sessionmaker, waitlist)
+        new = await churn(sessionmaker, session_id, cancels, set_based_promote)
+        assert await snapshot(sessionmaker, session_id) == old_rows, "results differ"
+
+        print(
+            f"  waitlist {waitlist:>5}: per-row {old / cancels * 1000:8.2f} ms/cancel"
+            f"  | set-based {new / cancels * 1000:6.2f} ms/cancel  ({old / new:5.1f}x)"
+        )
+
+    await engine.dispose()
+
+
+async def main():
+    cancels = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("SQLite", f"sqlite+aiosqlite:///{tmp}/bench.db", cancels)
+
+    pg_url = os.getenv("BENCH_POSTGRES_URL")
+    if pg_url:
+        await run("PostgreSQL", pg_url, cancels)
+    else:
+        print("\n(set BENCH_POSTGRES_URL to also benchmark PostgreSQL)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
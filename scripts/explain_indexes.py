@@ -0,0 +1,236 @@
+"""
+Show query plans and timings of the hot queries without and with the
+indexes added by alembic revision 007.
+Usage: python scripts/explain_indexes.py [scale]
+
+Seeds realistic volumes (at scale 1: 30 chats × 3 years of weekly sessions,
+~8 bookings each, 150k booking_history rows, 400 users × 1 year of
+user_activity) in a temporary SQLite file and, if BENCH_POSTGRES_URL is set,
+in that PostgreSQL database too (all tables are dropped and recreated — use a
+scratch DB). Each query is explained and timed with the indexes dropped, then
+again after creating them and refreshing planner statistics.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import and_, insert, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.database.aggregates import user_totals  # noqa: E402
+from bot.database.models import (  # noqa: E402
+    Base,
+    Booking,
+    BookingHistory,
+    Game,
+    Session,
+    UserActivity,
+)
+from bot.utils.time_utils import get_week_start  # noqa: E402
+
+HOT_INDEXES = (
+    "ix_sessions_open_slot",
+    "ix_sessions_open_chat",
+    "ix_bookings_session_status_position",
+    "ix_bookings_session_active",
+    "ix_booking_history_user_id",
+    "ix_user_activity_date",
+)
+RUNS = 20
+BATCH = 5000
+
+
+def _indexes():
+    return [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name in HOT_INDEXES
+    ]
+
+
+async def _insert(db, model, rows: list[dict]):
+    for start in range(0, len(rows), BATCH):
+        await db.execute(insert(model), rows[start:start + BATCH])
+
+
+async def seed(sessionmaker, scale: int) -> dict:
+    rng = random.Random(14)
+    chats = 30 * scale
+    weeks = 156
+    users = 400 * scale
+    this_week = get_week_start()
+
+    async with sessionmaker() as db:
+        await _insert(db, Game, [{"id": 1, "name": "PUBG", "max_slots": 4}, {"id": 2, "name": "CS", "max_slots": 5}])
+
+        sessions = []
+        for chat in range(chats):
+            for week in range(weeks):
+                for day in ("saturday", "sunday"):
+                    sessions.append({
+                        "id": len(sessions) + 1,
+                        "game_id": 1 + (chat % 2),
+                        "chat_id": -1000 - chat,
+                        "day": day,
+                        "status": "open" if week == 0 else "closed",
+                        "week_start": this_week - timedelta(weeks=week),
+                    })
+        await _insert(db, Session, sessions)
+
+        bookings = []
+        for s in sessions:
+            for position in range(1, rng.randint(3, 12)):
+                bookings.append({
+                    "session_id": s["id"],
+                    "user_id": rng.randrange(users),
+                    "username": "player",
+                    "time_from": datetime(2000, 1, 1, 19).time(),
+                    "time_to": datetime(2000, 1, 1, 23).time(),
+                    "position": position,
+                    "status": rng.choice(("confirmed", "confirmed", "waitlist", "cancelled")),
+                })
+        await _insert(db, Booking, bookings)
+
+        history = [
+            {
+                "user_id": rng.randrange(users),
+                "username": "player",
+                "game": "PUBG",
+                "action": rng.choice(("booked", "cancelled", "played")),
+            }
+            for _ in range(150_000 * scale)
+        ]
+        await _insert(db, BookingHistory, history)
+
+        today = date.today()
+        activity = [
+            {"user_id": u, "date": today - timedelta(days=d), "message_count": rng.randint(0, 50)}
+            for u in range(users)
+            for d in range(365)
+            if rng.random() < 0.6
+        ]
+        await _insert(db, UserActivity, activity)
+        await db.commit()
+
+    return {
+        "sessions": len(sessions),
+        "bookings": len(bookings),
+        "booking_history": len(history),
+        "user_activity": len(activity),
+        "hot_session": sessions[0]["id"],
+        "this_week": this_week,
+    }
+
+
+def queries(info: dict) -> list[tuple[str, object]]:
+    """The statements the repositories issue on every command or callback."""
+    session_id = info["hot_session"]
+    return [
+        ("current session", select(Session).where(and_(
+            Session.game_id == 1, Session.chat_id == -1000, Session.day == "saturday",
+            Session.week_start == info["this_week"], Session.status == "open",
+        ))),
+        ("open sessions (chat)", select(Session).where(
+            and_(Session.chat_id == -1000, Session.status == "open")
+        )),
+        ("open sessions (all)", select(Session).where(Session.status == "open")),
+        ("session bookings", select(Booking).where(
+            and_(Booking.session_id == session_id, Booking.status != "cancelled")
+        ).order_by(Booking.position)),
+        ("waitlist", select(Booking).where(and_(
+            Booking.session_id == session_id, Booking.status == "waitlist", Booking.position > 4,
+        )).order_by(Booking.position)),
+        ("user booking history", select(BookingHistory).where(BookingHistory.user_id == 7)),
+        ("7-day activity", user_totals(
+            ("message_count",), since=date.today() - timedelta(days=7)
+        )),
+    ]
+
+
+async def explain(conn, stmt) -> list[str]:
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    if conn.dialect.name == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args)
+        return [row[-1] for row in result]
+    result = await conn.exec_driver_sql(f"EXPLAIN {compiled}", args)
+    return [row[0] for row in result]
+
+
+async def timed(sessionmaker, stmt) -> float:
+    async with sessionmaker() as db:
+        await db.execute(stmt)  # warm up
+        started = time.perf_counter()
+        for _ in range(RUNS):
+            (await db.execute(stmt)).all()
+        return (time.perf_counter() - started) / RUNS
+
+
+async def report(engine, sessionmaker, info: dict, label: str) -> dict[str, float]:
+    print(f"\n-- {label} --")
+    timings = {}
+    for name, stmt in queries(info):
+        async with engine.connect() as conn:
+            plan = await explain(conn, stmt)
+        timings[name] = await timed(sessionmaker, stmt)
+        print(f"  {name}: {timings[name] * 1000:.2f} ms")
+        for line in plan:
+            print(f"      {line}")
+    return timings
+
+
+async def run(label: str, url: str, scale: int):
+    engine = create_async_engine(url, echo=False)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for index in _indexes():
+            await conn.run_sync(index.drop)
+
+    info = await seed(sessionmaker, scale)
+    counts = ", ".join(f"{info[t]} {t}" for t in ("sessions", "bookings", "booking_history", "user_activity"))
+    print(f"\n== {label} ({counts}) ==")
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+    before = await report(engine, sessionmaker, info, "without hot-path indexes")
+
+    async with engine.begin() as conn:
+        for index in _indexes():
+            await conn.run_sync(index.create)
+        await conn.execute(text("ANALYZE"))
+    after = await report(engine, sessionmaker, info, "with hot-path indexes")
+
+    print("\n-- summary --")
+    for name in before:
+        print(
+            f"  {name:<22} {before[name] * 1000:8.2f} ms -> {after[name] * 1000:7.2f} ms"
+            f"  ({before[name] / after[name]:6.1f}x)"
+        )
+    await engine.dispose()
+
+
+async def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("SQLite", f"sqlite+aiosqlite:///{tmp}/bench.db", scale)
+
+    pg_url = os.getenv("BENCH_POSTGRES_URL")
+    if pg_url:
+        await run("PostgreSQL", pg_url, scale)
+    else:
+        print("\n(set BENCH_POSTGRES_URL to also benchmark PostgreSQL)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
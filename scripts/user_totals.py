@@ -0,0 +1,45 @@
+"""
+Maintain the user_totals rollup.
+Usage: python scripts/user_totals.py check|rebuild
+
+check    compare user_totals with the raw user_activity rows; exits with
+         status 1 and lists the differences if they disagree
+rebuild  recompute user_totals from user_activity (backfill / repair)
+
+Uses DATABASE_URL from the environment, like the bot itself.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot.database.rollup import check_user_totals, rebuild_user_totals  # noqa: E402
+from bot.database.session import async_session, engine  # noqa: E402
+
+
+async def main(command: str) -> int:
+    try:
+        async with async_session() as db:
+            if command == "rebuild":
+                users = await rebuild_user_totals(db)
+                print(f"Rebuilt user_totals for {users} users")
+                return 0
+
+            problems = await check_user_totals(db)
+            for p in problems[:50]:
+                print(f"  user {p['user_id']}: {p['column']} expected {p['expected']}, got {p['actual']}")
+            if problems:
+                print(f"{len(problems)} mismatches — run `python scripts/user_totals.py rebuild`")
+                return 1
+            print("user_totals is consistent with user_activity")
+            return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("check", "rebuild"):
+        print(__doc__.strip())
+        sys.exit(2)
+    sys.exit(asyncio.run(main(sys.argv[1])))
@@ -29,16 +29,37 @@ async def db_engine():
     await engine.dispose()
 
 
+@pytest.fixture
+def session_factory(db_engine):
+    """Session factory for code under test that opens its own sessions."""
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
 @pytest_asyncio.fixture
-async def db_session(db_engine):
+async def db_session(session_factory):
     """Create test database session."""
-    async_session = async_sessionmaker(
-        db_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with session_factory() as session:
         yield session
 
 
+@pytest.fixture
+def activity_row():
+    """Build one ``UserActivityRepository.upsert_messages`` delta row."""
+    def build(user_id: int, day: date, **deltas) -> dict:
+        return {
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "date": day,
+            "message_count": 1,
+            "total_chars": 10,
+            "bot_mentions": 0,
+            "bot_replies": 0,
+            "swear_count": 0,
+            **deltas,
+        }
+    return build
+
+
 @pytest_asyncio.fixture
 async def games(db_session: AsyncSession):
     """Create test games."""
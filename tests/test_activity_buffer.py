@@ -0,0 +1,213 @@
+"""Tests for the write-behind activity buffer."""
+import asyncio
+from datetime import date
+
+import pytest
+
+from bot.services.activity_buffer import ActivityBuffer
+from bot.utils.message_features import MessageFeatures, length_bucket
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class RecordingWriter:
+    """Collects flushed batches instead of writing them to a database."""
+
+    def __init__(self, fail_times: int = 0):
+        self.batches: list[list[dict]] = []
+        self.fail_times = fail_times
+        self.attempts = 0
+
+    async def __call__(self, rows: list[dict]):
+        self.attempts += 1
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("db is down")
+        self.batches.append(rows)
+
+
+DAY = date(2026, 2, 23)
+
+
+def _msg(length: int, **flags) -> MessageFeatures:
+    return MessageFeatures(length=length, bucket=length_bucket(length), **flags)
+
+
+class TestFolding:
+    """Tests for folding messages into per-user-day deltas."""
+
+    async def test_messages_fold_into_one_row_per_user_day(self):
+        """Test that repeated messages from one user become a single row."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        buffer.record_message(1, "alice", DAY, hour=18, features=_msg(10))
+        buffer.record_message(1, "alice", DAY, hour=19, features=_msg(30, bot_mention=True))
+        buffer.record_message(1, None, DAY, hour=18, features=_msg(5, swear_count=2))
+        buffer.record_message(2, "bob", DAY, hour=21, features=_msg(7, bot_reply=True))
+
+        assert await buffer.flush() == 2
+        rows = {row["user_id"]: row for row in writer.batches[0]}
+
+        assert rows[1]["message_count"] == 3
+        assert rows[1]["total_chars"] == 45
+        assert rows[1]["short_count"] == 2
+        assert rows[1]["medium_count"] == 1
+        assert rows[1]["bot_mentions"] == 1
+        assert rows[1]["swear_count"] == 2
+        assert rows[1]["active_hours_mask"] == (1 << 18) | (1 << 19)
+        assert rows[1]["username"] == "alice"
+        assert rows[2]["bot_replies"] == 1
+
+    async def test_separate_days_are_separate_rows(self):
+        """Test that the same user on two days produces two rows."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        buffer.record_message(1, "alice", DAY, hour=23, features=_msg(1))
+        buffer.record_message(1, "alice", date(2026, 2, 24), hour=0, features=_msg(1))
+
+        assert await buffer.flush() == 2
+
+    async def test_media_only_message_has_no_length_bucket(self):
+        """Test that a bare sticker is a message and media, not short text."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        buffer.record_message(1, "alice", DAY, hour=18, features=MessageFeatures.of_text("", has_media=True))
+        await buffer.flush()
+
+        row = writer.batches[0][0]
+        assert row["message_count"] == 1
+        assert row["media_count"] == 1
+        assert row["short_count"] + row["medium_count"] + row["long_count"] == 0
+
+    async def test_mom_insult_is_buffered(self):
+        """Test that mom insults are written with the next flush."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        buffer.record_mom_insult(1, DAY)
+        await buffer.flush()
+
+        assert writer.batches[0][0]["mom_insult_count"] == 1
+        assert writer.batches[0][0]["message_count"] == 0
+
+    async def test_reaction_burst_coalesces(self):
+        """Test that many reactions on one author become a single row."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        for _ in range(10):
+            buffer.record_reaction(1, DAY, fire=1)
+        buffer.record_reaction(1, DAY, heart=1)
+
+        assert await buffer.flush() == 1
+        row = writer.batches[0][0]
+        assert row["fire_reactions"] == 10
+        assert row["heart_reactions"] == 1
+        assert row["reactions_received"] == 11
+        assert row["message_count"] == 0
+
+    async def test_flush_empty_buffer_is_noop(self):
+        """Test that flushing with nothing pending does not call the writer."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        assert await buffer.flush() == 0
+        assert writer.batches == []
+
+
+class TestFlushing:
+    """Tests for flush triggers, retries and shutdown."""
+
+    async def test_failed_flush_is_retried(self):
+        """Test that a failed batch is merged back and written next time."""
+        writer = RecordingWriter(fail_times=1)
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+
+        buffer.record_message(1, "alice", DAY, hour=18, features=_msg(10))
+        assert await buffer.flush() == 0
+        assert buffer.pending_messages == 1
+
+        buffer.record_message(1, "alice", DAY, hour=20, features=_msg(20))
+        assert await buffer.flush() == 1
+
+        row = writer.batches[0][0]
+        assert row["message_count"] == 2
+        assert row["total_chars"] == 30
+        assert row["active_hours_mask"] == (1 << 18) | (1 << 20)
+        assert buffer.pending_messages == 0
+
+    async def test_failed_flush_backs_off(self):
+        """Test that messages arriving after a failure do not retry before the interval."""
+        writer = RecordingWriter(fail_times=1)
+        buffer = ActivityBuffer(flush_interval=0.3, max_messages=1, writer=writer)
+        buffer.start()
+        try:
+            buffer.record_message(1, "alice", DAY, hour=12, features=_msg(1))
+            for _ in range(50):
+                if writer.attempts:
+                    break
+                await asyncio.sleep(0.01)
+            for _ in range(10):
+                buffer.record_message(1, "alice", DAY, hour=12, features=_msg(1))
+                await asyncio.sleep(0.01)
+            assert writer.attempts == 1
+
+            for _ in range(100):
+                if writer.batches:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await buffer.stop()
+
+        assert writer.attempts == 2
+        assert writer.batches[0][0]["message_count"] == 11
+
+    async def test_retained_rows_are_capped(self, caplog):
+        """Test that an outage keeps only the newest max_rows deltas and logs the rest."""
+        writer = RecordingWriter(fail_times=1)
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer, max_rows=2)
+
+        for offset in range(3):
+            day = date(2026, 2, 20 + offset)
+            buffer.record_message(1, "alice", day, hour=12, features=_msg(1))
+            buffer.record_message(1, "alice", day, hour=13, features=_msg(1))
+        assert await buffer.flush() == 0
+
+        assert buffer.pending_messages == 4
+        assert "dropped 1 rows (2 messages" in caplog.text
+
+        assert await buffer.flush() == 2
+        assert sorted(row["date"] for row in writer.batches[0]) == [date(2026, 2, 21), date(2026, 2, 22)]
+
+    async def test_message_threshold_triggers_flush(self):
+        """Test that reaching max_messages flushes before the interval."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=3, writer=writer)
+        buffer.start()
+        try:
+            for _ in range(3):
+                buffer.record_message(1, "alice", DAY, hour=12, features=_msg(1))
+            for _ in range(50):
+                if writer.batches:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await buffer.stop()
+
+        assert writer.batches[0][0]["message_count"] == 3
+
+    async def test_stop_flushes_pending(self):
+        """Test that shutdown writes whatever is still buffered."""
+        writer = RecordingWriter()
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=writer)
+        buffer.start()
+
+        buffer.record_message(1, "alice", DAY, hour=12, features=_msg(1))
+        await buffer.stop()
+
+        assert sum(len(batch) for batch in writer.batches) == 1
+        assert buffer.pending_messages == 0
@@ -0,0 +1,166 @@
+"""Tests for the user activity repository on SQLite."""
+import pytest
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from bot.database.models import UserActivity
+from bot.database.repositories import UserActivityRepository
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestUpsertMessages:
+    """Tests for the batched activity upsert."""
+
+    async def test_insert_new_rows(self, db_session, activity_row):
+        """Test that a batch creates one row per user-day."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([
+            activity_row(1, today), activity_row(2, today), activity_row(1, today - timedelta(days=1)),
+        ])
+
+        result = await db_session.execute(select(UserActivity))
+        assert len(result.scalars().all()) == 3
+
+    async def test_conflict_adds_deltas(self, db_session, activity_row):
+        """Test that a second batch increments counters instead of duplicating rows."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([activity_row(1, today, message_count=2, total_chars=50, swear_count=1)])
+        await repo.upsert_messages([
+            activity_row(1, today, message_count=3, total_chars=5, bot_mentions=2, mom_insult_count=1),
+        ])
+
+        result = await db_session.execute(select(UserActivity))
+        rows = result.scalars().all()
+        assert len(rows) == 1
+        await db_session.refresh(rows[0])
+        assert rows[0].message_count == 5
+        assert rows[0].total_chars == 55
+        assert rows[0].swear_count == 1
+        assert rows[0].bot_mentions == 2
+        assert rows[0].mom_insult_count == 1
+
+    async def test_conflict_merges_active_hours(self, db_session, activity_row):
+        """Test that hour masks are OR-ed together."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([activity_row(1, today, active_hours_mask=(1 << 9) | (1 << 18))])
+        await repo.upsert_messages([activity_row(1, today, active_hours_mask=(1 << 18) | (1 << 23))])
+
+        stats = await repo.get_user_week_stats(1)
+        assert stats["active_hours"] == [9, 18, 23]
+
+    async def test_missing_username_keeps_stored_one(self, db_session, activity_row):
+        """Test that a delta without a username does not erase the stored one."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([activity_row(1, today, username="alice")])
+        await repo.upsert_messages([activity_row(1, today, username=None)])
+
+        stats = await repo.get_user_week_stats(1)
+        assert stats["username"] == "alice"
+
+
+def _reactions(activity_row, user_id: int, day: date, fire: int = 0, heart: int = 0) -> dict:
+    """A reaction-only delta, as the activity buffer flushes it."""
+    return activity_row(
+        user_id, day, username=None, message_count=0, total_chars=0,
+        fire_reactions=fire, heart_reactions=heart, reactions_received=fire + heart,
+    )
+
+
+class TestReactions:
+    """Tests for atomic reaction counters."""
+
+    async def test_reaction_creates_missing_row(self, db_session, activity_row):
+        """Test that a reaction on a day without messages is not dropped."""
+        repo = UserActivityRepository(db_session)
+
+        await repo.upsert_messages([_reactions(activity_row, 1, date.today(), fire=1)])
+        await repo.upsert_messages([_reactions(activity_row, 1, date.today(), fire=1, heart=1)])
+
+        total = await repo.get_user_total_stats(1)
+        assert total["fire_reactions"] == 2
+        assert total["heart_reactions"] == 1
+        assert total["message_count"] == 0
+
+    async def test_reaction_only_day_is_not_active(self, db_session, activity_row):
+        """Test that active_days counts only days with messages."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([activity_row(1, today - timedelta(days=1), username="alice")])
+        await repo.upsert_messages([_reactions(activity_row, 1, today, heart=1)])
+
+        stats = await repo.get_user_week_stats(1)
+        assert stats["active_days"] == 1
+        assert stats["reactions_received"] == 1
+        assert stats["username"] == "alice"
+
+
+class TestAggregates:
+    """Tests for the GROUP BY per-user aggregates."""
+
+    async def test_week_stats_grouped_per_user(self, db_session, activity_row):
+        """Test sums, active days, ordering and window filtering."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+        await repo.upsert_messages([
+            activity_row(1, today, message_count=2, question_count=1),
+            activity_row(1, today - timedelta(days=1), message_count=3),
+            activity_row(1, today - timedelta(days=30), message_count=100),
+            activity_row(2, today, message_count=9, swear_count=4),
+        ])
+        await repo.upsert_messages([_reactions(activity_row, 1, today - timedelta(days=2), fire=1)])
+
+        stats = await repo.get_all_week_stats(days=7)
+
+        assert [s["user_id"] for s in stats] == [2, 1]
+        alice = stats[1]
+        assert alice["message_count"] == 5
+        assert alice["question_count"] == 1
+        assert alice["reactions_received"] == 1
+        assert alice["active_days"] == 2
+        assert alice["username"] == "user1"
+        assert stats[0]["swear_count"] == 4
+
+    async def test_username_comes_from_latest_row(self, db_session, activity_row):
+        """Test that a renamed user is shown under the newest username."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+        await repo.upsert_messages([
+            activity_row(1, today - timedelta(days=2), username="old_name"),
+            activity_row(1, today - timedelta(days=1), username="new_name"),
+            activity_row(1, today, username=None),
+        ])
+
+        totals = await repo.get_all_users_total_stats()
+        assert totals[0]["username"] == "new_name"
+        assert totals[0]["message_count"] == 3
+
+    async def test_top_users_limit(self, db_session, activity_row):
+        """Test that the limit is applied after sorting by messages."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+        await repo.upsert_messages([activity_row(uid, today, message_count=uid) for uid in range(1, 6)])
+
+        top = await repo.get_top_users(days=7, limit=2)
+        assert [u["user_id"] for u in top] == [5, 4]
+        assert set(top[0]) == {
+            "user_id", "username", "message_count", "reactions_received",
+            "question_count", "mom_insult_count",
+        }
+
+    async def test_user_total_stats_without_rows(self, db_session):
+        """Test that an unknown user gets zeros rather than NULLs."""
+        total = await UserActivityRepository(db_session).get_user_total_stats(404)
+        assert total["message_count"] == 0
+        assert total["heart_reactions"] == 0
@@ -0,0 +1,148 @@
+"""Tests for the materialized rolling activity windows."""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import desc, select
+
+from bot.database.aggregates import user_totals
+from bot.database.models import ActivityWindow
+from bot.database.repositories import UserActivityRepository
+from bot.database.windows import WINDOWS, rebuild_windows, roll_windows, window_stats
+from bot.utils import time_utils
+
+
+pytestmark = pytest.mark.asyncio
+
+COLUMNS = ("message_count", "total_chars", "swear_count", "fire_reactions")
+
+
+async def _window(db_session, days: int) -> list[dict]:
+    result = await db_session.execute(
+        window_stats(days, COLUMNS, with_active_days=True).order_by(desc("message_count"), "user_id")
+    )
+    return [dict(row._mapping) for row in result]
+
+
+async def _range(db_session, days: int, today: date) -> list[dict]:
+    """The same stats recomputed from the daily rows."""
+    query = user_totals(COLUMNS, since=today - timedelta(days=days), with_active_days=True)
+    result = await db_session.execute(query.order_by(desc("message_count"), "user_id"))
+    return [dict(row._mapping) for row in result]
+
+
+async def _seed(db_session, activity_row):
+    repo = UserActivityRepository(db_session)
+    today = date.today()
+    await repo.upsert_messages([
+        activity_row(1, today, message_count=5, swear_count=2),
+        activity_row(1, today - timedelta(days=3), message_count=2),
+        activity_row(1, today - timedelta(days=7), message_count=4),
+        activity_row(2, today - timedelta(days=20), message_count=9, total_chars=900),
+        activity_row(3, today - timedelta(days=40), message_count=50),
+    ])
+    # Same days again: counters grow, active days must not
+    await repo.upsert_messages([activity_row(1, today), activity_row(2, today - timedelta(days=20))])
+    # Reaction-only day: counted, but not an active day
+    await repo.upsert_messages([
+        activity_row(
+            1, today - timedelta(days=1), message_count=0, total_chars=0,
+            fire_reactions=3, reactions_received=3,
+        ),
+    ])
+
+
+class TestIngest:
+    """Tests for keeping the windows current from the activity upsert."""
+
+    async def test_windows_match_daily_rows(self, db_session, activity_row):
+        """Test that every window equals a GROUP BY over its date range."""
+        await _seed(db_session, activity_row)
+        for days in WINDOWS:
+            assert await _window(db_session, days) == await _range(db_session, days, date.today())
+
+        (week,) = await _window(db_session, 7)
+        assert week["message_count"] == 12
+        assert week["active_days"] == 3
+        assert week["fire_reactions"] == 3
+
+    async def test_user_week_stats(self, db_session, activity_row):
+        """Test the single-row read behind /stat."""
+        await _seed(db_session, activity_row)
+
+        stats = await UserActivityRepository(db_session).get_user_week_stats(1)
+        assert stats["username"] == "user1"
+        assert stats["message_count"] == 12
+        assert stats["swear_count"] == 2
+        assert stats["active_days"] == 3
+
+        empty = await UserActivityRepository(db_session).get_user_week_stats(99)
+        assert empty["message_count"] == 0
+        assert empty["active_hours"] == []
+
+
+class TestRoll:
+    """Tests for the nightly job that moves the windows forward."""
+
+    async def test_roll_subtracts_departed_days(self, db_session, activity_row):
+        """Test windows a few days later against the recomputed ranges."""
+        await _seed(db_session, activity_row)
+        later = date.today() + timedelta(days=4)
+
+        await roll_windows(db_session, today=later)
+        for days in WINDOWS:
+            assert await _window(db_session, days) == await _range(db_session, days, later)
+
+        # Running again the same day changes nothing
+        assert await roll_windows(db_session, today=later) == 0
+
+    async def test_default_day_is_in_the_configured_timezone(self, db_session, activity_row, monkeypatch):
+        """Test that the 00:01 roll sees the new local day, whatever the server clock says."""
+        await _seed(db_session, activity_row)
+        later = date.today() + timedelta(days=4)
+        monkeypatch.setattr(
+            time_utils, "now", lambda: datetime.combine(later, time(0, 1), time_utils.get_timezone())
+        )
+
+        assert await roll_windows(db_session) > 0
+        for days in WINDOWS:
+            assert await _window(db_session, days) == await _range(db_session, days, later)
+
+    async def test_empty_windows_are_removed(self, db_session, activity_row):
+        """Test that users with nothing left in a window drop out of it."""
+        await _seed(db_session, activity_row)
+        await roll_windows(db_session, today=date.today() + timedelta(days=15))
+
+        assert await _window(db_session, 7) == []
+        assert [u["user_id"] for u in await _window(db_session, 30)] == [1]
+
+    async def test_active_hours_follow_the_window(self, db_session, activity_row):
+        """Test that hours from departed days leave the mask."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+        await repo.upsert_messages([
+            activity_row(1, today - timedelta(days=7), active_hours_mask=1 << 3),
+            activity_row(1, today, active_hours_mask=1 << 20),
+        ])
+        assert (await repo.get_user_week_stats(1))["active_hours"] == [3, 20]
+
+        await roll_windows(db_session, today=today + timedelta(days=1))
+        window = (
+            await db_session.execute(
+                select(ActivityWindow).where(ActivityWindow.days == 7, ActivityWindow.user_id == 1)
+            )
+        ).scalar_one()
+        await db_session.refresh(window)
+        assert window.active_hours_mask == 1 << 20
+
+
+class TestRebuild:
+    """Tests for rebuilding the windows from the daily rows."""
+
+    async def test_rebuild_matches_incremental(self, db_session, activity_row):
+        """Test that a rebuild reproduces the incrementally kept rows."""
+        await _seed(db_session, activity_row)
+        live = {days: await _window(db_session, days) for days in WINDOWS}
+
+        assert await rebuild_windows(db_session) == 3
+        for days in WINDOWS:
+            assert await _window(db_session, days) == live[days]
@@ -0,0 +1,170 @@
+"""Tests for the versioned analytics result cache."""
+from datetime import date
+
+import pytest
+
+from bot.database.repositories import (
+    ACTIVITY_GENERATION,
+    DataGenerationRepository,
+    UserActivityRepository,
+)
+from bot.services.activity_buffer import ActivityBuffer, _write_rows
+from bot.services.analytics_cache import AnalyticsCache, analytics_cache
+from bot.utils.message_features import MessageFeatures, length_bucket
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class Counter:
+    """Async compute function that counts its calls."""
+
+    def __init__(self, value="result"):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestAnalyticsCache:
+    """Tests for generation-tagged entries."""
+
+    async def test_repeated_query_is_computed_once(self):
+        """Test that an unchanged generation serves the cached value."""
+        cache = AnalyticsCache()
+        compute = Counter()
+
+        for _ in range(5):
+            assert await cache.get_or_compute(("ranking",), compute) == "result"
+
+        assert compute.calls == 1
+        assert cache.hits == 4
+        assert cache.misses == 1
+
+    async def test_any_write_invalidates_global_entries(self):
+        """Test that a bump for any user recomputes all-user results."""
+        cache = AnalyticsCache()
+        compute = Counter()
+
+        await cache.get_or_compute(("ranking",), compute)
+        cache.bump([42])
+        await cache.get_or_compute(("ranking",), compute)
+
+        assert compute.calls == 2
+
+    async def test_user_entries_survive_other_users_writes(self):
+        """Test that per-user results only go stale on that user's writes."""
+        cache = AnalyticsCache()
+        compute = Counter()
+
+        await cache.get_or_compute(("stat", 1), compute, user_id=1)
+        cache.bump([2])
+        await cache.get_or_compute(("stat", 1), compute, user_id=1)
+        assert compute.calls == 1
+
+        cache.bump([1])
+        await cache.get_or_compute(("stat", 1), compute, user_id=1)
+        assert compute.calls == 2
+
+    async def test_write_during_compute_leaves_entry_stale(self):
+        """Test that a result computed across a write is not served afterwards."""
+        cache = AnalyticsCache()
+
+        async def racing():
+            cache.bump([1])
+            return "old"
+
+        await cache.get_or_compute(("ranking",), racing)
+
+        assert cache.get(("ranking",)) is None
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        """Test that capacity bounds the entries and counts evictions."""
+        cache = AnalyticsCache(capacity=2)
+        await cache.get_or_compute("a", Counter("a"))
+        await cache.get_or_compute("b", Counter("b"))
+        cache.get("a")
+        await cache.get_or_compute("c", Counter("c"))
+
+        assert cache.get("a") == "a"
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
+
+    async def test_sync_adopts_external_generation(self):
+        """Test that a changed stored generation invalidates, an equal one does not."""
+        cache = AnalyticsCache()
+        compute = Counter()
+
+        cache.sync(3)
+        await cache.get_or_compute(("leaderboard",), compute)
+        cache.sync(3)
+        await cache.get_or_compute(("leaderboard",), compute)
+        cache.sync(4)
+        await cache.get_or_compute(("leaderboard",), compute)
+
+        assert compute.calls == 2
+
+    async def test_clear_drops_entries(self):
+        """Test that clear forces recomputation without touching generations."""
+        cache = AnalyticsCache()
+        compute = Counter()
+
+        await cache.get_or_compute(("top", date.today()), compute)
+        cache.clear()
+        await cache.get_or_compute(("top", date.today()), compute)
+
+        assert compute.calls == 2
+        assert cache.generation() == 0
+
+
+class TestWriteInvalidation:
+    """Tests for the writers that bump generations."""
+
+    async def test_buffer_flush_bumps_flushed_users(self):
+        """Test that a successful flush advances the generations it touched."""
+        async def writer(rows):
+            pass
+
+        buffer = ActivityBuffer(flush_interval=60, max_messages=100, writer=writer)
+        before_user = analytics_cache.generation(501)
+        before_other = analytics_cache.generation(502)
+        before_global = analytics_cache.generation()
+
+        features = MessageFeatures(length=5, bucket=length_bucket(5))
+        buffer.record_message(501, "alice", date.today(), 12, features)
+        buffer.record_reaction(501, date.today(), fire=1)
+        await buffer.flush()
+
+        assert analytics_cache.generation(501) == before_user + 1
+        assert analytics_cache.generation(502) == before_other
+        assert analytics_cache.generation() == before_global + 1
+
+    async def test_failed_flush_keeps_generations(self):
+        """Test that nothing is invalidated when the write did not land."""
+        async def writer(rows):
+            raise RuntimeError("db is down")
+
+        buffer = ActivityBuffer(flush_interval=60, max_messages=100, writer=writer)
+        before = analytics_cache.generation(503)
+        buffer.record_reaction(503, date.today(), heart=1)
+        await buffer.flush()
+
+        assert analytics_cache.generation(503) == before
+
+    async def test_flush_bumps_stored_generation_once(self, db_session, session_factory, activity_row):
+        """Test that each flushed batch advances data_generations once, not per upsert."""
+        generations = DataGenerationRepository(db_session)
+        assert await generations.get(ACTIVITY_GENERATION) == 0
+
+        await UserActivityRepository(db_session).upsert_messages([activity_row(1, date.today())])
+        assert await generations.get(ACTIVITY_GENERATION) == 0
+
+        for _ in range(2):
+            await _write_rows(
+                [activity_row(1, date.today()), activity_row(2, date.today())],
+                session_factory=session_factory,
+            )
+
+        assert await generations.get(ACTIVITY_GENERATION) == 2
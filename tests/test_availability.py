@@ -0,0 +1,231 @@
+"""Tests for the sweep-line availability engine."""
+import random
+from datetime import date, time
+
+import pytest
+
+from bot.services.booking import BookingService
+from bot.services.game_catalog import GameSnapshot
+from bot.services.session_cache import BookingSnapshot, SessionSnapshot
+from bot.utils.availability import (
+    MINUTES_PER_DAY,
+    Availability,
+    Window,
+    interval_minutes,
+)
+from bot.utils.time_utils import calculate_optimal_time
+
+
+class MockBooking:
+    def __init__(self, time_from, time_to, username="user", status="confirmed"):
+        self.time_from = time_from
+        self.time_to = time_to
+        self.username = username
+        self.status = status
+
+
+def _brute_force(intervals: list[tuple[int, int]]) -> dict[int, list[tuple[int, int]]]:
+    """Maximal runs of >= k players from a per-minute count."""
+    counts = [0] * (2 * MINUTES_PER_DAY + 1)
+    for start, end in intervals:
+        for minute in range(start, end):
+            counts[minute] += 1
+    runs = {}
+    for k in range(1, len(intervals) + 1):
+        found, start = [], None
+        for minute, count in enumerate(counts):
+            if count >= k and start is None:
+                start = minute
+            elif count < k and start is not None:
+                found.append((start, minute))
+                start = None
+        if found:
+            runs[k] = sorted(found)
+    return runs
+
+
+class TestIntervals:
+    """Tests for converting booking times to minutes."""
+
+    @pytest.mark.parametrize(
+        "time_from,time_to,expected",
+        [
+            (time(18), time(22), (1080, 1320)),
+            (time(22), time(0), (1320, 1440)),
+            (time(23), time(1, 30), (1380, 1530)),
+            (time(0), time(2), (0, 120)),
+        ],
+    )
+    def test_midnight(self, time_from, time_to, expected):
+        """Test that 00:00 is midnight and earlier ends move to the next day."""
+        assert interval_minutes(time_from, time_to) == expected
+
+
+class TestAvailability:
+    """Tests for k-of-n windows, ranking and participants."""
+
+    def test_windows_for_every_player_count(self):
+        """Test that one narrow booking no longer hides the others' overlap."""
+        availability = Availability([
+            MockBooking(time(18), time(23)),
+            MockBooking(time(19), time(23)),
+            MockBooking(time(18), time(22)),
+            MockBooking(time(16), time(17)),
+        ])
+
+        assert availability.max_players == 3
+        assert availability.common() is None
+        assert availability.windows(3) == (Window(1140, 1320, 3),)
+        assert availability.windows(2) == (Window(1080, 1380, 2),)
+        assert availability.windows(1) == (Window(1080, 1380, 1), Window(960, 1020, 1))
+        assert availability.windows(4) == ()
+
+    def test_ranking_longest_then_earliest(self):
+        """Test the order of several windows for the same count."""
+        availability = Availability([
+            MockBooking(time(12), time(13)),
+            MockBooking(time(12), time(13)),
+            MockBooking(time(15), time(16)),
+            MockBooking(time(15), time(16)),
+            MockBooking(time(18), time(21)),
+            MockBooking(time(19), time(22)),
+        ])
+
+        assert [(w.time_from, w.time_to) for w in availability.windows(2)] == [
+            (time(19), time(21)),
+            (time(12), time(13)),
+            (time(15), time(16)),
+        ]
+
+    def test_best_with_minimum_duration(self):
+        """Test that a short full overlap gives way to a longer smaller group."""
+        availability = Availability([
+            MockBooking(time(18), time(23)),
+            MockBooking(time(18), time(23)),
+            MockBooking(time(22, 30), time(0)),
+        ])
+
+        assert availability.best().players == 3
+        best = availability.best(min_duration=60)
+        assert (best.players, best.time_from, best.time_to) == (2, time(18), time(23))
+        assert availability.best(min_duration=600) is None
+
+    def test_window_across_midnight(self):
+        """Test overlap that continues past 00:00."""
+        availability = Availability([
+            MockBooking(time(22), time(1)),
+            MockBooking(time(23), time(2)),
+        ])
+
+        common = availability.common()
+        assert (common.time_from, common.time_to, common.duration) == (time(23), time(1), 120)
+
+    def test_back_to_back_bookings_do_not_overlap(self):
+        """Test that an end and a start at the same minute do not overlap."""
+        availability = Availability([
+            MockBooking(time(18), time(19)),
+            MockBooking(time(19), time(20)),
+        ])
+
+        assert availability.max_players == 1
+        assert availability.windows(1) == (Window(1080, 1200, 1),)
+
+    def test_participants(self):
+        """Test who is free for a whole window, including hand-overs."""
+        a = MockBooking(time(18), time(23), "a")
+        b = MockBooking(time(18), time(20), "b")
+        c = MockBooking(time(20), time(23), "c")
+        availability = Availability([a, b, c])
+
+        (window,) = availability.windows(2)
+        assert (window.start, window.end) == (1080, 1380)
+        assert availability.participants(window) == (a,)
+        assert availability.participants(Window(1080, 1200, 2)) == (a, b)
+
+    def test_matches_brute_force(self):
+        """Test random bookings against a per-minute count."""
+        rng = random.Random(25)
+        for _ in range(50):
+            bookings = []
+            for _ in range(rng.randint(1, 12)):
+                start = rng.randrange(0, MINUTES_PER_DAY, 30)
+                length = rng.randrange(30, 8 * 60, 30)
+                end = (start + length) % MINUTES_PER_DAY
+                bookings.append(MockBooking(time(start // 60, start % 60), time(end // 60, end % 60)))
+            availability = Availability(bookings)
+
+            expected = _brute_force([interval_minutes(b.time_from, b.time_to) for b in bookings])
+            found = {
+                k: sorted((w.start, w.end) for w in availability.windows(k))
+                for k in range(1, len(bookings) + 1)
+                if availability.windows(k)
+            }
+            assert found == expected
+
+    def test_empty(self):
+        """Test that no bookings give no windows."""
+        availability = Availability([])
+
+        assert availability.max_players == 0
+        assert availability.common() is None
+        assert availability.best() is None
+        assert availability.play_window() is None
+
+    def test_optimal_time_across_midnight(self):
+        """Test calculate_optimal_time on bookings that end after midnight."""
+        bookings = [MockBooking(time(21), time(0)), MockBooking(time(23), time(1))]
+
+        assert calculate_optimal_time(bookings) == (time(23), time(0))
+
+
+class TestWeeklyMessage:
+    """Tests for the play window shown in the weekly message."""
+
+    @staticmethod
+    def _session(*bookings: tuple[str, time, time]) -> SessionSnapshot:
+        return SessionSnapshot(
+            id=1,
+            game=GameSnapshot(id=1, name="PUBG", max_slots=4),
+            chat_id=1,
+            day="saturday",
+            week_start=date(2026, 3, 2),
+            status="open",
+            message_id=None,
+            bookings=tuple(
+                BookingSnapshot(
+                    id=i, user_id=i, username=name, time_from=start, time_to=end,
+                    position=i, status="confirmed",
+                )
+                for i, (name, start, end) in enumerate(bookings, start=1)
+            ),
+        )
+
+    def test_everyone_overlaps(self):
+        """Test the plain common time."""
+        session = self._session(("a", time(18), time(22)), ("b", time(19), time(23)))
+
+        text = BookingService(None).format_weekly_message(session, None)
+
+        assert "⏰ Час: 19:00-22:00\n" in text + "\n"
+
+    def test_best_group_when_not_everyone_overlaps(self):
+        """Test that three of four overlapping is shown with their names."""
+        session = self._session(
+            ("a", time(18), time(23)),
+            ("b", time(19), time(23)),
+            ("c", time(18), time(22)),
+            ("d", time(16), time(17)),
+        )
+
+        text = BookingService(None).format_weekly_message(session, None)
+
+        assert "⏰ Час: 19:00-22:00 (3 з 4: a, b, c)" in text
+        assert "Немає спільного часу" not in text
+
+    def test_no_two_players_overlap(self):
+        """Test that a single player's time is not proposed."""
+        session = self._session(("a", time(18), time(19)), ("b", time(20), time(21)))
+
+        text = BookingService(None).format_weekly_message(session, None)
+
+        assert "⚠️ Немає спільного часу" in text
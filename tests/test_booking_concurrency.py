@@ -0,0 +1,109 @@
+"""Concurrency stress tests for the booking unit of work."""
+import asyncio
+from datetime import date, time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.database.models import Base, Booking, BookingCounter, BookingHistory, Game, Session
+from bot.services.booking import BookingService
+
+
+pytestmark = pytest.mark.asyncio
+
+PARALLEL = 300
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    """A file database: every session gets its own connection, as in production."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/booking.db", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_id(sessions) -> int:
+    async with sessions() as db:
+        game = Game(name="PUBG", max_slots=4)
+        db.add(game)
+        await db.flush()
+        session = Session(
+            game_id=game.id, chat_id=1, day="saturday", week_start=date(2026, 3, 2), status="open"
+        )
+        db.add(session)
+        await db.commit()
+        return session.id
+
+
+async def _press(sessions, session_id: int, action: str, user_id: int):
+    """One button press: its own DB session, like a separate update handler."""
+    async with sessions() as db:
+        service = BookingService(db)
+        session = await service.get_session_by_id(session_id)
+        if action == "book":
+            return await service.book(session, user_id, f"user{user_id}", time(18), time(22))
+        return await service.cancel(session, user_id, f"user{user_id}")
+
+
+async def _active(sessions, session_id: int) -> list[Booking]:
+    async with sessions() as db:
+        result = await db.execute(
+            select(Booking)
+            .where(Booking.session_id == session_id, Booking.status != "cancelled")
+            .order_by(Booking.position)
+        )
+        return list(result.scalars())
+
+
+class TestParallelBooking:
+    """Tests that simultaneous presses cannot overbook a session."""
+
+    async def test_parallel_bookings_never_exceed_max_slots(self, sessions, session_id):
+        """Test hundreds of concurrent bookings against one 4-slot session."""
+        results = await asyncio.gather(
+            *(_press(sessions, session_id, "book", 1000 + i) for i in range(PARALLEL))
+        )
+
+        assert all(r.success for r in results)
+        assert sum(not r.is_waitlist for r in results) == 4
+
+        active = await _active(sessions, session_id)
+        assert len([b for b in active if b.status == "confirmed"]) == 4
+        assert [b.position for b in active] == list(range(1, PARALLEL + 1))
+        assert all(b.status == "waitlist" for b in active[4:])
+
+        async with sessions() as db:
+            history = (await db.execute(select(BookingHistory))).scalars().all()
+            booked = (await db.execute(select(BookingCounter.booked))).scalars().all()
+        assert len(history) == PARALLEL
+        assert sum(booked) == PARALLEL
+
+    async def test_double_press_books_once(self, sessions, session_id):
+        """Test that one user pressing many times gets exactly one booking."""
+        results = await asyncio.gather(
+            *(_press(sessions, session_id, "book", 42) for _ in range(50))
+        )
+
+        assert sum(r.success for r in results) == 1
+        assert len(await _active(sessions, session_id)) == 1
+
+    async def test_parallel_cancels_and_bookings_keep_slots_consistent(self, sessions, session_id):
+        """Test interleaved cancels and bookings: slots stay full and positions stay unique."""
+        for i in range(8):
+            await _press(sessions, session_id, "book", 1000 + i)
+
+        presses = [_press(sessions, session_id, "cancel", 1000 + i) for i in range(6)]
+        presses += [_press(sessions, session_id, "book", 2000 + i) for i in range(40)]
+        await asyncio.gather(*presses)
+
+        active = await _active(sessions, session_id)
+        confirmed = [b for b in active if b.status == "confirmed"]
+        positions = [b.position for b in active]
+        assert len(confirmed) == 4
+        assert len(active) == 2 + 40
+        assert len(set(positions)) == len(positions)
@@ -0,0 +1,80 @@
+"""Tests for the per-user, per-game booking counters."""
+import pytest
+from sqlalchemy import select
+
+from bot.database.models import BookingCounter, User
+from bot.database.repositories import BookingHistoryRepository
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _counters(db_session) -> dict:
+    result = await db_session.execute(select(BookingCounter))
+    return {
+        (c.user_id, c.game): (c.booked, c.cancelled, c.played) for c in result.scalars()
+    }
+
+
+class TestBookingCounters:
+    """Tests for counting booking_history actions on insert."""
+
+    async def test_user_stats_from_counters(self, db_session):
+        """Test that totals and per-game counts follow the history."""
+        repo = BookingHistoryRepository(db_session)
+        await repo.add(1, "alice", "PUBG", "booked")
+        await repo.add(1, "alice", "PUBG", "cancelled")
+        await repo.add(1, "alice", "CS", "booked")
+        await repo.add_many([
+            {"user_id": 1, "username": "alice", "game": "CS", "action": "played"},
+            {"user_id": 2, "username": "bob", "game": "CS", "action": "played"},
+        ])
+
+        stats = await repo.get_user_stats(1)
+        assert stats["total_bookings"] == 2
+        assert stats["total_cancellations"] == 1
+        assert stats["total_played"] == 1
+        assert stats["by_game"] == {
+            "CS": {"booked": 1, "cancelled": 0, "played": 1},
+            "PUBG": {"booked": 1, "cancelled": 1, "played": 0},
+        }
+
+    async def test_unknown_user_has_empty_stats(self, db_session):
+        """Test the zero result for a user without history."""
+        stats = await BookingHistoryRepository(db_session).get_user_stats(42)
+        assert stats == {"total_bookings": 0, "total_cancellations": 0, "total_played": 0, "by_game": {}}
+
+    async def test_group_stats(self, db_session):
+        """Test grouping across games, ordering and name resolution."""
+        db_session.add(User(user_id=2, username="bob_current"))
+        await db_session.commit()
+
+        repo = BookingHistoryRepository(db_session)
+        await repo.add_many([
+            {"user_id": 1, "username": "Alice", "game": "PUBG", "action": "played"},
+            {"user_id": 2, "username": "bob_old", "game": "PUBG", "action": "played"},
+            {"user_id": 2, "username": "bob_old", "game": "CS", "action": "played"},
+            {"user_id": 2, "username": "bob_old", "game": "CS", "action": "cancelled"},
+        ])
+        await repo.add(1, "Alice K", "PUBG", "cancelled")
+
+        stats = await repo.get_group_stats()
+        assert stats == [
+            {"user_id": 2, "username": "bob_current", "played": 2, "cancelled": 1},
+            {"user_id": 1, "username": "Alice K", "played": 1, "cancelled": 1},
+        ]
+
+    async def test_rebuild_matches_incremental(self, db_session):
+        """Test that recounting the history reproduces the live counters."""
+        repo = BookingHistoryRepository(db_session)
+        for action in ("booked", "booked", "cancelled", "played"):
+            await repo.add(1, "alice", "PUBG", action)
+        await repo.add(2, "bob", "CS", "booked")
+        live = await _counters(db_session)
+
+        assert await repo.counters_missing() is False
+        assert await repo.rebuild_counters() == 2
+        assert await _counters(db_session) == live == {
+            (1, "PUBG"): (2, 1, 1),
+            (2, "CS"): (1, 0, 0),
+        }
@@ -2,8 +2,10 @@
 import pytest
 from datetime import time, date
 
+from sqlalchemy import select
+
 from bot.services.booking import BookingService
-from bot.database.models import Game, Session, Booking
+from bot.database.models import Game, Session, Booking, BookingHistory
 from bot.database.repositories import BookingRepository
 
 
@@ -176,6 +178,37 @@ class TestWaitlist:
         assert booking3.status == "waitlist"
         assert booking3.position == 6  # Was 7, now 6
 
+    async def test_renumbered_waitlist_skips_confirmed_positions(self, db_session, games, full_session, time_range):
+        """Test that renumbering never reuses a position held by a confirmed booking."""
+        service = BookingService(db_session)
+
+        async def book(user_id):
+            session = await service.get_session_by_id(full_session.id)
+            return await service.book(
+                session, user_id, f"user{user_id}", time_range["time_from"], time_range["time_to"]
+            )
+
+        async def cancel(user_id):
+            session = await service.get_session_by_id(full_session.id)
+            return await service.cancel(session, user_id, f"user{user_id}")
+
+        # Empty waitlist: the freed slot is later taken at position 5
+        await cancel(1002)
+        assert (await book(9001)).booking.position == 5
+        await book(9002)  # waitlist, position 6
+        await book(9003)  # waitlist, position 7
+
+        result = await cancel(1003)
+
+        assert result.promoted_user == (9002, "user9002")
+        booking_repo = BookingRepository(db_session)
+        active = await booking_repo.get_by_session(full_session.id)
+        positions = {b.user_id: (b.position, b.status) for b in active}
+        assert positions[9002] == (3, "confirmed")
+        assert positions[9001] == (5, "confirmed")
+        assert positions[9003] == (6, "waitlist")
+        assert len({p for p, _ in positions.values()}) == len(positions)
+
 
 class TestCancellation:
     """Tests for booking cancellation."""
@@ -245,6 +278,29 @@ class TestCancellation:
         assert result.success is True
         assert result.promoted_user is None  # No one promoted
 
+    async def test_admin_removal_is_not_a_cancellation(self, db_session, games, full_session, time_range):
+        """Test that an admin removal promotes the waitlist but is not counted as cancelled."""
+        service = BookingService(db_session)
+
+        await service.book(
+            session=full_session,
+            user_id=9999,
+            username="waitlist_user",
+            time_from=time_range["time_from"],
+            time_to=time_range["time_to"],
+        )
+        full_session = await service.get_session_by_id(full_session.id)
+
+        result = await service.remove_by_admin(full_session, user_id=1001, username="user1")
+
+        assert result.success is True
+        assert result.promoted_user == (9999, "waitlist_user")
+        assert (await service.get_user_stats(1001))["total_cancellations"] == 0
+        history = await db_session.execute(
+            select(BookingHistory.action).where(BookingHistory.user_id == 1001)
+        )
+        assert history.scalars().all() == ["removed"]
+
 
 class TestSessionManagement:
     """Tests for session management."""
@@ -0,0 +1,28 @@
+"""Tests for the shared bot identity."""
+from aiogram.types import User
+
+from bot.services.bot_identity import BotIdentity
+
+
+def _identity(username: str | None = "KomandaBot") -> BotIdentity:
+    return BotIdentity.from_user(User(id=42, is_bot=True, first_name="Bot", username=username))
+
+
+class TestMentionMatcher:
+    """Tests for the precompiled mention matcher."""
+
+    def test_mention_detected(self):
+        """Test a plain @mention."""
+        assert _identity().is_mentioned("@KomandaBot хто грає?") is True
+
+    def test_mention_case_insensitive(self):
+        """Test that usernames match regardless of case."""
+        assert _identity().is_mentioned("ей @komandabot") is True
+
+    def test_longer_username_not_matched(self):
+        """Test that @KomandaBot does not match @KomandaBot_fan."""
+        assert _identity().is_mentioned("@KomandaBot_fan привіт") is False
+
+    def test_no_username(self):
+        """Test that a bot without a username never matches."""
+        assert _identity(None).is_mentioned("@ anything") is False
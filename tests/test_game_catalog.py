@@ -0,0 +1,83 @@
+"""Tests for the in-memory game catalog."""
+import dataclasses
+
+import pytest
+from sqlalchemy import insert
+
+from bot.database.models import Game
+from bot.services.booking import BookingService
+from bot.services.game_catalog import GameCatalog, normalize_name
+
+
+@pytest.fixture
+def catalog(session_factory):
+    return GameCatalog(session_factory)
+
+
+async def _seed(db_session, *names: str):
+    await db_session.execute(insert(Game), [{"name": name, "max_slots": 4} for name in names])
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+class TestGameCatalog:
+    """Tests for loading, lookups and reloading."""
+
+    async def test_lookup_by_normalized_name_and_id(self, catalog, db_session):
+        """Test that names match regardless of case and padding."""
+        await _seed(db_session, "PUBG", "Counter-Strike 2")
+
+        assert await catalog.reload() == 2
+        pubg = catalog.get("pubg")
+        assert pubg.name == "PUBG"
+        assert catalog.get(" PUBG ") is pubg
+        assert catalog.get("counter-strike 2").name == "Counter-Strike 2"
+        assert catalog.get_by_id(pubg.id) is pubg
+        assert catalog.get("dota") is None
+        assert catalog.get_by_id(404) is None
+
+    async def test_empty_until_loaded(self, catalog, db_session):
+        """Test that an unloaded catalog answers nothing instead of querying."""
+        await _seed(db_session, "PUBG")
+
+        assert not catalog.loaded
+        assert catalog.get("PUBG") is None
+        assert catalog.all() == ()
+
+    async def test_entries_are_immutable(self, catalog, db_session):
+        """Test that callers cannot change the shared catalog."""
+        await _seed(db_session, "PUBG")
+        await catalog.reload()
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            catalog.get("PUBG").max_slots = 10
+        with pytest.raises(TypeError):
+            catalog._index.by_name["cs"] = catalog.get("PUBG")
+
+    async def test_reload_picks_up_new_titles(self, catalog, db_session):
+        """Test the reload hook after a game is added."""
+        await _seed(db_session, "PUBG")
+        await catalog.reload()
+        await _seed(db_session, *(f"Game {i}" for i in range(50)))
+
+        assert catalog.get("game 7") is None
+        assert await catalog.reload() == 51
+        assert catalog.get("game 7").name == "Game 7"
+        assert [g.id for g in catalog.all()] == sorted(g.id for g in catalog.all())
+
+    async def test_booking_service_resolves_from_catalog(self, catalog, db_session):
+        """Test that a loaded catalog answers BookingService without the DB."""
+        await _seed(db_session, "PUBG")
+        await catalog.reload()
+        service = BookingService(db_session, catalog=catalog)
+
+        assert await service.get_game("pubg") is catalog.get("PUBG")
+        assert await service.get_games() == list(catalog.all())
+
+
+class TestNormalizeName:
+    """Tests for the catalog key."""
+
+    def test_case_and_whitespace(self):
+        """Test that padding and case do not matter."""
+        assert normalize_name("  PUBG\n") == normalize_name("pubg") == "pubg"
@@ -0,0 +1,96 @@
+"""Tests for hourly activity counts and heatmap matrices."""
+from datetime import date, timedelta
+
+import pytest
+
+from bot.database.repositories import ActivityHoursRepository, UserActivityRepository
+from bot.services.activity_buffer import ActivityBuffer
+from bot.utils.heatmap import HourMatrix, busiest_window
+from bot.utils.message_features import MessageFeatures
+
+
+def _counts(**hours) -> list[int]:
+    counts = [0] * 24
+    for name, value in hours.items():
+        counts[int(name[1:])] = value
+    return counts
+
+
+class TestHourMatrix:
+    """Tests for the flat hour matrix helpers."""
+
+    def test_rows_and_totals(self):
+        """Test row access, row sums and per-hour column sums."""
+        matrix = HourMatrix.from_rows([(1, _counts(h09=2, h21=1)), (2, _counts(h21=4))])
+
+        assert matrix.shape == (2, 24)
+        assert matrix.row(1)[21] == 4
+        assert matrix.row_totals() == [3, 4]
+        assert matrix.hour_totals() == _counts(h09=2, h21=5)
+
+    def test_add_row(self):
+        """Test accumulating into a row of a zeroed matrix."""
+        matrix = HourMatrix(range(7))
+        matrix.add_row(5, _counts(h20=1))
+        matrix.add_row(5, _counts(h20=2, h21=1))
+
+        assert matrix.to_lists()[5] == _counts(h20=3, h21=1)
+        assert sum(matrix.row_totals()) == 4
+
+    def test_rejects_wrong_size(self):
+        """Test that the data length must match the labels."""
+        with pytest.raises(ValueError):
+            HourMatrix([1], HourMatrix([1, 2]).data)
+
+    def test_busiest_window_wraps_midnight(self):
+        """Test the best span, including one that crosses midnight."""
+        assert busiest_window(_counts(h19=5, h20=6, h21=4, h09=8), width=3) == (19, 15)
+        assert busiest_window(_counts(h23=5, h00=5, h01=5, h12=9), width=3) == (23, 15)
+        assert busiest_window(_counts(h12=1), width=1) == (12, 1)
+
+
+@pytest.mark.asyncio
+class TestHourlyStore:
+    """Tests for storing and reading hourly counts."""
+
+    async def test_buffer_flush_stores_hour_counts(self, db_session):
+        """Test that buffered messages land as per-hour counters."""
+        async def write(rows):
+            await UserActivityRepository(db_session).upsert_messages(rows)
+
+        buffer = ActivityBuffer(flush_interval=60, max_messages=1000, writer=write)
+        today = date.today()
+        features = MessageFeatures.of_text("hello")
+        for hour in (20, 20, 21):
+            buffer.record_message(1, "alice", today, hour, features)
+        buffer.record_message(2, "bob", today, 9, features)
+        buffer.record_reaction(3, today, fire=1)
+        await buffer.flush()
+        buffer.record_message(1, "alice", today, 20, features)
+        await buffer.flush()
+
+        matrix = await ActivityHoursRepository(db_session).user_hour_matrix(today)
+        assert matrix.labels == [1, 2]
+        assert matrix.row(0).tolist() == _counts(h20=3, h21=1)
+        assert matrix.row(1).tolist() == _counts(h09=1)
+
+    async def test_weekday_matrix(self, db_session):
+        """Test folding days into weekday rows, per user and for everyone."""
+        repo = UserActivityRepository(db_session)
+        monday = date.today() - timedelta(days=date.today().weekday() + 7)
+        for day, user_id, hour in (
+            (monday, 1, 18),
+            (monday + timedelta(days=7), 2, 18),
+            (monday + timedelta(days=5), 1, 22),
+        ):
+            await repo.upsert_message(user_id, None, day, hour, MessageFeatures.of_text("hi"))
+
+        hours = ActivityHoursRepository(db_session)
+        everyone = await hours.weekday_hour_matrix(monday)
+        assert everyone.shape == (7, 24)
+        assert everyone.row(0)[18] == 2
+        assert everyone.row(5)[22] == 1
+        assert everyone.row_totals() == [2, 0, 0, 0, 0, 1, 0]
+
+        alone = await hours.weekday_hour_matrix(monday, until=monday + timedelta(days=6), user_id=1)
+        assert alone.row_totals() == [1, 0, 0, 0, 0, 1, 0]
@@ -0,0 +1,31 @@
+"""Unit tests for hour-of-day masks."""
+from bot.utils.hours import (
+    NIGHT_HOURS_MASK,
+    hours_csv_to_mask,
+    hours_to_mask,
+    mask_to_hours,
+)
+
+
+class TestHourMasks:
+    """Tests for packing and unpacking hour masks."""
+
+    def test_roundtrip(self):
+        """Test that hours survive packing and unpacking."""
+        hours = [0, 7, 8, 15, 16, 23]
+        assert mask_to_hours(hours_to_mask(hours)) == hours
+
+    def test_empty_mask(self):
+        """Test that an empty mask has no hours."""
+        assert mask_to_hours(0) == []
+        assert hours_csv_to_mask("") == 0
+        assert hours_csv_to_mask(None) == 0
+
+    def test_legacy_csv(self):
+        """Test conversion of the legacy comma-separated format."""
+        assert hours_csv_to_mask("9,18,9") == hours_to_mask([9, 18])
+
+    def test_night_mask(self):
+        """Test night-owl detection as a bitwise test."""
+        assert hours_to_mask([2, 14]) & NIGHT_HOURS_MASK
+        assert not hours_to_mask([6, 23]) & NIGHT_HOURS_MASK
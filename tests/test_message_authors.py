@@ -0,0 +1,100 @@
+"""Tests for the persistent message → author index."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from bot.services.message_authors import MessageAuthorIndex
+
+
+pytestmark = pytest.mark.asyncio
+
+CHAT = -100123
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _index(session_factory, capacity: int = 64, ttl: timedelta = timedelta(days=14)) -> MessageAuthorIndex:
+    return MessageAuthorIndex(ttl=ttl, capacity=capacity, session_factory=session_factory)
+
+
+class TestMessageAuthorIndex:
+    """Tests for remembering and resolving message authors."""
+
+    async def test_lookup_from_memory(self, session_factory):
+        """Test that a remembered message resolves without a flush."""
+        index = _index(session_factory)
+        index.remember(CHAT, 10, 111, _now())
+
+        assert await index.lookup(CHAT, 10) == 111
+        assert await index.lookup(CHAT, 11) is None
+        assert await index.lookup(-1, 10) is None
+
+    async def test_survives_restart(self, session_factory):
+        """Test that flushed authors are found by a fresh index."""
+        index = _index(session_factory)
+        index.remember(CHAT, 10, 111, _now())
+        index.remember(CHAT, 11, 222, _now())
+        assert await index.flush() == 2
+        assert index.pending == 0
+
+        restarted = _index(session_factory)
+        assert await restarted.load() == 2
+        assert await restarted.lookup(CHAT, 11) == 222
+
+    async def test_falls_back_to_db_after_ring_wraps(self, session_factory):
+        """Test that messages overwritten in the ring are read from the DB."""
+        index = _index(session_factory, capacity=4)
+        for message_id in range(1, 10):
+            index.remember(CHAT, message_id, 1000 + message_id, _now())
+        await index.flush()
+
+        # Slot of message 1 now holds message 9
+        assert await index.lookup(CHAT, 1) == 1001
+        assert await index.lookup(CHAT, 9) == 1009
+
+    async def test_ttl_and_purge(self, session_factory):
+        """Test that expired messages are neither resolved nor kept."""
+        index = _index(session_factory, ttl=timedelta(days=1))
+        index.remember(CHAT, 1, 111, _now() - timedelta(days=2))
+        index.remember(CHAT, 2, 222, _now())
+        await index.flush()
+
+        assert await index.lookup(CHAT, 1) is None
+        assert await index.purge() == 1
+        assert await index.lookup(CHAT, 2) == 222
+
+    async def test_duplicate_flush_is_ignored(self, session_factory):
+        """Test that re-sending an already stored row does not fail."""
+        index = _index(session_factory)
+        index.remember(CHAT, 5, 111, _now())
+        await index.flush()
+        index.remember(CHAT, 5, 111, _now())
+        assert await index.flush() == 1
+
+    async def test_retained_rows_are_capped(self, session_factory, caplog):
+        """Test that a failed flush keeps only the newest max_pending rows."""
+        calls = []
+
+        def flaky_factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("db is down")
+            return session_factory()
+
+        index = MessageAuthorIndex(
+            ttl=timedelta(days=14), capacity=4, session_factory=flaky_factory, max_pending=3
+        )
+        for message_id in range(1, 6):
+            index.remember(CHAT, message_id, 1000 + message_id, _now())
+
+        assert await index.flush() == 0
+        assert index.pending == 3
+        assert "dropped 2 rows" in caplog.text
+
+        assert await index.flush() == 3
+        restarted = _index(session_factory)
+        assert await restarted.load() == 3
+        assert await restarted.lookup(CHAT, 1) is None
+        assert await restarted.lookup(CHAT, 5) == 1005
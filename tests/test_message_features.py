@@ -0,0 +1,92 @@
+"""Tests for single-step message feature extraction."""
+from datetime import datetime
+
+from aiogram.types import Chat, Message, MessageEntity, PhotoSize, User
+
+from bot.services.bot_identity import BotIdentity
+from bot.services.message_features import extract_features
+from bot.utils.message_features import LONG, MEDIUM, SHORT, length_bucket
+
+BOT = User(id=42, is_bot=True, first_name="Bot", username="KomandaBot")
+ALICE = User(id=1, is_bot=False, first_name="Alice", username="alice")
+IDENTITY = BotIdentity.from_user(BOT)
+
+
+def _message(text: str | None = None, **fields) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime(2026, 2, 23, 18, 0),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=ALICE,
+        text=text,
+        **fields,
+    )
+
+
+def _mention(text: str, word: str) -> MessageEntity:
+    # Offsets are in UTF-16 code units
+    prefix = text[:text.index(word)]
+    return MessageEntity(
+        type="mention",
+        offset=len(prefix.encode("utf-16-le")) // 2,
+        length=len(word.encode("utf-16-le")) // 2,
+    )
+
+
+class TestExtractFeatures:
+    """Tests for per-message metrics."""
+
+    def test_length_buckets(self):
+        """Test short / medium / long thresholds."""
+        assert length_bucket(0) == SHORT
+        assert length_bucket(20) == SHORT
+        assert length_bucket(21) == MEDIUM
+        assert length_bucket(200) == LONG
+
+    def test_text_metrics(self):
+        """Test length, question and swear counts from text."""
+        features = extract_features(_message("сука, хто грає сьогодні ввечері?"), IDENTITY)
+        assert features.length == 32
+        assert features.bucket == MEDIUM
+        assert features.is_question is True
+        assert features.swear_count == 1
+        assert features.has_media is False
+
+    def test_mention_from_entities(self):
+        """Test bot mention detection via entities, after emoji (UTF-16 offsets)."""
+        text = "🔥🔥 @komandabot ти де"
+        message = _message(text, entities=[_mention(text, "@komandabot")])
+        assert extract_features(message, IDENTITY).bot_mention is True
+
+        other = "@KomandaBot_fan привіт"
+        message = _message(other, entities=[_mention(other, "@KomandaBot_fan")])
+        assert extract_features(message, IDENTITY).bot_mention is False
+
+    def test_media_with_caption(self):
+        """Test that captions count as text and photos as media."""
+        photo = [PhotoSize(file_id="f", file_unique_id="u", width=1, height=1)]
+        message = _message(caption="дивіться?", photo=photo)
+        features = extract_features(message, IDENTITY)
+        assert features.has_media is True
+        assert features.is_question is True
+
+    def test_media_without_text_has_no_length_bucket(self):
+        """Test that a bare photo counts as media but not as a short message."""
+        photo = [PhotoSize(file_id="f", file_unique_id="u", width=1, height=1)]
+        features = extract_features(_message(photo=photo), IDENTITY)
+        assert features.has_media is True
+        assert features.length == 0
+        assert features.bucket is None
+
+    def test_reply_to_bot(self):
+        """Test reply detection."""
+        original = Message(
+            message_id=0,
+            date=datetime(2026, 2, 23, 17, 0),
+            chat=Chat(id=-100, type="supergroup"),
+            from_user=BOT,
+            text="привіт",
+        )
+        features = extract_features(_message("і тобі", reply_to_message=original), IDENTITY)
+        assert features.bot_reply is True
+        assert features.bot_mention is False
@@ -0,0 +1,102 @@
+"""Tests for batched mom-insult classification."""
+import asyncio
+from datetime import date
+
+import pytest
+
+from bot.services.mom_insults import Candidate, MomInsultClassifier, build_prompt, parse_answers
+from bot.services.tasks import TaskGroup
+
+DAY = date(2026, 2, 23)
+
+
+class FakeLLM:
+    """Answers "ТАК" for messages containing "мам" and tracks concurrency."""
+
+    def __init__(self, delay: float = 0):
+        self.prompts: list[str] = []
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, prompt: str, max_tokens: int) -> str:
+        self.prompts.append(prompt)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        lines = prompt.split("\n\n", 1)[1].splitlines()
+        return "\n".join(
+            f"{line.split('.', 1)[0]}: {'ТАК' if 'мам' in line else 'НІ'}" for line in lines
+        )
+
+
+class TestParsing:
+    """Tests for the numbered prompt and answer format."""
+
+    def test_prompt_numbers_messages(self):
+        """Test that each candidate gets its own numbered line."""
+        prompt = build_prompt([Candidate(1, "перше\nповідомлення", DAY), Candidate(2, "друге", DAY)])
+        assert "1. перше повідомлення" in prompt
+        assert "2. друге" in prompt
+
+    def test_parse_answers(self):
+        """Test tolerant parsing of indexed verdicts."""
+        answer = "1: ТАК\n2: НІ\n3) так\n7: ТАК\nщось зайве"
+        assert parse_answers(answer, 3) == {1, 3}
+
+
+@pytest.mark.asyncio
+class TestClassifier:
+    """Tests for batching, concurrency and recording."""
+
+    async def test_pile_on_shares_one_prompt(self):
+        """Test that candidates within the window are classified together."""
+        llm = FakeLLM()
+        hits = []
+        classifier = MomInsultClassifier(
+            complete=llm,
+            record=lambda uid, day: hits.append(uid),
+            window=0.05,
+            tasks=TaskGroup("test", limit=2),
+        )
+        classifier.start()
+        try:
+            classifier.submit(1, "бот, твоя мамка", DAY)
+            classifier.submit(2, "бот привіт", DAY)
+            classifier.submit(3, "мамку твою", DAY)
+        finally:
+            await classifier.stop()
+
+        assert len(llm.prompts) == 1
+        assert sorted(hits) == [1, 3]
+        assert classifier.queued == 0
+
+    async def test_in_flight_requests_are_capped(self):
+        """Test that large pile-ons are split into batches with bounded concurrency."""
+        llm = FakeLLM(delay=0.02)
+        classifier = MomInsultClassifier(
+            complete=llm,
+            record=lambda uid, day: None,
+            window=0,
+            max_batch=2,
+            tasks=TaskGroup("test", limit=2),
+        )
+        for i in range(10):
+            classifier.submit(i, "бот", DAY)
+        await classifier.stop()
+
+        assert len(llm.prompts) == 5
+        assert llm.max_running == 2
+
+    async def test_llm_error_drops_batch(self):
+        """Test that a failing request is logged and does not record hits."""
+        async def broken(prompt, max_tokens):
+            raise RuntimeError("rate limited")
+
+        hits = []
+        classifier = MomInsultClassifier(
+            complete=broken, record=lambda uid, day: hits.append(uid), tasks=TaskGroup("test")
+        )
+        assert await classifier.classify([Candidate(1, "мамка", DAY)]) == 0
+        assert hits == []
@@ -0,0 +1,72 @@
+"""Unit tests for the compiled profanity matcher."""
+from bot.utils.profanity import SwearMatcher, fold, swear_matcher
+
+
+class TestFold:
+    """Tests for text normalization before matching."""
+
+    def test_collapses_repeats(self):
+        """Test that stretched letters collapse to one."""
+        assert fold("Сууука") == "сука"
+
+    def test_latin_words_stay_latin(self):
+        """Test that Latin-only words are not transliterated onto Cyrillic stems."""
+        assert fold("Pyzdaaa") == "pyzda"
+        assert fold("her nah") == "her nah"
+
+    def test_lookalike_letters(self):
+        """Test that Latin look-alikes inside Cyrillic words are mapped back."""
+        assert fold("xуй") == fold("хуй")
+        assert fold("cука ok") == "сука ok"
+
+
+class TestSwearMatcher:
+    """Tests for counting profane words."""
+
+    def test_counts_each_word_once(self):
+        """Test per-message hit counts."""
+        assert swear_matcher.count("Ну сука, блять, знову хуйня") == 3
+        assert swear_matcher.count("") == 0
+
+    def test_variants(self):
+        """Test inflected, stretched and transliterated spellings."""
+        for text in ("сууука", "бляяять", "розпиздяй", "пиздюлі", "nakhuy", "xуйня"):
+            assert swear_matcher.count(text) == 1, text
+
+    def test_no_false_positives(self):
+        """Test innocent words sharing letters with stems."""
+        text = "херсон сукня находка дебати похудіти щука привіт"
+        assert swear_matcher.count(text) == 0
+
+    def test_no_false_positives_on_common_words(self):
+        """Test everyday words that contain "підр" or "рахуй"-like roots."""
+        for text in (
+            "підряд", "підручник", "підрахунок", "підрозділ", "підробіток",
+            "рахуй", "порахуй", "рахує", "страхуй", "застрахуй",
+        ):
+            assert swear_matcher.count(text) == 0, text
+
+    def test_no_false_positives_on_latin_words(self):
+        """Test English words whose transliteration hits a Cyrillic stem."""
+        for text in ("I told her gg", "nah", "hue", "Huey"):
+            assert swear_matcher.count(text) == 0, text
+
+    def test_no_false_positives_on_in_word_roots(self):
+        """Test Cyrillic words that contain a root after an innocent start."""
+        for text in ("психує", "психуй", "колебания", "хлебанул"):
+            assert swear_matcher.count(text) == 0, text
+
+    def test_latin_spellings(self):
+        """Test the explicit Latin list, including inflections and stretching."""
+        for text in ("khuy", "khuynya", "pyzdets", "blyat", "suuuka", "mudak"):
+            assert swear_matcher.count(text) == 1, text
+
+    def test_in_word_roots_still_match(self):
+        """Test that the exclusions leave real in-word swears alone."""
+        for text in ("охуєти", "розпиздяй", "підорас", "підари"):
+            assert swear_matcher.count(text) == 1, text
+
+    def test_custom_word_list(self):
+        """Test a matcher built from explicit lists."""
+        matcher = SwearMatcher(words={"кек"}, prefixes=set(), roots=set())
+        assert matcher.count("кеек кекс") == 1
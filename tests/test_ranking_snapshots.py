@@ -0,0 +1,114 @@
+"""Tests for ranking snapshots and rank movement."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from bot.database.models import RankingSnapshot, User, UserTotals
+from bot.database.repositories import (
+    ACTIVITY_GENERATION,
+    SNAPSHOT_RETENTION_DAYS,
+    DataGenerationRepository,
+    RankingRepository,
+)
+from bot.handlers.analytics import _movement
+
+
+TODAY = date(2026, 3, 2)
+
+
+async def _seed(db_session, xp_by_user: dict[int, int]):
+    await db_session.execute(
+        insert(UserTotals), [{"user_id": u, "xp": xp} for u, xp in xp_by_user.items()]
+    )
+    await db_session.execute(
+        insert(User), [{"user_id": u, "username": f"user{u}"} for u in xp_by_user]
+    )
+    await db_session.commit()
+
+
+async def _set_xp(db_session, user_id: int, xp: int):
+    await db_session.execute(update(UserTotals).where(UserTotals.user_id == user_id).values(xp=xp))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+class TestRankingSnapshots:
+    """Tests for taking snapshots and reading movement against them."""
+
+    async def test_snapshot_ranks_by_xp(self, db_session):
+        """Test that one snapshot stores every user's rank, ties broken by user id."""
+        await _seed(db_session, {1: 10, 2: 30, 3: 30, 4: 0})
+
+        written = await RankingRepository(db_session).take_snapshot(TODAY)
+
+        assert written == 4
+        result = await db_session.execute(
+            select(RankingSnapshot.user_id, RankingSnapshot.rank).order_by(RankingSnapshot.rank)
+        )
+        assert result.all() == [(2, 1), (3, 2), (1, 3), (4, 4)]
+
+    async def test_ranking_reports_movement_since_snapshot(self, db_session):
+        """Test live ranks against the latest snapshot, including newcomers."""
+        await _seed(db_session, {1: 100, 2: 50, 3: 10})
+        repo = RankingRepository(db_session)
+        await repo.take_snapshot(TODAY)
+
+        await _set_xp(db_session, 3, 200)
+        await _seed(db_session, {4: 60})
+        ranking = await repo.get_ranking()
+
+        assert [(r["user_id"], r["rank"], r["previous_rank"]) for r in ranking] == [
+            (3, 1, 3),
+            (1, 2, 1),
+            (4, 3, None),
+            (2, 4, 2),
+        ]
+        assert ranking[0]["username"] == "user3"
+
+    async def test_latest_snapshot_is_the_baseline(self, db_session):
+        """Test that movement is measured against the newest snapshot only."""
+        await _seed(db_session, {1: 100, 2: 50})
+        repo = RankingRepository(db_session)
+        await repo.take_snapshot(TODAY - timedelta(days=1))
+        await _set_xp(db_session, 2, 150)
+        await repo.take_snapshot(TODAY)
+
+        ranking = await repo.get_ranking()
+
+        assert all(r["rank"] == r["previous_rank"] for r in ranking)
+        assert await repo.latest_snapshot_date() == TODAY
+
+    async def test_same_day_snapshot_replaces_and_old_ones_are_pruned(self, db_session):
+        """Test idempotence per day and retention of old snapshots."""
+        await _seed(db_session, {1: 10})
+        repo = RankingRepository(db_session)
+        old = TODAY - timedelta(days=SNAPSHOT_RETENTION_DAYS + 1)
+        await repo.take_snapshot(old)
+        await repo.take_snapshot(TODAY)
+        await repo.take_snapshot(TODAY)
+
+        result = await db_session.execute(select(RankingSnapshot.taken_on))
+        assert result.scalars().all() == [TODAY]
+
+    async def test_snapshot_bumps_data_generation(self, db_session):
+        """Test that cached leaderboards in other processes see new movement."""
+        await _seed(db_session, {1: 10})
+        generations = DataGenerationRepository(db_session)
+        before = await generations.get(ACTIVITY_GENERATION)
+
+        await RankingRepository(db_session).take_snapshot(TODAY)
+
+        assert await generations.get(ACTIVITY_GENERATION) == before + 1
+
+
+class TestMovement:
+    """Tests for the /ranking movement marker."""
+
+    @pytest.mark.parametrize(
+        "rank,previous,expected",
+        [(1, 3, " ▲2"), (4, 3, " ▼1"), (2, 2, ""), (5, None, " 🆕")],
+    )
+    def test_movement(self, rank, previous, expected):
+        """Test up, down, unchanged and new entries."""
+        assert _movement(rank, previous) == expected
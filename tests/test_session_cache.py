@@ -0,0 +1,176 @@
+"""Tests for the write-through cache of open sessions and bookings."""
+import dataclasses
+from datetime import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+
+from bot.database.models import Booking, Game, Session
+from bot.services.booking import BookingService
+from bot.services.session_cache import SessionCache
+from bot.utils.time_utils import get_week_start
+
+
+pytestmark = pytest.mark.asyncio
+
+CHAT_ID = 555
+
+
+class _CountingFactory:
+    """Session factory that counts how often the cache goes to the database."""
+
+    def __init__(self, sessionmaker):
+        self.sessionmaker = sessionmaker
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.sessionmaker()
+
+
+@pytest.fixture
+def factory(session_factory):
+    return _CountingFactory(session_factory)
+
+
+@pytest.fixture
+def cache(factory):
+    return SessionCache(session_factory=factory)
+
+
+@pytest_asyncio.fixture
+async def weekend(db_session) -> dict[str, Session]:
+    game = Game(name="PUBG", max_slots=2)
+    db_session.add(game)
+    await db_session.flush()
+    sessions = {
+        day: Session(game_id=game.id, chat_id=CHAT_ID, day=day, week_start=get_week_start(), status="open")
+        for day in ("saturday", "sunday")
+    }
+    db_session.add_all(sessions.values())
+    await db_session.commit()
+    return sessions
+
+
+async def _book(db_session, cache, session, user_id: int):
+    service = BookingService(db_session, cache=cache)
+    return await service.book(session, user_id, f"user{user_id}", time(18), time(22))
+
+
+class TestReads:
+    """Tests for lazy loading and snapshot lookups."""
+
+    async def test_chat_is_loaded_once(self, cache, factory, weekend):
+        """Test that repeated lookups after the first are served from memory."""
+        first = await cache.get(CHAT_ID, "pubg", "saturday")
+        for _ in range(10):
+            assert await cache.get(CHAT_ID, "PUBG", "saturday") is first
+            await cache.open_sessions(CHAT_ID)
+
+        assert first.id == weekend["saturday"].id
+        assert first.game.max_slots == 2
+        assert factory.calls == 1
+
+    async def test_unknown_game_day_or_week(self, cache, weekend):
+        """Test lookups that match no open session."""
+        assert await cache.get(CHAT_ID, "dota", "saturday") is None
+        assert await cache.get(CHAT_ID, "pubg", "friday") is None
+        assert await cache.get(404, "pubg", "saturday") is None
+
+    async def test_snapshots_are_immutable(self, cache, weekend):
+        """Test that readers cannot modify shared snapshots."""
+        snapshot = await cache.get(CHAT_ID, "pubg", "saturday")
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.status = "closed"
+        assert isinstance(snapshot.bookings, tuple)
+
+    async def test_closed_session_by_id_is_read_through(self, cache, db_session, weekend):
+        """Test that a refresh on an old message still finds a closed session."""
+        weekend["sunday"].status = "closed"
+        await db_session.commit()
+
+        snapshot = await cache.get_by_id(weekend["sunday"].id)
+
+        assert snapshot.status == "closed"
+        assert [s.id for s in await cache.open_sessions(CHAT_ID)] == [weekend["saturday"].id]
+
+
+class TestWriteThrough:
+    """Tests that BookingService keeps loaded chats current."""
+
+    async def test_book_cancel_and_edit_update_the_snapshot(self, cache, factory, db_session, weekend):
+        """Test every mutation without any reload from the database."""
+        session = await cache.get(CHAT_ID, "pubg", "saturday")
+        for user_id in (1, 2, 3):
+            await _book(db_session, cache, session, user_id)
+        calls = factory.calls
+
+        snapshot = await cache.get(CHAT_ID, "pubg", "saturday")
+        assert [(b.user_id, b.position, b.status) for b in snapshot.bookings] == [
+            (1, 1, "confirmed"), (2, 2, "confirmed"), (3, 3, "waitlist"),
+        ]
+
+        service = BookingService(db_session, cache=cache)
+        result = await service.cancel(snapshot, 1, "user1")
+        assert result.promoted_user == (3, "user3")
+        await service.edit_booking(snapshot, 2, "user2", time(19), time(23))
+
+        snapshot = await cache.get(CHAT_ID, "pubg", "saturday")
+        assert [(b.user_id, b.position, b.status) for b in snapshot.bookings] == [
+            (3, 1, "confirmed"), (2, 2, "confirmed"),
+        ]
+        assert snapshot.booking_for(2).time_from == time(19)
+        assert snapshot.booking_for(1) is None
+        assert factory.calls == calls
+
+    async def test_old_snapshots_are_not_changed(self, cache, db_session, weekend):
+        """Test that a reader holding a snapshot keeps a consistent copy."""
+        before = await cache.get(CHAT_ID, "pubg", "saturday")
+        await _book(db_session, cache, before, 1)
+
+        assert before.bookings == ()
+        assert len((await cache.get(CHAT_ID, "pubg", "saturday")).bookings) == 1
+
+    async def test_unloaded_chat_is_loaded_fresh(self, cache, factory, db_session, weekend):
+        """Test that writes to a chat nobody read yet cost no extra work."""
+        session = await BookingService(db_session).get_session_by_id(weekend["saturday"].id)
+        await _book(db_session, cache, session, 1)
+        assert factory.calls == 0
+
+        snapshot = await cache.get(CHAT_ID, "pubg", "saturday")
+        assert [b.user_id for b in snapshot.bookings] == [1]
+
+    async def test_message_id_is_written_through(self, cache, db_session, weekend):
+        """Test that the stored message id reaches the snapshot."""
+        session = await cache.get(CHAT_ID, "pubg", "sunday")
+
+        await BookingService(db_session, cache=cache).update_message_id(session.id, 77)
+
+        assert (await cache.get_by_id(session.id)).message_id == 77
+
+    async def test_close_and_open_reload_the_chat(self, cache, db_session, weekend):
+        """Test the Sunday close and the Thursday open."""
+        assert len(await cache.open_sessions(CHAT_ID)) == 2
+        service = BookingService(db_session, cache=cache)
+
+        await service.close_all_sessions(CHAT_ID)
+        assert await cache.reload(CHAT_ID) == []
+
+        game = await service.get_game("PUBG")
+        await service.create_session(game, CHAT_ID, "saturday")
+        reopened = await cache.get(CHAT_ID, "pubg", "saturday")
+        assert reopened is not None
+        assert reopened.id != weekend["saturday"].id
+
+    async def test_out_of_band_changes_need_invalidate(self, cache, db_session, weekend):
+        """Test that the cache trusts itself until told otherwise."""
+        session = await cache.get(CHAT_ID, "pubg", "saturday")
+        await _book(db_session, cache, session, 1)
+        await db_session.execute(delete(Booking))
+        await db_session.commit()
+
+        assert len((await cache.get(CHAT_ID, "pubg", "saturday")).bookings) == 1
+        cache.invalidate(CHAT_ID)
+        assert (await cache.get(CHAT_ID, "pubg", "saturday")).bookings == ()
@@ -0,0 +1,119 @@
+"""Tests for the background task supervisor."""
+import asyncio
+
+import pytest
+
+from bot.services.tasks import Overflow, TaskGroup, TaskSupervisor
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class Recorder:
+    """Coroutine function that records calls and can be held open."""
+
+    def __init__(self):
+        self.calls: list = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, value):
+        await self.release.wait()
+        self.calls.append(value)
+
+    @property
+    def __name__(self):
+        return "recorder"
+
+
+class TestTaskGroup:
+    """Tests for limits, overflow policies and counters."""
+
+    async def test_queue_runs_in_order_within_limit(self):
+        """Test that queued tasks start as slots free up."""
+        job = Recorder()
+        group = TaskGroup("test", limit=2, overflow=Overflow.QUEUE)
+        for i in range(5):
+            assert group.spawn(job, i)
+
+        assert group.in_flight == 2
+        assert group.queued == 3
+
+        job.release.set()
+        await group.join()
+        assert job.calls == [0, 1, 2, 3, 4]
+        assert group.completed == 5
+
+    async def test_drop_when_full(self):
+        """Test that the drop policy rejects work beyond the limit."""
+        job = Recorder()
+        group = TaskGroup("test", limit=1, overflow=Overflow.DROP)
+
+        assert group.spawn(job, 1)
+        assert not group.spawn(job, 2)
+        job.release.set()
+        await group.join()
+
+        assert job.calls == [1]
+        assert group.dropped == 1
+
+    async def test_coalesce_keeps_latest_per_key(self):
+        """Test that queued tasks with the same key are replaced."""
+        job = Recorder()
+        group = TaskGroup("test", limit=1, overflow=Overflow.COALESCE)
+
+        group.spawn(job, "running", key="a")
+        group.spawn(job, "old", key="b")
+        group.spawn(job, "new", key="b")
+        job.release.set()
+        await group.join()
+
+        assert job.calls == ["running", "new"]
+        assert group.coalesced == 1
+
+    async def test_failures_are_counted(self):
+        """Test that an exception is logged and counted, not raised."""
+        async def boom():
+            raise RuntimeError("boom")
+
+        group = TaskGroup("test")
+        group.spawn(boom)
+        await group.join()
+
+        assert group.failed == 1
+        assert group.stats()["in_flight"] == 0
+
+
+class TestDrain:
+    """Tests for graceful shutdown."""
+
+    async def test_drain_waits_for_running_tasks(self):
+        """Test that drain lets tasks finish and rejects new ones."""
+        supervisor = TaskSupervisor()
+        group = supervisor.group("test", limit=1)
+
+        async def quick(value, out):
+            await asyncio.sleep(0.01)
+            out.append(value)
+
+        out = []
+        group.spawn(quick, 1, out)
+        group.spawn(quick, 2, out)
+        await supervisor.drain(timeout=1)
+
+        assert out == [1, 2]
+        assert not group.spawn(quick, 3, out)
+
+    async def test_drain_cancels_after_timeout(self):
+        """Test that stuck tasks are cancelled once the timeout expires."""
+        supervisor = TaskSupervisor()
+        group = supervisor.group("test", limit=1)
+        job = Recorder()
+        group.spawn(job, 1)
+        group.spawn(job, 2)
+
+        await supervisor.drain(timeout=0.01)
+
+        assert job.calls == []
+        assert group.cancelled == 1
+        assert group.dropped == 1
+        assert group.in_flight == 0
@@ -0,0 +1,123 @@
+"""Tests for the users directory and its LRU cache."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from bot.database.models import User, UserActivity
+from bot.database.repositories import UserActivityRepository, UserRepository
+from bot.services.user_directory import UserDirectory
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestUserRepository:
+    """Tests for the users table kept current by the activity upsert."""
+
+    async def test_lookup_is_case_insensitive(self, db_session, activity_row):
+        """Test that an @username resolves regardless of case."""
+        await UserActivityRepository(db_session).upsert_messages([
+            activity_row(1, date.today(), username="Alice"),
+        ])
+
+        repo = UserRepository(db_session)
+        assert await repo.find_by_username("alice") == 1
+        assert await repo.find_by_username("ALICE") == 1
+        assert await repo.find_by_username("bob") is None
+        assert await repo.get_username(1) == "Alice"
+
+    async def test_inactive_user_is_found(self, db_session, activity_row):
+        """Test that users outside any recent top list can still be found."""
+        activity = UserActivityRepository(db_session)
+        old = date.today() - timedelta(days=90)
+        await activity.upsert_messages([
+            activity_row(user_id, date.today(), username=f"busy{user_id}") for user_id in range(1, 120)
+        ])
+        await activity.upsert_messages([activity_row(500, old, username="quiet")])
+
+        assert await UserRepository(db_session).find_by_username("quiet") == 500
+
+    async def test_newest_username_wins_and_is_kept(self, db_session, activity_row):
+        """Test renames within a batch and deltas that carry no username."""
+        activity = UserActivityRepository(db_session)
+        today = date.today()
+        await activity.upsert_messages([
+            activity_row(1, today - timedelta(days=1), username="new_name"),
+            activity_row(1, today - timedelta(days=2), username="old_name"),
+        ])
+        await activity.upsert_messages([
+            activity_row(1, today, username=None, message_count=0, fire_reactions=1, reactions_received=1),
+        ])
+
+        repo = UserRepository(db_session)
+        assert await repo.get_username(1) == "new_name"
+        assert await repo.find_by_username("old_name") is None
+
+    async def test_activity_rows_do_not_copy_username(self, db_session, activity_row):
+        """Test that the username is stored once, in the directory."""
+        await UserActivityRepository(db_session).upsert_messages([
+            activity_row(1, date.today(), username="alice"),
+        ])
+
+        row = (await db_session.execute(UserActivity.__table__.select())).one()
+        assert row.username is None
+
+    async def test_backfill_from_legacy_rows(self, db_session):
+        """Test seeding the directory from per-day usernames."""
+        today = date.today()
+        await db_session.execute(insert(UserActivity), [
+            {"user_id": 1, "username": "old", "date": today - timedelta(days=1)},
+            {"user_id": 1, "username": "new", "date": today},
+            {"user_id": 2, "username": None, "date": today},
+        ])
+        await db_session.commit()
+
+        repo = UserRepository(db_session)
+        assert await repo.backfill_from_activity() == 1
+        assert await repo.get_username(1) == "new"
+        assert await repo.backfill_from_activity() == 0
+
+
+class TestUserDirectory:
+    """Tests for the cached username resolution."""
+
+    async def test_remembered_names_resolve_without_db(self, session_factory):
+        """Test that ingest-time names are served from the cache."""
+        directory = UserDirectory(session_factory=session_factory)
+        directory.remember(1, "Alice")
+
+        assert await directory.resolve("@alice") == 1
+        assert await directory.username(1) == "Alice"
+
+    async def test_falls_back_to_table(self, session_factory):
+        """Test that names seen by an earlier process resolve via the table."""
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"user_id": 7, "username": "Carol"}])
+            await db.commit()
+
+        directory = UserDirectory(session_factory=session_factory)
+        assert await directory.resolve("carol") == 7
+        assert await directory.username(7) == "Carol"
+        assert await directory.resolve("nobody") is None
+
+    async def test_rename_invalidates_old_name(self, session_factory):
+        """Test that a user's previous name stops resolving to them."""
+        directory = UserDirectory(session_factory=session_factory)
+        directory.remember(1, "old_name")
+        directory.remember(1, "new_name")
+
+        assert await directory.resolve("new_name") == 1
+        assert await directory.resolve("old_name") is None
+
+    async def test_least_recently_used_is_evicted(self, session_factory):
+        """Test that the cache stays within its capacity."""
+        directory = UserDirectory(capacity=2, session_factory=session_factory)
+        directory.remember(1, "a")
+        directory.remember(2, "b")
+        assert await directory.resolve("a") == 1  # "a" is now most recent
+        directory.remember(3, "c")
+
+        assert len(directory._ids) == 2
+        assert "b" not in directory._ids
+        assert await directory.resolve("a") == 1
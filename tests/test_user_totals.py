@@ -0,0 +1,76 @@
+"""Tests for the incrementally maintained user_totals rollup."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from bot.database.models import UserTotals
+from bot.database.repositories import UserActivityRepository
+from bot.database.rollup import check_user_totals, rebuild_user_totals
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _totals(db_session, user_id: int) -> UserTotals:
+    result = await db_session.execute(select(UserTotals).where(UserTotals.user_id == user_id))
+    row = result.scalar_one()
+    await db_session.refresh(row)
+    return row
+
+
+class TestIncrementalRollup:
+    """Tests for keeping user_totals current from the ingest path."""
+
+    async def test_ingest_updates_totals_and_xp(self, db_session, activity_row):
+        """Test that batches across days accumulate into one row per user."""
+        repo = UserActivityRepository(db_session)
+        today = date.today()
+
+        await repo.upsert_messages([
+            activity_row(1, today, message_count=30, total_chars=2_000),
+            activity_row(1, today - timedelta(days=1), message_count=10),
+        ])
+        await repo.upsert_messages([
+            activity_row(
+                1, today, message_count=0, total_chars=0,
+                fire_reactions=2, heart_reactions=1, reactions_received=3, mom_insult_count=1,
+            ),
+        ])
+
+        totals = await _totals(db_session, 1)
+        assert totals.message_count == 40
+        assert totals.fire_reactions == 2
+        assert totals.mom_insult_count == 1
+        # 40 messages + 20 (chars) + 4 (fire) + 1 (heart) + 5 (mom)
+        assert totals.xp == 70
+        assert totals.level == 1
+        assert await check_user_totals(db_session) == []
+
+    async def test_total_stats_read_from_rollup(self, db_session, activity_row):
+        """Test that the repository totals include precomputed XP."""
+        repo = UserActivityRepository(db_session)
+        await repo.upsert_messages([activity_row(1, date.today(), message_count=5)])
+
+        (stats,) = await repo.get_all_users_total_stats()
+        assert stats["username"] == "user1"
+        assert stats["message_count"] == 5
+        assert stats["xp"] == 5
+
+    async def test_check_and_rebuild(self, db_session, activity_row):
+        """Test that drift is detected and repaired by a rebuild."""
+        repo = UserActivityRepository(db_session)
+        await repo.upsert_messages([
+            activity_row(1, date.today()), activity_row(2, date.today(), total_chars=500),
+        ])
+
+        await db_session.execute(update(UserTotals).where(UserTotals.user_id == 2).values(xp=999))
+        await db_session.execute(UserTotals.__table__.delete().where(UserTotals.user_id == 1))
+        await db_session.commit()
+
+        problems = await check_user_totals(db_session)
+        assert {(p["user_id"], p["column"]) for p in problems} == {(1, "*"), (2, "xp")}
+
+        assert await rebuild_user_totals(db_session) == 2
+        assert await check_user_totals(db_session) == []
+        assert (await _totals(db_session, 2)).xp == 6
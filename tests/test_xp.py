@@ -0,0 +1,113 @@
+"""Tests for the shared XP formula and level table."""
+import random
+
+import pytest
+from sqlalchemy import insert, select
+
+from bot.database.models import UserTotals
+from bot.utils.xp import (
+    LEVEL_THRESHOLDS,
+    LEVELS,
+    XP_COLUMNS,
+    calculate_xp,
+    calculate_xp_batch,
+    get_level,
+    level_expr,
+    level_index,
+    xp_expr,
+)
+
+
+def _random_stats(rng: random.Random) -> dict:
+    return {name: rng.randrange(0, 20_000 if name == "total_chars" else 500) for name in XP_COLUMNS}
+
+
+class TestFormula:
+    """Tests for scalar and batch XP."""
+
+    def test_weights(self):
+        """Test each counter's contribution."""
+        stats = {
+            "message_count": 120, "total_chars": 9_999, "bot_mentions": 4, "bot_replies": 3,
+            "mom_insult_count": 2, "fire_reactions": 7, "heart_reactions": 5,
+        }
+        assert calculate_xp(stats) == 120 + 99 + 7 * 3 + 2 * 5 + 7 * 2 + 5
+
+    def test_missing_counters_count_as_zero(self):
+        """Test that partial stats (e.g. reaction-only users) are accepted."""
+        assert calculate_xp({}) == 0
+        assert calculate_xp({"fire_reactions": 3}) == 6
+
+    def test_batch_matches_scalar(self):
+        """Test that columnar XP equals per-user XP."""
+        rng = random.Random(19)
+        users = [_random_stats(rng) for _ in range(200)]
+        columns = {name: [u[name] for u in users] for name in XP_COLUMNS}
+
+        assert calculate_xp_batch(columns) == [calculate_xp(u) for u in users]
+
+    def test_batch_with_missing_columns(self):
+        """Test that absent columns are treated as zeros of the right length."""
+        assert calculate_xp_batch({"message_count": [1, 2, 3]}) == [1, 2, 3]
+        assert calculate_xp_batch({"total_chars": [250, 99]}) == [2, 0]
+        assert calculate_xp_batch({}) == []
+
+
+class TestLevels:
+    """Tests for bisect-based level lookup."""
+
+    def test_thresholds_are_ascending(self):
+        """Test that the table is sorted, which bisect relies on."""
+        assert list(LEVEL_THRESHOLDS) == sorted(LEVEL_THRESHOLDS)
+        assert LEVEL_THRESHOLDS[0] == 0
+
+    @pytest.mark.parametrize(
+        "xp,index",
+        [(-5, 0), (0, 0), (49, 0), (50, 1), (149, 1), (7999, 8), (8000, 9), (100_000, 9)],
+    )
+    def test_level_index(self, xp, index):
+        """Test boundaries: a threshold belongs to the level it starts."""
+        assert level_index(xp) == index
+
+    def test_get_level_progress(self):
+        """Test progress and XP to the next level mid-way through a level."""
+        info = get_level(100)
+
+        assert info["level_num"] == 1
+        assert info["level_name"] == LEVELS[1].title
+        assert info["level_emoji"] == "🐣"
+        assert info["xp_to_next"] == 50
+        assert info["progress"] == 50
+        assert info["is_max"] is False
+
+    def test_get_level_at_max(self):
+        """Test that the top level has no next threshold."""
+        info = get_level(9000)
+
+        assert info["level_num"] == len(LEVELS) - 1
+        assert info["xp_to_next"] == 0
+        assert info["progress"] == 100
+        assert info["is_max"] is True
+
+
+@pytest.mark.asyncio
+class TestSqlExpressions:
+    """Tests that the SQL forms agree with the Python formula."""
+
+    async def test_xp_and_level_expr_match_python(self, db_session):
+        """Test xp_expr/level_expr evaluated by the database for random counters."""
+        rng = random.Random(7)
+        users = [{"user_id": i, **_random_stats(rng)} for i in range(1, 51)]
+        users.append({"user_id": 51, **{name: 0 for name in XP_COLUMNS}, "message_count": 8000})
+        await db_session.execute(insert(UserTotals), users)
+
+        xp = xp_expr({name: getattr(UserTotals, name) for name in XP_COLUMNS})
+        result = await db_session.execute(
+            select(UserTotals.user_id, xp, level_expr(xp)).order_by(xp.desc())
+        )
+        rows = result.all()
+
+        expected = {u["user_id"]: calculate_xp(u) for u in users}
+        assert {row[0]: row[1] for row in rows} == expected
+        assert all(row[2] == level_index(row[1]) for row in rows)
+        assert [row[1] for row in rows] == sorted(expected.values(), reverse=True)
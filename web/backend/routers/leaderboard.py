@@ -1,57 +1,55 @@
-from collections import defaultdict
 from typing import Any
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database.models import UserActivity
+from bot.database.repositories import (
+    ACTIVITY_GENERATION,
+    DataGenerationRepository,
+    RankingRepository,
+)
+from bot.services.analytics_cache import AnalyticsCache
+from bot.utils.xp import get_level
 from web.backend.database import get_db
-from web.backend.xp import calculate_xp, get_level
 
 router = APIRouter()
 
+# The bot writes in another process: entries are checked against the
+# data_generations counter bumped by its activity flushes and ranking snapshots.
+_cache = AnalyticsCache(capacity=16)
+
+_COLUMNS = (
+    "message_count",
+    "total_chars",
+    "bot_mentions",
+    "bot_replies",
+    "mom_insult_count",
+    "fire_reactions",
+    "heart_reactions",
+    "swear_count",
+)
+
 
 @router.get("/leaderboard")
 async def get_leaderboard(db: AsyncSession = Depends(get_db)) -> list[dict[str, Any]]:
-    result = await db.execute(select(UserActivity))
-    rows = result.scalars().all()
+    _cache.sync(await DataGenerationRepository(db).get(ACTIVITY_GENERATION))
+    return await _cache.get_or_compute(("leaderboard",), lambda: _leaderboard(db))
 
-    aggregated: dict[int, dict[str, Any]] = defaultdict(lambda: {
-        "user_id": 0,
-        "username": "",
-        "message_count": 0,
-        "total_chars": 0,
-        "bot_mentions": 0,
-        "bot_replies": 0,
-        "mom_insult_count": 0,
-        "fire_reactions": 0,
-        "heart_reactions": 0,
-        "swear_count": 0,
-    })
 
-    for row in rows:
-        uid = row.user_id
-        agg = aggregated[uid]
-        agg["user_id"] = uid
-        if row.username:
-            agg["username"] = row.username
-        agg["message_count"] += row.message_count
-        agg["total_chars"] += row.total_chars
-        agg["bot_mentions"] += row.bot_mentions
-        agg["bot_replies"] += row.bot_replies
-        agg["mom_insult_count"] += row.mom_insult_count
-        agg["fire_reactions"] += row.fire_reactions
-        agg["heart_reactions"] += row.heart_reactions
-        agg["swear_count"] += row.swear_count
+async def _leaderboard(db: AsyncSession) -> list[dict[str, Any]]:
+    # Live totals from the user_totals rollup, sorted by the database, with
+    # each user's rank in the latest ranking snapshot
+    ranking = await RankingRepository(db).get_ranking(_COLUMNS)
 
     leaderboard_data = []
-    for uid, stats in aggregated.items():
-        xp = calculate_xp(stats)
-        level_info = get_level(xp)
+    for row in ranking:
+        stats = {**row, "username": row["username"] or ""}
+        previous_rank = stats.pop("previous_rank")
+        level_info = get_level(stats["xp"])
         leaderboard_data.append({
             **stats,
-            "xp": xp,
+            # Positive: climbed since the snapshot; None: not ranked then
+            "rank_change": None if previous_rank is None else previous_rank - stats["rank"],
             "level_num": level_info["level_num"],
             "level_name": level_info["level_name"],
             "level_emoji": level_info["level_emoji"],
@@ -60,5 +58,4 @@ async def get_leaderboard(db: AsyncSession = Depends(get_db)) -> list[dict[str,
             "is_max": level_info["is_max"],
         })
 
-    leaderboard_data.sort(key=lambda x: x["xp"], reverse=True)
     return leaderboard_data
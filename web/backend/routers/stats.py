@@ -1,12 +1,16 @@
-from collections import defaultdict
-from datetime import date, timedelta
+from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database.models import UserActivity
+from bot.database.aggregates import user_totals
+from bot.database.models import User, UserActivity
+from bot.database.repositories import ActivityHoursRepository
+from bot.database.windows import window_stats
+from bot.utils.hours import NIGHT_HOURS_MASK
+from bot.utils.time_utils import local_today
 from web.backend.database import get_db
 
 router = APIRouter()
@@ -14,85 +18,64 @@ router = APIRouter()
 
 @router.get("/stats/week")
 async def get_week_stats(db: AsyncSession = Depends(get_db)) -> list[dict[str, Any]]:
-    seven_days_ago = date.today() - timedelta(days=7)
-    result = await db.execute(
-        select(UserActivity).where(UserActivity.date >= seven_days_ago)
+    # One row per user from the materialized 7-day window
+    query = window_stats(
+        7,
+        (
+            "message_count",
+            "swear_count",
+            "mom_insult_count",
+            "fire_reactions",
+            "heart_reactions",
+            "bot_mentions",
+            "bot_replies",
+        ),
+        with_active_days=True,
     )
-    rows = result.scalars().all()
-
-    aggregated: dict[int, dict[str, Any]] = defaultdict(lambda: {
-        "user_id": 0,
-        "username": "",
-        "message_count": 0,
-        "swear_count": 0,
-        "mom_insult_count": 0,
-        "fire_reactions": 0,
-        "heart_reactions": 0,
-        "bot_mentions": 0,
-        "bot_replies": 0,
-        "active_days": 0,
-    })
-
-    for row in rows:
-        uid = row.user_id
-        agg = aggregated[uid]
-        agg["user_id"] = uid
-        if row.username:
-            agg["username"] = row.username
-        agg["message_count"] += row.message_count
-        agg["swear_count"] += row.swear_count
-        agg["mom_insult_count"] += row.mom_insult_count
-        agg["fire_reactions"] += row.fire_reactions
-        agg["heart_reactions"] += row.heart_reactions
-        agg["bot_mentions"] += row.bot_mentions
-        agg["bot_replies"] += row.bot_replies
-        if row.message_count > 0:
-            agg["active_days"] += 1
-
-    result_list = list(aggregated.values())
-    result_list.sort(key=lambda x: x["message_count"], reverse=True)
-    return result_list
+    result = await db.execute(query.order_by(desc("message_count"), "user_id"))
+    return [{**row._mapping, "username": row.username or ""} for row in result]
 
 
 @router.get("/stats/cursed")
 async def get_cursed_stats(db: AsyncSession = Depends(get_db)) -> dict[str, Any]:
-    result = await db.execute(select(UserActivity))
-    rows = result.scalars().all()
+    result = await db.execute(
+        user_totals(("swear_count", "mom_insult_count", "bot_mentions", "bot_replies", "message_count"))
+    )
 
-    agg_swears: dict[int, dict[str, Any]] = defaultdict(lambda: {"user_id": 0, "username": "", "count": 0})
-    agg_mom: dict[int, dict[str, Any]] = defaultdict(lambda: {"user_id": 0, "username": "", "count": 0})
-    agg_bot: dict[int, dict[str, Any]] = defaultdict(lambda: {"user_id": 0, "username": "", "count": 0})
-    agg_night: dict[int, dict[str, Any]] = defaultdict(lambda: {"user_id": 0, "username": "", "count": 0})
-    agg_total_msgs: dict[int, dict[str, Any]] = defaultdict(lambda: {"user_id": 0, "username": "", "count": 0})
+    agg_swears: dict[int, dict[str, Any]] = {}
+    agg_mom: dict[int, dict[str, Any]] = {}
+    agg_bot: dict[int, dict[str, Any]] = {}
+    agg_night: dict[int, dict[str, Any]] = {}
+    agg_total_msgs: dict[int, dict[str, Any]] = {}
 
-    for row in rows:
+    for row in result:
         uid = row.user_id
         username = row.username or f"user_{uid}"
-
-        agg_swears[uid]["user_id"] = uid
-        agg_swears[uid]["username"] = username
-        agg_swears[uid]["count"] += row.swear_count
-
-        agg_mom[uid]["user_id"] = uid
-        agg_mom[uid]["username"] = username
-        agg_mom[uid]["count"] += row.mom_insult_count
-
-        agg_bot[uid]["user_id"] = uid
-        agg_bot[uid]["username"] = username
-        agg_bot[uid]["count"] += row.bot_mentions + row.bot_replies
-
-        agg_total_msgs[uid]["user_id"] = uid
-        agg_total_msgs[uid]["username"] = username
-        agg_total_msgs[uid]["count"] += row.message_count
-
-        # Night owl: count days where active hours contain 0-5
-        if row.active_hours:
-            hours = [h.strip() for h in row.active_hours.split(",") if h.strip()]
-            night_hours = {"0", "1", "2", "3", "4", "5"}
-            if any(h in night_hours for h in hours):
-                agg_night[uid]["user_id"] = uid
-                agg_night[uid]["username"] = username
-                agg_night[uid]["count"] += 1
+        agg_swears[uid] = {"user_id": uid, "username": username, "count": row.swear_count}
+        agg_mom[uid] = {"user_id": uid, "username": username, "count": row.mom_insult_count}
+        agg_bot[uid] = {
+            "user_id": uid,
+            "username": username,
+            "count": row.bot_mentions + row.bot_replies,
+        }
+        agg_total_msgs[uid] = {"user_id": uid, "username": username, "count": row.message_count}
+
+    # Night owl: count days with any activity between 0:00 and 5:59, as a
+    # bitwise test on the hours mask evaluated in SQL
+    night_days = func.sum(
+        case((UserActivity.active_hours_mask.op("&")(NIGHT_HOURS_MASK) != 0, 1), else_=0)
+    )
+    night_result = await db.execute(
+        select(UserActivity.user_id, night_days)
+        .group_by(UserActivity.user_id)
+        .having(night_days > 0)
+    )
+    for uid, count in night_result.all():
+        agg_night[uid] = {
+            "user_id": uid,
+            "username": agg_total_msgs[uid]["username"] if uid in agg_total_msgs else f"user_{uid}",
+            "count": count,
+        }
 
     def top_user(agg: dict) -> dict[str, Any]:
         if not agg:
@@ -113,3 +96,35 @@ async def get_cursed_stats(db: AsyncSession = Depends(get_db)) -> dict[str, Any]
         "night_owl": top_user(agg_night),
         "top_chatters": top_chatters,
     }
+
+
+@router.get("/stats/heatmap")
+async def get_heatmap(
+    days: int = Query(30, ge=1, le=365), db: AsyncSession = Depends(get_db)
+) -> dict[str, Any]:
+    """Hour-of-day message counts: users × 24 and weekday (Mon..Sun) × 24."""
+    since = local_today() - timedelta(days=days)
+    repo = ActivityHoursRepository(db)
+    users = await repo.user_hour_matrix(since)
+    weekdays = await repo.weekday_hour_matrix(since)
+
+    names = {}
+    if users.labels:
+        result = await db.execute(
+            select(User.user_id, User.username).where(User.user_id.in_(users.labels))
+        )
+        names = dict(result.all())
+
+    return {
+        "days": days,
+        "hours": weekdays.hour_totals(),
+        "weekdays": weekdays.to_lists(),
+        "users": [
+            {
+                "user_id": user_id,
+                "username": names.get(user_id) or f"user_{user_id}",
+                "hours": counts,
+            }
+            for user_id, counts in zip(users.labels, users.to_lists())
+        ],
+    }